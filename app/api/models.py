@@ -6,6 +6,8 @@ from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
+import config
+
 
 class ValidationMode(str, Enum):
     """Validation mode"""
@@ -13,6 +15,21 @@ class ValidationMode(str, Enum):
     STREAM = "stream"
 
 
+class LandmarkFormat(str, Enum):
+    """Wire format for stream landmarks"""
+    JSON = "json"
+    INT16 = "int16"
+    FLOAT16 = "float16"
+    DELTA = "delta"
+
+
+class LandmarkSubset(str, Enum):
+    """Named Face Mesh landmark subsets"""
+    CONTOURS = "contours"
+    EYES = "eyes"
+    POSE = "pose"
+
+
 class ValidationRequest(BaseModel):
     """Request model for photo validation"""
     image: Optional[str] = Field(
@@ -35,6 +52,37 @@ class ValidationRequest(BaseModel):
         default=ValidationMode.FULL,
         description="Validation mode: 'full' for complete validation or 'stream' for real-time"
     )
+    include_landmarks: bool = Field(
+        default=False,
+        description="Include 2D/3D face landmarks in the face metadata (full mode only)"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        description="Client-chosen id tying consecutive stream frames into one session"
+    )
+    landmark_format: LandmarkFormat = Field(
+        default=LandmarkFormat.JSON,
+        description="Stream landmark wire format: 'json' (list of {x, y}), 'int16', 'float16' or 'delta'"
+    )
+    landmark_subset: Optional[LandmarkSubset] = Field(
+        default=None,
+        description="Return only a named landmark subset instead of all 468 points"
+    )
+    frame_timestamp_ms: Optional[float] = Field(
+        default=None,
+        description="Client capture time of the frame in milliseconds (any monotonic clock, consistent within a session)"
+    )
+    rtt_ms: Optional[float] = Field(
+        default=None,
+        ge=0,
+        description="Last round trip measured by the client, used to predict guidance at render time"
+    )
+    session_token: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        description="Token from the previous stream response; lets any server node resume the session"
+    )
 
     @model_validator(mode="after")
     def _require_image_payload(self):
@@ -43,6 +91,48 @@ class ValidationRequest(BaseModel):
             raise ValueError("Either 'image' or 'encrypted_image' must be provided")
         return self
 
+    @model_validator(mode="after")
+    def _require_session_for_delta(self):
+        """Delta landmarks are relative to the previous frame of a session."""
+        if self.landmark_format == LandmarkFormat.DELTA and not self.session_id:
+            raise ValueError("'session_id' is required for landmark_format 'delta'")
+        return self
+
+
+class BurstValidationRequest(BaseModel):
+    """Request model for burst validation (several frames of one capture)"""
+    images: Optional[List[str]] = Field(
+        default=None,
+        min_length=config.BURST_MIN_FRAMES,
+        max_length=config.BURST_MAX_FRAMES,
+        description="Base64 encoded frames (unencrypted)"
+    )
+    encrypted_images: Optional[List[str]] = Field(
+        default=None,
+        min_length=config.BURST_MIN_FRAMES,
+        max_length=config.BURST_MAX_FRAMES,
+        description="AES-GCM encrypted base64 frames (same format as 'encrypted_image')"
+    )
+    encryption: Optional[str] = Field(
+        default=None,
+        description="Encryption scheme for 'encrypted_images' (default: aes_gcm)"
+    )
+    check_accessories: bool = Field(
+        default=True,
+        description="Run MiniCPM-o accessories/filters check on the selected frame"
+    )
+    include_landmarks: bool = Field(
+        default=False,
+        description="Include 2D/3D face landmarks in the face metadata"
+    )
+
+    @model_validator(mode="after")
+    def _require_frames(self):
+        """Ensure exactly one frame list is provided."""
+        if (self.images is None) == (self.encrypted_images is None):
+            raise ValueError("Exactly one of 'images' or 'encrypted_images' must be provided")
+        return self
+
 
 class ErrorDetail(BaseModel):
     """Error detail model"""
@@ -63,12 +153,50 @@ class StreamValidationResponse(BaseModel):
     errors: List[ErrorDetail] = Field(default_factory=list, description="List of validation errors")
     landmarks: Optional[List[Dict[str, float]]] = Field(
         default=None,
-        description="Face landmarks for UI overlay"
+        description="Face landmarks for UI overlay (landmark_format 'json')"
+    )
+    landmarks_packed: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Base64-packed face landmarks for compact landmark formats"
     )
     guidance: Optional[Dict[str, Any]] = Field(
         default=None,
         description="Real-time guidance data (pose, centering, etc.)"
     )
+    reused: bool = Field(
+        default=False,
+        description="True if the frame matched the previous one and its result was reused"
+    )
+    session_token: Optional[str] = Field(
+        default=None,
+        description="Signed session state to send with the next frame of the session "
+                    "(null when SESSION_TOKEN_SECRET is not configured)"
+    )
+    capture: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Auto-capture status of the session (state, stability); carries the full "
+                    "validation 'result' of the captured frame once, when it completes"
+    )
+
+
+class BurstFrameSummary(BaseModel):
+    """Stream-tier outcome of one burst frame"""
+    index: int = Field(..., description="Position of the frame in the request")
+    status: str = Field(..., description="Stream-tier status: 'success' or 'fail'")
+    score: float = Field(..., description="Ranking score from sharpness, pose and centering (0-1)")
+    errors: List[str] = Field(default_factory=list, description="Stream-tier error codes")
+
+
+class BurstValidationResponse(ValidationResponse):
+    """Response model for burst validation: full result of the selected frame"""
+    selected_index: Optional[int] = Field(
+        default=None,
+        description="Index of the frame that was fully validated (None if no frame decoded)"
+    )
+    frames: List[BurstFrameSummary] = Field(
+        default_factory=list,
+        description="Stream-tier summary of every frame"
+    )
 
 
 class HealthResponse(BaseModel):
@@ -3,19 +3,27 @@ API routes for photo validation
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import logging
 
 from app.api.models import (
+    BurstValidationRequest,
+    BurstValidationResponse,
     ValidationRequest,
     ValidationResponse,
     StreamValidationResponse,
     HealthResponse,
     ValidationMode
 )
+from app.core.capture import AutoCapture
+from app.core.metrics import get_metrics
 from app.core.pipeline import ValidationPipeline
+from app.core.session_tokens import encode_session_token, resume_session, session_tokens_enabled
+from app.core.sessions import get_session_store
 from app.core import settings
 from app.utils.crypto_utils import decrypt_image_payload
+from app.utils.landmark_utils import LANDMARK_SUBSETS
 from app import __version__
 import config
 
@@ -26,7 +34,9 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
-# Initialize pipelines (singleton pattern for model loading)
+# Initialize pipelines (singleton pattern for model loading).
+# Both are execution plans over the shared validator registry, so validator
+# instances and their models are created once per process.
 _full_pipeline = None
 _stream_pipeline = None
 
@@ -100,6 +110,16 @@ async def health_check():
     )
 
 
+@router.get("/metrics")
+async def metrics():
+    """
+    In-process service metrics (counters, stream frame reuse ratio, active sessions)
+    """
+    snapshot = get_metrics().snapshot()
+    snapshot['stream_sessions'] = len(get_session_store())
+    return snapshot
+
+
 @router.get("/aws/identity")
 async def aws_identity():
     """Return AWS STS caller identity using the task role (if configured)."""
@@ -137,10 +157,13 @@ async def validate_photo(request: ValidationRequest):
         # Select pipeline based on mode
         if request.mode == ValidationMode.FULL:
             pipeline = get_full_pipeline()
-            result = pipeline.validate(
+            # Off the event loop so concurrent requests share segmentation batches
+            result = await run_in_threadpool(
+                pipeline.validate,
                 image_payload,
                 is_base64=True,
                 run_accessories=request.check_accessories,
+                include_landmarks=request.include_landmarks,
             )
         else:
             pipeline = get_stream_pipeline()
@@ -160,6 +183,54 @@ async def validate_photo(request: ValidationRequest):
         )
 
 
+@router.post("/validate/burst", response_model=BurstValidationResponse)
+async def validate_burst(request: BurstValidationRequest):
+    """
+    Validate a burst of frames from one capture
+    
+    Runs the lightweight checks (format, quality, face, pose, geometry) on all
+    frames in parallel, ranks them by sharpness, pose and centering, and runs
+    background segmentation and the accessories check only on the best frame.
+    Returns its index and full validation result.
+    """
+    if request.encrypted_images is not None:
+        try:
+            frames = [decrypt_image_payload(frame, request.encryption) for frame in request.encrypted_images]
+        except ValueError as exc:
+            logger.error(f"Failed to decrypt burst frame: {exc}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid encrypted payload: {exc}"
+            )
+    else:
+        frames = request.images
+    
+    try:
+        pipeline = get_full_pipeline()
+        result = await run_in_threadpool(
+            pipeline.validate_burst,
+            frames,
+            is_base64=True,
+            run_accessories=request.check_accessories,
+            include_landmarks=request.include_landmarks,
+        )
+        
+        return BurstValidationResponse(
+            status=result['status'],
+            errors=result['errors'],
+            metadata=result.get('metadata'),
+            selected_index=result.get('selected_index'),
+            frames=result.get('frames', [])
+        )
+        
+    except Exception as e:
+        logger.error(f"Burst validation error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error during burst validation: {str(e)}"
+        )
+
+
 @router.post("/validate/stream", response_model=StreamValidationResponse)
 async def validate_stream(request: ValidationRequest):
     """
@@ -174,21 +245,47 @@ async def validate_stream(request: ValidationRequest):
     
     Skips heavy models (background segmentation) for faster response times.
     Returns face landmarks and guidance data for real-time UI overlay.
+    Landmarks can be requested as a named subset and in compact packed
+    formats ('int16', 'float16', or per-session 'delta' with a session_id).
+    Within a session, guidance also carries Kalman-filtered values predicted
+    at the client's render time ('predicted'), and 'capture' reports
+    auto-capture: once the session is stable its best frame is validated with
+    the full pipeline in the background.
     
     Use this for live camera feedback to help users position themselves correctly.
     """
     try:
         pipeline = get_stream_pipeline()
         image_payload = _extract_image_payload(request)
-        result = pipeline.validate_stream(image_payload, is_base64=True)
+        session = None
+        if request.session_id:
+            session = get_session_store().get_or_create(request.session_id)
+            if request.session_token and session_tokens_enabled():
+                # Previous frames may have been served by another node
+                resume_session(session, request.session_token)
+        result = pipeline.validate_stream(
+            image_payload,
+            is_base64=True,
+            landmark_format=request.landmark_format.value,
+            landmark_subset=request.landmark_subset.value if request.landmark_subset else None,
+            session=session,
+            frame_timestamp_ms=request.frame_timestamp_ms,
+            rtt_ms=request.rtt_ms,
+        )
         
         return StreamValidationResponse(
             status=result['status'],
             errors=result['errors'],
             landmarks=result.get('landmarks'),
-            guidance=result.get('guidance')
+            landmarks_packed=result.get('landmarks_packed'),
+            guidance=result.get('guidance'),
+            reused=result.get('reused', False),
+            session_token=encode_session_token(session) if session is not None else None,
+            capture=result.get('capture')
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Stream validation error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -197,6 +294,32 @@ async def validate_stream(request: ValidationRequest):
         )
 
 
+@router.get("/sessions/{session_id}/capture")
+async def session_capture(session_id: str):
+    """
+    Auto-capture status of a stream session
+    
+    Once the session has been stable long enough, its best frame is validated
+    with the full pipeline in the background; 'result' then holds the same
+    payload as /validate/photo would return for that frame.
+    """
+    session = get_session_store().get(session_id)
+    capture = AutoCapture.status(session) if session is not None else None
+    if capture is None:
+        raise HTTPException(status_code=404, detail="No auto-capture for this session")
+    return capture
+
+
+@router.get("/landmarks/subsets")
+async def landmark_subsets():
+    """
+    Face Mesh landmark indices of every named landmark subset
+    
+    Packed and JSON stream landmarks for a subset are returned in this index order.
+    """
+    return {name: indices.tolist() for name, indices in LANDMARK_SUBSETS.items()}
+
+
 @router.post("/validate/upload")
 async def validate_upload(file: UploadFile = File(...)):
     """
@@ -218,7 +341,7 @@ async def validate_upload(file: UploadFile = File(...)):
         
         # Run validation
         pipeline = get_full_pipeline()
-        result = pipeline.validate(contents, is_base64=False)
+        result = await run_in_threadpool(pipeline.validate, contents, is_base64=False)
         
         return ValidationResponse(
             status=result['status'],
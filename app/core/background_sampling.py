@@ -0,0 +1,171 @@
+"""
+Low-frequency asynchronous background checks for stream sessions
+"""
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import config
+from app.core.metrics import get_metrics
+from app.core.workers import ProcessLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackgroundSampleState:
+    """Background checks of one stream session"""
+
+    last_frame: Optional[int] = None  # session frame number of the last submitted check
+    signature: Optional[np.ndarray] = None  # frame signature of the last submitted check
+    future: Optional[Future] = None
+    pending_frame: Optional[int] = None  # frame number the running check belongs to
+    verdict: Optional[Dict[str, Any]] = None  # latest finished check
+
+    def due(self, frame_count: int, signature: Optional[np.ndarray]) -> bool:
+        """Whether the frame should be checked: first frame, every Nth frame or a large scene change"""
+        if self.future is not None:
+            return False
+        if self.last_frame is None:
+            return True
+        if frame_count - self.last_frame >= config.STREAM_BACKGROUND_INTERVAL:
+            return True
+        return (
+            signature is not None
+            and self.signature is not None
+            and float(np.abs(signature - self.signature).mean()) >= config.STREAM_BACKGROUND_SIGNATURE_CHANGE
+        )
+
+    def collect(self) -> None:
+        """Pick up the verdict of a finished check"""
+        if self.future is None or not self.future.done():
+            return
+        future, self.future = self.future, None
+        if future.cancelled():
+            return
+        try:
+            verdict = future.result()
+        except Exception as exc:
+            logger.warning("Stream background check failed: %s", exc)
+            get_metrics().increment('stream_background_checks_failed')
+            return
+        if verdict is not None:
+            self.verdict = dict(verdict, frame=self.pending_frame)
+            get_metrics().increment('stream_background_checks_completed')
+
+    def close(self) -> None:
+        """Cancel a pending check"""
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+
+
+def low_resolution_copy(
+    image: np.ndarray,
+    face_bbox: Tuple[int, int, int, int]
+) -> Tuple[np.ndarray, Tuple[int, int, int, int]]:
+    """
+    Frame downscaled to STREAM_BACKGROUND_MAX_SIDE with the face bbox in its coordinates
+
+    Nearest-neighbour subsampling keeps per-pixel colour variance comparable
+    with the full-resolution uniformity threshold.
+    """
+    h, w = image.shape[:2]
+    scale = min(1.0, config.STREAM_BACKGROUND_MAX_SIDE / float(max(h, w)))
+    if scale >= 1.0:
+        return image.copy(), face_bbox
+    small = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_NEAREST)
+    x, y, bw, bh = face_bbox
+    return small, (int(x * scale), int(y * scale), int(bw * scale), int(bh * scale))
+
+
+class BackgroundSampler:
+    """
+    Checks the background of stream sessions off the request path.
+
+    The first processed frame of a session with a single face, then every
+    STREAM_BACKGROUND_INTERVAL frames or after a scene change larger than
+    STREAM_BACKGROUND_SIGNATURE_CHANGE, is copied at low resolution and
+    checked on a worker thread. Stream responses carry the latest finished
+    verdict, so background problems surface long before the final full
+    validation while per-frame latency stays the same.
+    """
+
+    def __init__(self, run_check: Callable[[np.ndarray, Tuple[int, int, int, int]], Optional[Dict[str, Any]]]):
+        """
+        Args:
+            run_check: Background check of a low-resolution BGR frame and its face bbox
+        """
+        self.run_check = run_check
+
+    def observe(
+        self,
+        session,
+        image: np.ndarray,
+        face_bbox: Optional[Tuple[int, int, int, int]],
+        face_count: int,
+        signature: Optional[np.ndarray]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Start a check for a processed session frame if one is due
+
+        Args:
+            session: StreamSession of the frame
+            image: Decoded BGR frame
+            face_bbox: Face bbox of the frame (x, y, w, h)
+            face_count: Number of detected faces
+            signature: frame_signature of the frame
+
+        Returns:
+            Latest finished background verdict, if any
+        """
+        with session.lock:
+            state = session.background
+            if state is None:
+                state = session.background = BackgroundSampleState()
+            state.collect()
+
+            if face_count == 1 and face_bbox is not None and state.due(session.frame_count, signature):
+                small, small_bbox = low_resolution_copy(image, face_bbox)
+                state.future = get_background_executor().submit(self.run_check, small, small_bbox)
+                state.pending_frame = session.frame_count
+                state.last_frame = session.frame_count
+                state.signature = signature
+                get_metrics().increment('stream_background_checks_started')
+
+            return dict(state.verdict) if state.verdict is not None else None
+
+    @staticmethod
+    def latest(session) -> Optional[Dict[str, Any]]:
+        """Latest finished background verdict of a session, if any"""
+        with session.lock:
+            state = session.background
+            if state is None:
+                return None
+            state.collect()
+            return dict(state.verdict) if state.verdict is not None else None
+
+
+def _create_background_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=config.STREAM_BACKGROUND_WORKERS,
+        thread_name_prefix='stream-background'
+    )
+
+
+_background_executor = ProcessLocal(_create_background_executor)
+
+
+def get_background_executor() -> ThreadPoolExecutor:
+    """
+    Get or initialize the stream background worker pool of this process
+
+    Rebuilt after a fork like the auto-capture pool, so pre-forked workers
+    never submit to their parent's threads.
+    """
+    return _background_executor.get()
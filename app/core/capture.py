@@ -0,0 +1,253 @@
+"""
+Server-side auto-capture: full validation of the best stable stream frame
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import config
+from app.core.context import HeadPose
+from app.core.metrics import get_metrics
+from app.core.workers import ProcessLocal
+
+logger = logging.getLogger(__name__)
+
+STATE_IDLE = 'idle'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+
+def frame_score(
+    blur_score: Optional[float],
+    pose: Optional[HeadPose],
+    center_offset: Optional[Tuple[float, float]] = None
+) -> float:
+    """
+    Capture quality of a single passing frame in [0, 1]
+
+    Mean of sharpness (Laplacian variance relative to twice the blur threshold)
+    and frontality (1 at a frontal pose, falling quadratically to 0 at any
+    pose threshold, so small natural deviations barely count). With a center
+    offset, centering (1 when centered, 0 at the centering tolerance) is
+    averaged in as well.
+    """
+    sharpness = min(1.0, (blur_score or 0.0) / (2 * config.BLUR_THRESHOLD))
+    if pose is None:
+        frontality = 0.0
+    else:
+        deviation = max(
+            abs(pose.yaw) / config.MAX_YAW,
+            abs(pose.pitch) / config.MAX_PITCH,
+            abs(pose.roll) / config.MAX_ROLL,
+        )
+        frontality = max(0.0, 1.0 - deviation ** 2)
+    if center_offset is None:
+        return (sharpness + frontality) / 2
+    offset = max(abs(value or 0.0) for value in center_offset)
+    centering = max(0.0, 1.0 - offset / config.FACE_CENTER_TOLERANCE)
+    return (sharpness + frontality + centering) / 3
+
+
+@dataclass
+class CaptureState:
+    """Auto-capture progress of one stream session"""
+
+    streak: int = 0  # consecutive passing frames
+    stability: float = 0.0
+    best_score: float = -1.0
+    best_image: Optional[bytes] = None  # encoded bytes of the best frame of the streak
+    armed: bool = True  # a new capture may start; re-armed when the streak breaks
+    future: Optional[Future] = None
+    state: str = STATE_IDLE
+    captures: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    delivered: bool = False  # result already attached to a stream response
+
+    def observe(self, passed: bool, score: float, image_bytes: bytes) -> None:
+        """Fold one stream frame into the streak and stability score"""
+        if not passed:
+            self.streak = 0
+            self.stability = 0.0
+            self.best_score = -1.0
+            self.best_image = None
+            self.armed = True
+            return
+        self.streak += 1
+        if score > self.best_score:
+            self.best_score = score
+            self.best_image = image_bytes
+        self.stability = min(1.0, self.streak / config.AUTO_CAPTURE_MIN_PASSING_FRAMES) * score
+
+    def collect(self) -> None:
+        """Pick up the outcome of a finished capture run"""
+        if self.future is None or not self.future.done():
+            return
+        future, self.future = self.future, None
+        if future.cancelled():
+            self.state = STATE_IDLE
+            return
+        try:
+            self.result = future.result()
+            self.error = None
+            self.state = STATE_DONE
+            get_metrics().increment('auto_captures_completed')
+        except Exception as exc:
+            logger.warning("Auto-capture validation failed: %s", exc)
+            self.result = None
+            self.error = str(exc)
+            self.state = STATE_FAILED
+            get_metrics().increment('auto_captures_failed')
+        self.delivered = False
+
+    def status(self, include_result: bool = True) -> Dict[str, Any]:
+        """Client-facing snapshot of the capture"""
+        status: Dict[str, Any] = {
+            'state': self.state,
+            'stability': round(self.stability, 3),
+            'streak': self.streak,
+            'captures': self.captures,
+        }
+        if include_result and self.state == STATE_DONE:
+            status['result'] = self.result
+        if self.state == STATE_FAILED:
+            status['error'] = self.error
+        return status
+
+    def close(self) -> None:
+        """Cancel a pending run and drop held frames"""
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+        self.best_image = None
+        self.result = None
+
+
+class AutoCapture:
+    """
+    Promotes the best frame of a stable stream to the full pipeline.
+
+    Every stream frame of a session updates a stability score built from the
+    streak of consecutive passing frames and the frame's sharpness and
+    frontality. Once it crosses AUTO_CAPTURE_THRESHOLD, the sharpest, most
+    frontal frame of the streak (whose bytes the server already holds) is run
+    through the full pipeline on a worker thread while the user keeps posing.
+    The outcome is attached to the session's next stream response and served
+    by GET /sessions/{session_id}/capture.
+    
+    Captures run on a per-process pool with at most AUTO_CAPTURE_MAX_PENDING
+    queued or running; a session that becomes stable while the pool is full
+    stays armed and starts its capture with a later frame.
+    
+    Capture results live in the memory of the node that ran them. When the
+    session's next frames go to another node, the session token re-arms the
+    capture there (a run still pending or undelivered counts as not taken),
+    so the other node captures again instead of the client waiting for a
+    result it cannot reach; GET /sessions/{session_id}/capture only answers
+    on the node that ran the capture.
+    """
+
+    def __init__(self, run_full: Callable[[bytes], Dict[str, Any]]):
+        """
+        Args:
+            run_full: Full validation of encoded image bytes
+        """
+        self.run_full = run_full
+
+    def observe(self, session, passed: bool, score: float, image_bytes: bytes) -> Dict[str, Any]:
+        """
+        Update the session's capture state with a stream frame
+
+        Args:
+            session: StreamSession of the frame
+            passed: Whether the frame passed all stream checks
+            score: frame_score of the frame
+            image_bytes: Encoded frame as received
+
+        Returns:
+            Capture status for the stream response; a finished result is
+            included once
+        """
+        with session.lock:
+            state = session.capture
+            if state is None:
+                state = session.capture = CaptureState()
+            state.collect()
+            state.observe(passed, score, image_bytes)
+
+            if (
+                state.armed
+                and state.future is None
+                and state.best_image is not None
+                and state.stability >= config.AUTO_CAPTURE_THRESHOLD
+            ):
+                future = submit_capture(self.run_full, state.best_image)
+                if future is None:
+                    get_metrics().increment('auto_captures_rejected')
+                else:
+                    state.future = future
+                    state.armed = False
+                    state.state = STATE_RUNNING
+                    state.captures += 1
+                    get_metrics().increment('auto_captures_started')
+
+            status = state.status(include_result=not state.delivered)
+            if 'result' in status:
+                state.delivered = True
+            return status
+
+    @staticmethod
+    def status(session) -> Optional[Dict[str, Any]]:
+        """Current capture status of a session (with result), if any"""
+        with session.lock:
+            state = session.capture
+            if state is None:
+                return None
+            state.collect()
+            return state.status()
+
+
+def _create_capture_pool() -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    executor = ThreadPoolExecutor(
+        max_workers=config.AUTO_CAPTURE_WORKERS,
+        thread_name_prefix='auto-capture'
+    )
+    return executor, threading.BoundedSemaphore(max(1, config.AUTO_CAPTURE_MAX_PENDING))
+
+
+_capture_pool = ProcessLocal(_create_capture_pool)
+
+
+def get_capture_executor() -> ThreadPoolExecutor:
+    """
+    Get or initialize the auto-capture worker pool of this process
+
+    Worker threads do not survive a fork, so a process that inherited the
+    pool from its parent (e.g. a pre-forked server worker) creates its own.
+    """
+    return _capture_pool.get()[0]
+
+
+def submit_capture(fn: Callable[..., Any], *args: Any) -> Optional[Future]:
+    """
+    Queue a capture run on this process's pool
+
+    Returns:
+        The run's future, or None if AUTO_CAPTURE_MAX_PENDING runs are
+        already queued or running
+    """
+    executor, slots = _capture_pool.get()
+    if not slots.acquire(blocking=False):
+        return None
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    # Also called when a queued run is cancelled
+    future.add_done_callback(lambda _: slots.release())
+    return future
@@ -0,0 +1,142 @@
+"""
+Typed per-request context shared between validators
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+import numpy as np
+import cv2
+
+if TYPE_CHECKING:
+    from app.core.sessions import StreamSession
+
+
+@dataclass(slots=True)
+class HeadPose:
+    """Head pose estimated for the current frame"""
+
+    yaw: float
+    pitch: float
+    roll: float
+    rotation_vector: Optional[np.ndarray] = None
+    translation_vector: Optional[np.ndarray] = None
+    source: str = 'mesh'  # 'mesh' (PnP on Face Mesh), 'rigid' (landmarks_3d alignment) or 'lite' (detector keypoints)
+
+
+@dataclass(slots=True)
+class FrameContext:
+    """
+    State produced and consumed by validators while processing one image.
+
+    Each stage reads and writes explicit fields instead of merging its metadata
+    into a shared dict, so large structures (landmarks, masks) are stored once
+    and never collide across stages. Derived image planes are computed lazily
+    and cached for the lifetime of the request.
+    """
+
+    image: np.ndarray
+    image_bytes: Optional[bytes] = None
+
+    # Stream session the frame belongs to (None for single-shot requests)
+    session: Optional["StreamSession"] = None
+
+    # Crop (x1, y1, x2, y2) around the session's last face that pixel analysis
+    # is restricted to; None analyses the full frame. Results stay in
+    # full-frame coordinates.
+    roi: Optional[Tuple[int, int, int, int]] = None
+
+    # Step 3: face detection
+    face_bbox: Optional[Tuple[int, int, int, int]] = None
+    face_count: int = 0
+    face_keypoints: Optional[np.ndarray] = None  # (6, 2) detector keypoints, pixels
+    defer_mesh: bool = False  # let the face step postpone Face Mesh until requested
+    periodic_mesh: bool = False  # run a deferred Face Mesh anyway for the landmark-based geometry checks
+    landmarks: Optional[np.ndarray] = None  # (N, 2) float32, full-frame pixels
+    landmarks_3d: Optional[np.ndarray] = None  # (N, 3) float32, z scaled like x
+
+    # Step 4: pose estimation
+    pose: Optional[HeadPose] = None
+
+    # Step 6: background segmentation
+    segmentation_mask: Optional[np.ndarray] = None  # uint8 class indices at segmentation resolution
+
+    _landmark_loader: Optional[Callable[[], None]] = field(default=None, repr=False)
+    _rgb: Optional[np.ndarray] = field(default=None, repr=False)
+    _gray: Optional[np.ndarray] = field(default=None, repr=False)
+    _roi_rgb: Optional[np.ndarray] = field(default=None, repr=False)
+    _roi_gray: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB plane of the image (decoded once per request)"""
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale plane of the image (decoded once per request)"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def analysis_origin(self) -> Tuple[int, int]:
+        """Full-frame (x, y) of the analysed region's top-left corner"""
+        if self.roi is None:
+            return (0, 0)
+        return (self.roi[0], self.roi[1])
+
+    @property
+    def analysis_image(self) -> np.ndarray:
+        """BGR view of the analysed region (the ROI crop or the full frame)"""
+        if self.roi is None:
+            return self.image
+        x1, y1, x2, y2 = self.roi
+        return self.image[y1:y2, x1:x2]
+
+    @property
+    def analysis_rgb(self) -> np.ndarray:
+        """Contiguous RGB plane of the analysed region, converted only for the crop"""
+        if self.roi is None:
+            return self.rgb
+        if self._roi_rgb is None:
+            self._roi_rgb = cv2.cvtColor(self.analysis_image, cv2.COLOR_BGR2RGB)
+        return self._roi_rgb
+
+    @property
+    def analysis_gray(self) -> np.ndarray:
+        """Grayscale plane of the analysed region, converted only for the crop"""
+        if self.roi is None:
+            return self.gray
+        if self._roi_gray is None:
+            self._roi_gray = cv2.cvtColor(self.analysis_image, cv2.COLOR_BGR2GRAY)
+        return self._roi_gray
+
+    def clear_roi(self) -> None:
+        """Fall back to analysing the full frame"""
+        self.roi = None
+        self._roi_rgb = None
+        self._roi_gray = None
+
+    def defer_landmarks(self, loader: Callable[[], None]) -> None:
+        """Register the deferred Face Mesh stage that fills in the landmarks"""
+        self._landmark_loader = loader
+
+    def load_landmarks(self) -> Optional[np.ndarray]:
+        """
+        Return the landmarks, running the deferred Face Mesh stage if needed
+        """
+        if self.landmarks is None and self._landmark_loader is not None:
+            loader, self._landmark_loader = self._landmark_loader, None
+            loader()
+        return self.landmarks
+
+    @property
+    def height(self) -> int:
+        return self.image.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.image.shape[1]
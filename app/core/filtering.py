@@ -0,0 +1,125 @@
+"""
+Kalman filtering and latency-compensated prediction of stream guidance
+"""
+
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+import config
+
+
+class GuidanceFilter:
+    """
+    Independent constant-velocity Kalman filters over named guidance signals.
+
+    Each signal (yaw, offset_x, ...) has a [value, velocity] state driven by
+    white acceleration noise. All signals are propagated together with
+    vectorized NumPy operations; a frame only updates the signals it measured.
+    The filtered state can be extrapolated to the client's render time, so the
+    guidance compensates for the network round trip.
+    """
+
+    def __init__(
+        self,
+        noise: Mapping[str, Tuple[float, float]] = config.STREAM_GUIDANCE_NOISE,
+        max_gap: float = config.STREAM_GUIDANCE_MAX_GAP
+    ):
+        """
+        Args:
+            noise: Per signal (acceleration std per second², measurement std),
+                in the units of the signal
+            max_gap: Seconds without measurements after which the state is reset
+        """
+        self.signals = tuple(noise)
+        self._index = {name: i for i, name in enumerate(self.signals)}
+        accel_std, measurement_std = np.array([noise[name] for name in self.signals], dtype=np.float64).T
+        self._accel_var = accel_std ** 2
+        self._measurement_var = measurement_std ** 2
+        self.max_gap = max_gap
+
+        n = len(self.signals)
+        self._x = np.zeros((n, 2))
+        self._p = np.zeros((n, 2, 2))
+        self._initialized = np.zeros(n, dtype=bool)
+        self._timestamp: Optional[float] = None
+
+    def reset(self) -> None:
+        """Forget all signal states"""
+        self._initialized[:] = False
+        self._timestamp = None
+
+    def update(self, measurements: Mapping[str, Optional[float]], timestamp: float) -> bool:
+        """
+        Propagate all signals to a frame time and fuse the frame's measurements
+
+        Args:
+            measurements: Signal values of the frame (None values are skipped)
+            timestamp: Capture time of the frame in seconds
+
+        Returns:
+            False if the frame is older than the filter state and was ignored
+        """
+        if self._timestamp is not None:
+            dt = timestamp - self._timestamp
+            if dt < 0:
+                return False
+            if dt > self.max_gap:
+                self.reset()
+            else:
+                self._propagate(dt)
+        self._timestamp = timestamp
+
+        for name, value in measurements.items():
+            if value is None or name not in self._index:
+                continue
+            i = self._index[name]
+            if not self._initialized[i]:
+                self._x[i] = (value, 0.0)
+                # Unknown velocity: allow about one second of acceleration
+                self._p[i] = np.diag((self._measurement_var[i], self._accel_var[i]))
+                self._initialized[i] = True
+                continue
+
+            # Measurement H = [1, 0]
+            p = self._p[i]
+            innovation_var = p[0, 0] + self._measurement_var[i]
+            gain = p[:, 0] / innovation_var
+            self._x[i] += gain * (value - self._x[i, 0])
+            self._p[i] = p - np.outer(gain, p[0])
+        return True
+
+    def predict(self, horizon: float) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Extrapolate the filtered signals `horizon` seconds past the last frame
+
+        Returns:
+            Tuple of (predicted values, confidence in [0, 1]) for initialized
+            signals. Confidence is the measurement std over the predicted std,
+            capped at 1: 1 means the prediction is at least as precise as a
+            single measurement, lower values mean uncertain extrapolation.
+        """
+        h = max(horizon, 0.0)
+        values = self._x[:, 0] + h * self._x[:, 1]
+        variance = (
+            self._p[:, 0, 0]
+            + 2 * h * self._p[:, 0, 1]
+            + h * h * self._p[:, 1, 1]
+            + self._accel_var * h ** 4 / 4
+        )
+        confidence = np.minimum(1.0, np.sqrt(self._measurement_var / np.maximum(variance, 1e-12)))
+
+        predicted = {}
+        confidences = {}
+        for name, i in self._index.items():
+            if self._initialized[i]:
+                predicted[name] = float(values[i])
+                confidences[name] = float(confidence[i])
+        return predicted, confidences
+
+    def _propagate(self, dt: float) -> None:
+        """Constant-velocity prediction step for all signals"""
+        self._x[:, 0] += dt * self._x[:, 1]
+        f = np.array([[1.0, dt], [0.0, 1.0]])
+        q = np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        self._p = f @ self._p @ f.T + self._accel_var[:, None, None] * q
@@ -0,0 +1,76 @@
+"""
+In-process counters for service metrics
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Dict, List
+
+
+class Metrics:
+    """Thread-safe named counters and value summaries exposed by the /metrics endpoint"""
+
+    def __init__(self):
+        self._counters: Counter = Counter()
+        # name -> [count, sum, max]
+        self._observations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one sample of a value (e.g. a batch size or a wait time)"""
+        with self._lock:
+            summary = self._observations.get(name)
+            if summary is None:
+                self._observations[name] = [1, value, value]
+            else:
+                summary[0] += 1
+                summary[1] += value
+                summary[2] = max(summary[2], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current counter values plus derived ratios
+
+        Returns:
+            Dictionary of counters, 'observations' (count, mean and max of
+            each observed value) and 'stream_reuse_ratio' (fraction of stream
+            frames answered from the previous result)
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {
+                name: {'count': int(count), 'mean': total / count, 'max': peak}
+                for name, (count, total, peak) in self._observations.items()
+            }
+        frames = counters.get('stream_frames_total', 0)
+        reused = counters.get('stream_frames_reused', 0)
+        return {
+            'counters': counters,
+            'observations': observations,
+            'stream_reuse_ratio': reused / frames if frames else 0.0,
+        }
+
+    def reset(self) -> None:
+        """Clear all counters and observations"""
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Get or initialize the process-wide metrics"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
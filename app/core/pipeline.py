@@ -2,64 +2,84 @@
 Validation pipeline that orchestrates all validators
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from app.validators.step1_format import FormatValidator
-from app.validators.step2_quality import QualityValidator
-from app.validators.step3_face import FaceDetectionValidator
-from app.validators.step4_pose import PoseEstimationValidator
-from app.validators.step5_geometry import GeometryValidator
-from app.validators.step6_background import BackgroundValidator
-from app.validators.step7_accessories import AccessoriesValidator
+import cv2
+import numpy as np
+
+from app.core.background_sampling import BackgroundSampler
+from app.core.capture import AutoCapture, frame_score
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult
-from app.utils.image_utils import decode_base64_image, load_image_from_bytes
+from app.core.filtering import GuidanceFilter
+from app.core.metrics import get_metrics
+from app.core.registry import ValidatorRegistry, get_validator_registry
+from app.core.sessions import CachedStreamResult, StreamSession
+from app.utils.image_utils import decode_base64_image, frame_signature, load_image_from_bytes
+from app.utils.landmark_utils import (
+    FORMAT_DELTA,
+    FORMAT_JSON,
+    encode_landmarks,
+    landmarks_to_dicts,
+    select_landmark_subset,
+)
 from app.core import settings
 import config
 
 
+# Execution plans: ordered step names run by each mode
+STREAM_PLAN = ('format', 'quality', 'face', 'pose', 'geometry')
+FULL_PLAN = STREAM_PLAN + ('background', 'accessories')
+
+
 class ValidationPipeline:
     """
     Orchestrates the complete photo validation pipeline
     """
     
-    def __init__(self, mode: str = config.MODE_FULL):
+    def __init__(
+        self,
+        mode: str = config.MODE_FULL,
+        registry: Optional[ValidatorRegistry] = None,
+        plan: Optional[Tuple[str, ...]] = None
+    ):
         """
         Initialize the validation pipeline
         
         Args:
             mode: Validation mode ('full' or 'stream')
+            registry: Validator registry to draw shared instances from
+                (defaults to the process-wide registry)
+            plan: Step names to run, in order (defaults to the mode's plan)
         """
         self.mode = mode
+        self.registry = registry or get_validator_registry()
         
-        # Initialize validators based on mode
+        # Resolve the execution plan for this mode against the shared registry
+        if plan is not None:
+            self.plan = tuple(plan)
+        else:
+            self.plan = FULL_PLAN if self.mode == config.MODE_FULL else STREAM_PLAN
         self.validators = self._initialize_validators()
-    
-    def _initialize_validators(self) -> List:
-        """Initialize validators based on mode"""
-        validators = []
-        
-        # Step 1: Format validation (always run)
-        validators.append(('format', FormatValidator()))
-        
-        # Step 2: Quality checks (always run)
-        validators.append(('quality', QualityValidator()))
+        # Stream sessions check the background every few frames on a worker
+        self.background_sampler = (
+            BackgroundSampler(self._run_background_check)
+            if self.mode == config.MODE_STREAM and config.STREAM_BACKGROUND_PREVIEW else None
+        )
         
-        # Step 3: Face detection (always run)
-        validators.append(('face', FaceDetectionValidator()))
-        
-        # Step 4: Pose estimation (always run)
-        validators.append(('pose', PoseEstimationValidator()))
-        
-        # Step 5: Geometry checks (always run)
-        validators.append(('geometry', GeometryValidator()))
-        
-        # Step 6: Background analysis (only in full mode, heavy model)
-        if self.mode == config.MODE_FULL:
-            validators.append(('background', BackgroundValidator()))
-            # Step 7: Accessories detection (MiniCPM-o, optional per request)
-            validators.append(('accessories', AccessoriesValidator(enabled=True)))
-        
-        return validators
+        # Stable stream sessions hand their best frame to a full pipeline over
+        # the same registry; it is created on the capture worker when first needed
+        self.auto_capture = AutoCapture(self._run_capture) if self.mode == config.MODE_STREAM else None
+        self._capture_pipeline = None
+        self._capture_pipeline_lock = threading.Lock()
+    
+    def _initialize_validators(self) -> List[Tuple[str, Any]]:
+        """Resolve shared validator instances for every step in the plan"""
+        return [(name, self.registry.get(name)) for name in self.plan]
 
     def warmup(self):
         """
@@ -81,7 +101,37 @@ class ValidationPipeline:
                     "Warmup for %s failed: %s", name, e
                 )
     
-    def validate(self, image_data: Any, is_base64: bool = True, run_accessories: bool = True) -> Dict[str, Any]:
+    def _decode_image(self, image_data: Any, is_base64: bool) -> Tuple[np.ndarray, bytes]:
+        """
+        Decode the request payload into a BGR image and its raw bytes
+        
+        Args:
+            image_data: Image as base64 string or bytes
+            is_base64: Whether image_data is base64 encoded
+            
+        Returns:
+            Tuple of (BGR image, raw image bytes for format validation)
+        """
+        if is_base64:
+            image = decode_base64_image(image_data)
+            # For format validation, we need the raw bytes
+            if "," in image_data:
+                image_data_clean = image_data.split(",")[1]
+            else:
+                image_data_clean = image_data
+            image_bytes = base64.b64decode(image_data_clean)
+        else:
+            image = load_image_from_bytes(image_data)
+            image_bytes = image_data
+        return image, image_bytes
+    
+    def validate(
+        self,
+        image_data: Any,
+        is_base64: bool = True,
+        run_accessories: bool = True,
+        include_landmarks: bool = False
+    ) -> Dict[str, Any]:
         """
         Run the complete validation pipeline
         
@@ -89,24 +139,14 @@ class ValidationPipeline:
             image_data: Image as base64 string or bytes
             is_base64: Whether image_data is base64 encoded
             run_accessories: Whether to run the MiniCPM-o accessories check
+            include_landmarks: Whether to serialize face landmarks into the face metadata
             
         Returns:
             Dictionary with validation results
         """
         # Decode image
         try:
-            if is_base64:
-                image = decode_base64_image(image_data)
-                # For format validation, we need the raw bytes
-                if "," in image_data:
-                    image_data_clean = image_data.split(",")[1]
-                else:
-                    image_data_clean = image_data
-                import base64
-                image_bytes = base64.b64decode(image_data_clean)
-            else:
-                image = load_image_from_bytes(image_data)
-                image_bytes = image_data
+            image, image_bytes = self._decode_image(image_data, is_base64)
         except Exception as e:
             return {
                 'status': 'fail',
@@ -117,17 +157,167 @@ class ValidationPipeline:
                 'metadata': {}
             }
         
-        # Initialize context for sharing data between validators
-        context = {
-            'image_bytes': image_bytes
-        }
+        # Typed context shared between validators
+        context = FrameContext(image=image, image_bytes=image_bytes)
         
         # Run validators sequentially
         all_errors = []
         all_metadata = {}
+        accessories_ran, _ = self._run_validators(
+            self.validators, image, context, run_accessories, all_errors, all_metadata
+        )
+
+        if self.mode == config.MODE_FULL and run_accessories and not accessories_ran:
+            all_metadata['accessories'] = {
+                'vlm_enabled': False,
+                'message': 'Accessories check skipped because of earlier validation failure'
+            }
+        
+        # Serialize large structures only when the client asked for them
+        if include_landmarks and 'face' in all_metadata and context.landmarks is not None:
+            all_metadata['face']['landmarks'] = landmarks_to_dicts(context.landmarks)
+            all_metadata['face']['landmarks_3d'] = landmarks_to_dicts(context.landmarks_3d)
+        
+        # Determine overall status
+        status = 'success' if len(all_errors) == 0 else 'fail'
+        
+        return {
+            'status': status,
+            'errors': all_errors,
+            'metadata': all_metadata
+        }
+    
+    def validate_burst(
+        self,
+        images: List[Any],
+        is_base64: bool = True,
+        run_accessories: bool = True,
+        include_landmarks: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Validate a burst of frames from one capture and fully validate the best
+        
+        The stream-tier steps (format to geometry) run on every frame in
+        parallel; frames are ranked by stream errors, then by sharpness, pose
+        frontality and centering. Background and accessories only run on the
+        winner, reusing its frame context.
+        
+        Args:
+            images: Frames as base64 strings or bytes
+            is_base64: Whether the frames are base64 encoded
+            run_accessories: Whether to run the MiniCPM-o accessories check
+            include_landmarks: Whether to serialize face landmarks into the face metadata
+            
+        Returns:
+            Dictionary with the winner's validation results, 'selected_index'
+            and a per-frame 'frames' summary
+        """
+        light = [v for v in self.validators if v[0] in STREAM_PLAN]
+        heavy = [v for v in self.validators if v[0] not in STREAM_PLAN]
+        
+        def run_light(index: int) -> Dict[str, Any]:
+            try:
+                image, image_bytes = self._decode_image(images[index], is_base64)
+            except Exception as e:
+                return {'index': index, 'decoded': False, 'error': str(e)}
+            context = FrameContext(image=image, image_bytes=image_bytes)
+            errors: List[Dict[str, Any]] = []
+            metadata: Dict[str, Any] = {}
+            _, completed = self._run_validators(light, image, context, run_accessories, errors, metadata)
+            geometry = metadata.get('geometry') or {}
+            score = frame_score(
+                (metadata.get('quality') or {}).get('blur_score'),
+                context.pose,
+                (geometry.get('center_offset_x'), geometry.get('center_offset_y')) if geometry else None
+            ) if completed else 0.0
+            return {
+                'index': index, 'decoded': True, 'image': image, 'context': context,
+                'errors': errors, 'metadata': metadata, 'completed': completed, 'score': score
+            }
+        
+        workers = max(1, min(len(images), config.BURST_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='burst') as executor:
+            frames = list(executor.map(run_light, range(len(images))))
+        
+        frame_summaries = [
+            {
+                'index': frame['index'],
+                'status': 'success' if frame['decoded'] and not frame['errors'] else 'fail',
+                'score': round(frame.get('score', 0.0), 4),
+                'errors': [error['code'] for error in frame['errors']] if frame['decoded'] else ['invalid_image'],
+            }
+            for frame in frames
+        ]
+        
+        decoded = [frame for frame in frames if frame['decoded']]
+        if not decoded:
+            return {
+                'status': 'fail',
+                'errors': [{
+                    'code': 'invalid_image',
+                    'message': f"Failed to decode any burst frame: {frames[0]['error']}"
+                }],
+                'metadata': {},
+                'selected_index': None,
+                'frames': frame_summaries
+            }
+        
+        # Fewest stream errors first (frames stopped early rank last), then best score
+        best = min(decoded, key=lambda f: (not f['completed'], len(f['errors']), -f['score'], f['index']))
+        
+        all_errors = best['errors']
+        all_metadata = best['metadata']
+        context = best['context']
         accessories_ran = False
+        if best['completed']:
+            accessories_ran, _ = self._run_validators(
+                heavy, best['image'], context, run_accessories, all_errors, all_metadata
+            )
         
-        for name, validator in self.validators:
+        if run_accessories and not accessories_ran:
+            all_metadata['accessories'] = {
+                'vlm_enabled': False,
+                'message': 'Accessories check skipped because of earlier validation failure'
+            }
+        
+        if include_landmarks and 'face' in all_metadata and context.landmarks is not None:
+            all_metadata['face']['landmarks'] = landmarks_to_dicts(context.landmarks)
+            all_metadata['face']['landmarks_3d'] = landmarks_to_dicts(context.landmarks_3d)
+        
+        return {
+            'status': 'success' if len(all_errors) == 0 else 'fail',
+            'errors': all_errors,
+            'metadata': all_metadata,
+            'selected_index': best['index'],
+            'frames': frame_summaries
+        }
+    
+    def _run_validators(
+        self,
+        validators: List[Tuple[str, Any]],
+        image: np.ndarray,
+        context: FrameContext,
+        run_accessories: bool,
+        all_errors: List[Dict[str, Any]],
+        all_metadata: Dict[str, Any]
+    ) -> Tuple[bool, bool]:
+        """
+        Run validators in order, collecting errors and metadata in place
+        
+        Args:
+            validators: (step name, validator) pairs to run
+            image: Decoded BGR image
+            context: Frame context shared between the validators
+            run_accessories: Whether to run the MiniCPM-o accessories check
+            all_errors: Error list to extend
+            all_metadata: Metadata dictionary to fill per step
+            
+        Returns:
+            Tuple of (accessories check ran, all steps ran without a critical failure)
+        """
+        accessories_ran = False
+        
+        for name, validator in validators:
             try:
                 if name == 'accessories':
                     if not run_accessories:
@@ -147,17 +337,14 @@ class ValidationPipeline:
                 # Merge metadata
                 all_metadata[name] = result.metadata
                 
-                # Update context with results for next validators
-                context.update(result.metadata)
-                
                 # Early exit on critical failures
                 if name == 'format' and not result.passed:
                     # If format is invalid, no point continuing
-                    break
+                    return accessories_ran, False
                 
                 if name == 'face' and not result.passed:
                     # If no face detected, can't continue with pose/geometry
-                    break
+                    return accessories_ran, False
                 
             except Exception as e:
                 # Log error but continue
@@ -165,23 +352,19 @@ class ValidationPipeline:
                     'error': str(e),
                     'validator_failed': True
                 }
-
-        if self.mode == config.MODE_FULL and run_accessories and not accessories_ran:
-            all_metadata['accessories'] = {
-                'vlm_enabled': False,
-                'message': 'Accessories check skipped because of earlier validation failure'
-            }
         
-        # Determine overall status
-        status = 'success' if len(all_errors) == 0 else 'fail'
-        
-        return {
-            'status': status,
-            'errors': all_errors,
-            'metadata': all_metadata
-        }
+        return accessories_ran, True
     
-    def validate_stream(self, image_data: Any, is_base64: bool = True) -> Dict[str, Any]:
+    def validate_stream(
+        self,
+        image_data: Any,
+        is_base64: bool = True,
+        landmark_format: str = FORMAT_JSON,
+        landmark_subset: Optional[str] = None,
+        session: Optional[StreamSession] = None,
+        frame_timestamp_ms: Optional[float] = None,
+        rtt_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Run fast validation for real-time streaming (skips heavy models)
         
@@ -190,23 +373,21 @@ class ValidationPipeline:
         Args:
             image_data: Image as base64 string or bytes
             is_base64: Whether image_data is base64 encoded
+            landmark_format: Landmark wire format ('json', 'int16', 'float16' or 'delta')
+            landmark_subset: Optional named landmark subset to return
+            session: Stream session of the client (enables face tracking and
+                'delta' landmarks)
+            frame_timestamp_ms: Client capture time of the frame (session clock)
+            rtt_ms: Round trip last measured by the client
             
         Returns:
             Dictionary with validation results and landmarks for UI guidance
         """
+        received_at = time.monotonic()
+        
         # Decode image
         try:
-            if is_base64:
-                image = decode_base64_image(image_data)
-                if "," in image_data:
-                    image_data_clean = image_data.split(",")[1]
-                else:
-                    image_data_clean = image_data
-                import base64
-                image_bytes = base64.b64decode(image_data_clean)
-            else:
-                image = load_image_from_bytes(image_data)
-                image_bytes = image_data
+            image, image_bytes = self._decode_image(image_data, is_base64)
         except Exception as e:
             return {
                 'status': 'fail',
@@ -215,20 +396,61 @@ class ValidationPipeline:
                     'message': f'Failed to decode image: {str(e)}'
                 }],
                 'landmarks': None,
-                'guidance': {}
+                'landmarks_packed': None,
+                'guidance': {},
+                'reused': False,
+                'capture': None
             }
         
+        metrics = get_metrics()
+        metrics.increment('stream_frames_total')
+        frame_number = 0
+        if session is not None:
+            with session.lock:
+                session.frame_count += 1
+                frame_number = session.frame_count
+        
+        # Frame-difference gate: a session frame that barely differs from the
+        # last processed one is answered from that frame's result
+        signature = None
+        if session is not None and config.STREAM_REUSE_RESULTS:
+            signature = frame_signature(image, config.STREAM_REUSE_SIGNATURE_SIZE)
+            cached = self._get_reusable_result(session, signature, image.shape)
+            if cached is not None:
+                metrics.increment('stream_frames_reused')
+                # A reused frame still extends (or breaks) the capture streak
+                capture = self._observe_capture(
+                    session, cached.status == 'success', cached.capture_score, image_bytes
+                )
+                return self._stream_response(
+                    cached.status, list(cached.errors), dict(cached.guidance),
+                    cached.landmarks, cached.raw_angles, landmark_format, landmark_subset,
+                    session, received_at, frame_timestamp_ms, rtt_ms, reused=True,
+                    capture=capture, background=self._latest_background(session)
+                )
+        
         # Initialize context
-        context = {
-            'image_bytes': image_bytes
-        }
+        context = FrameContext(
+            image=image,
+            image_bytes=image_bytes,
+            session=session,
+            defer_mesh=config.STREAM_POSE_ENGINE == 'lite'
+        )
+        if context.defer_mesh and session is not None:
+            # The lite pose skips Face Mesh, and with it the landmark-based hair
+            # occlusion check; run the mesh on the session's first frame and
+            # every STREAM_LITE_MESH_INTERVAL frames after it
+            context.periodic_mesh = (frame_number - 1) % max(1, config.STREAM_LITE_MESH_INTERVAL) == 0
+        if session is not None and config.STREAM_ROI_PROCESSING:
+            context.roi = self._get_session_roi(session, image.shape)
         
         # Run lightweight validators only (steps 1-5)
-        lightweight_validators = [v for v in self.validators if v[0] not in ['background', 'accessories']]
+        lightweight_validators = [v for v in self.validators if v[0] in STREAM_PLAN]
         
         all_errors = []
-        landmarks = None
         guidance = {}
+        raw_angles = None
+        blur_score = None
         
         for name, validator in lightweight_validators:
             try:
@@ -237,19 +459,6 @@ class ValidationPipeline:
                 if not result.passed:
                     all_errors.extend([error.to_dict() for error in result.errors])
                 
-                # Extract landmarks for UI
-                if name == 'face' and 'landmarks' in result.metadata:
-                    landmarks = result.metadata.get('landmarks')
-                    guidance['face_bbox'] = result.metadata.get('face_bbox')
-                
-                # Extract pose for UI
-                if name == 'pose':
-                    guidance['pose'] = {
-                        'yaw': result.metadata.get('yaw'),
-                        'pitch': result.metadata.get('pitch'),
-                        'roll': result.metadata.get('roll')
-                    }
-                
                 # Extract geometry for UI
                 if name == 'geometry':
                     guidance['centering'] = {
@@ -257,8 +466,12 @@ class ValidationPipeline:
                         'offset_y': result.metadata.get('center_offset_y')
                     }
                     guidance['face_size_ratio'] = result.metadata.get('face_size_ratio')
-                
-                context.update(result.metadata)
+                    # False when the frame had no landmarks (lite pose without a mesh frame)
+                    guidance['hair_occlusion_checked'] = result.metadata.get('hair_occlusion_checked')
+                if name == 'pose':
+                    raw_angles = result.metadata.get('raw_angles')
+                if name == 'quality':
+                    blur_score = result.metadata.get('blur_score')
                 
                 # Early exit on critical failures
                 if name == 'format' and not result.passed:
@@ -269,11 +482,339 @@ class ValidationPipeline:
             except Exception as e:
                 pass
         
+        # Face and pose guidance for UI are read from the typed context
+        if context.face_bbox is not None:
+            guidance['face_bbox'] = context.face_bbox
+        if context.pose is not None:
+            guidance['pose'] = {
+                'yaw': context.pose.yaw,
+                'pitch': context.pose.pitch,
+                'roll': context.pose.roll
+            }
+        
         status = 'success' if len(all_errors) == 0 else 'fail'
+        capture_score = frame_score(blur_score, context.pose) if status == 'success' else 0.0
+        
+        if session is not None:
+            # Only a single detected face seeds the next frame's crop
+            with session.lock:
+                session.roi_face_bbox = context.face_bbox if context.face_count == 1 else None
+        
+        if signature is not None:
+            with session.lock:
+                previous = session.cached_result
+                session.cached_result = CachedStreamResult(
+                    signature=signature,
+                    image_shape=image.shape,
+                    status=status,
+                    errors=all_errors,
+                    guidance=dict(guidance),
+                    landmarks=context.landmarks,
+                    raw_angles=raw_angles,
+                    capture_score=capture_score,
+                    # Right after a scene change tracking and smoothing may
+                    # still lag; only a result of a settled scene is reused
+                    settled=(
+                        previous is not None
+                        and previous.image_shape == image.shape
+                        and self._signature_distance(signature, previous.signature) < config.STREAM_REUSE_THRESHOLD
+                    )
+                )
+        
+        capture = None
+        background = None
+        if session is not None:
+            capture = self._observe_capture(session, status == 'success', capture_score, image_bytes)
+            background = self._observe_background(session, image, context, signature)
+        
+        return self._stream_response(
+            status, all_errors, guidance, context.landmarks, raw_angles, landmark_format,
+            landmark_subset, session, received_at, frame_timestamp_ms, rtt_ms, reused=False,
+            capture=capture, background=background
+        )
+    
+    def _observe_background(
+        self,
+        session: StreamSession,
+        image: np.ndarray,
+        context: FrameContext,
+        signature: Optional[np.ndarray]
+    ) -> Optional[Dict[str, Any]]:
+        """Start a due background check of a processed session frame and return the latest verdict"""
+        if self.background_sampler is None or not config.STREAM_BACKGROUND_PREVIEW:
+            return None
+        if signature is None:
+            signature = frame_signature(image, config.STREAM_REUSE_SIGNATURE_SIZE)
+        return self.background_sampler.observe(
+            session, image, context.face_bbox, context.face_count, signature
+        )
+    
+    def _latest_background(self, session: StreamSession) -> Optional[Dict[str, Any]]:
+        """Latest background verdict of a session (for reused frames)"""
+        if self.background_sampler is None or not config.STREAM_BACKGROUND_PREVIEW:
+            return None
+        return BackgroundSampler.latest(session)
+    
+    def _run_background_check(self, image: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        """
+        Background verdict of a low-resolution session frame (runs on the background worker)
+        
+        Advisory only: its errors do not change the stream status, the full
+        validation stays the authority on the background.
+        """
+        context = FrameContext(image=image, face_bbox=face_bbox, face_count=1)
+        result = self.registry.get('background_preview').validate(image, context)
+        metadata = result.metadata or {}
+        return {
+            'passed': result.passed,
+            'errors': [error.to_dict()['code'] for error in result.errors],
+            'person_count': metadata.get('person_count'),
+            'background_variance': metadata.get('background_variance'),
+            'decision_path': metadata.get('decision_path')
+        }
+    
+    def _observe_capture(
+        self,
+        session: StreamSession,
+        passed: bool,
+        score: float,
+        image_bytes: bytes
+    ) -> Optional[Dict[str, Any]]:
+        """Feed a session frame to auto-capture and return its capture status"""
+        if self.auto_capture is None or not config.AUTO_CAPTURE:
+            return None
+        return self.auto_capture.observe(session, passed, score, image_bytes)
+    
+    def _run_capture(self, image_bytes: bytes) -> Dict[str, Any]:
+        """
+        Full validation of a captured stream frame (runs on the capture worker)
+        
+        Args:
+            image_bytes: Encoded frame as received by the stream endpoint
+            
+        Returns:
+            Full pipeline result, as returned by validate()
+        """
+        if self._capture_pipeline is None:
+            with self._capture_pipeline_lock:
+                if self._capture_pipeline is None:
+                    # AUTO_CAPTURE_PLAN leaves out the VLM accessories step by default
+                    self._capture_pipeline = ValidationPipeline(
+                        mode=config.MODE_FULL, registry=self.registry, plan=config.AUTO_CAPTURE_PLAN
+                    )
+        return self._capture_pipeline.validate(
+            image_bytes,
+            is_base64=False,
+            run_accessories='accessories' in self._capture_pipeline.plan
+        )
+    
+    def _get_session_roi(self, session: StreamSession, image_shape: tuple) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Crop around the session's last face for this frame, if worthwhile
+        
+        Returns:
+            (x1, y1, x2, y2) in pixels, or None to analyse the full frame
+        """
+        with session.lock:
+            bbox = session.roi_face_bbox
+        if bbox is None:
+            return None
+        
+        h, w = image_shape[:2]
+        x, y, bw, bh = bbox
+        margin = max(bw, bh) * config.STREAM_ROI_MARGIN
+        x1 = max(0, int(x - margin))
+        y1 = max(0, int(y - margin))
+        x2 = min(w, int(x + bw + margin))
+        y2 = min(h, int(y + bh + margin))
+        if x2 <= x1 or y2 <= y1:
+            return None
+        if (x2 - x1) * (y2 - y1) > config.STREAM_ROI_MAX_AREA_FRACTION * w * h:
+            return None
+        return (x1, y1, x2, y2)
+    
+    def _get_reusable_result(
+        self,
+        session: StreamSession,
+        signature: np.ndarray,
+        image_shape: tuple
+    ) -> Optional[CachedStreamResult]:
+        """
+        Cached result of the session if the frame is close enough to reuse it
+        
+        Frames are compared with the last fully processed frame, so slow drift
+        still triggers processing; STREAM_REUSE_MAX_CONSECUTIVE bounds how long
+        a result is served. A result is only reused once the scene has settled,
+        i.e. it was computed for a frame close to the one processed before it.
+        """
+        with session.lock:
+            cached = session.cached_result
+            if cached is None or not cached.settled or cached.image_shape != image_shape:
+                return None
+            if cached.reuse_count >= config.STREAM_REUSE_MAX_CONSECUTIVE:
+                return None
+            if self._signature_distance(signature, cached.signature) >= config.STREAM_REUSE_THRESHOLD:
+                return None
+            cached.reuse_count += 1
+            return cached
+    
+    @staticmethod
+    def _signature_distance(a: np.ndarray, b: np.ndarray) -> float:
+        """
+        Mean absolute luma difference between two frame signatures
+        
+        Signatures of different sizes (the coarse one restored from a session
+        token) are compared at the smaller size.
+        """
+        if a.shape != b.shape:
+            if a.shape[0] > b.shape[0]:
+                a = cv2.resize(a, b.shape[::-1], interpolation=cv2.INTER_AREA)
+            else:
+                b = cv2.resize(b, a.shape[::-1], interpolation=cv2.INTER_AREA)
+        return float(np.abs(a - b).mean())
+    
+    def _stream_response(
+        self,
+        status: str,
+        errors: List[Dict[str, Any]],
+        guidance: Dict[str, Any],
+        points: Optional[np.ndarray],
+        raw_angles: Optional[List[float]],
+        landmark_format: str,
+        landmark_subset: Optional[str],
+        session: Optional[StreamSession],
+        received_at: float,
+        frame_timestamp_ms: Optional[float],
+        rtt_ms: Optional[float],
+        reused: bool,
+        capture: Optional[Dict[str, Any]] = None,
+        background: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Assemble a stream response; landmarks are serialized in the requested
+        wire format only here
+        """
+        if background is not None:
+            guidance['background'] = background
+        landmarks = None
+        landmarks_packed = None
+        if points is not None:
+            landmarks, landmarks_packed = self._encode_stream_landmarks(
+                points, landmark_format, landmark_subset, session
+            )
+        if session is not None and config.STREAM_GUIDANCE_PREDICTION and 'face_bbox' in guidance:
+            predicted = self._predict_guidance(
+                session, guidance, raw_angles, received_at, frame_timestamp_ms, rtt_ms
+            )
+            if predicted is not None:
+                guidance['predicted'] = predicted
         
         return {
             'status': status,
-            'errors': all_errors,
+            'errors': errors,
             'landmarks': landmarks,
-            'guidance': guidance
+            'landmarks_packed': landmarks_packed,
+            'guidance': guidance,
+            'reused': reused,
+            'capture': capture
+        }
+    
+    def _predict_guidance(
+        self,
+        session: StreamSession,
+        guidance: Dict[str, Any],
+        raw_angles: Optional[List[float]],
+        received_at: float,
+        frame_timestamp_ms: Optional[float],
+        rtt_ms: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Filter the frame's guidance and predict it at the client's render time
+        
+        The render time is the capture time plus one round trip. Without client
+        timestamps, the server receive time and a default round trip are used.
+        
+        Returns:
+            Predicted guidance with horizon and per-group confidence, or None if
+            the frame arrived out of order
+        """
+        measurements = {
+            'offset_x': (guidance.get('centering') or {}).get('offset_x'),
+            'offset_y': (guidance.get('centering') or {}).get('offset_y'),
+            'face_size_ratio': guidance.get('face_size_ratio'),
         }
+        # Filter the unsmoothed angles; the filter replaces the session EMA
+        pose = guidance.get('pose')
+        if raw_angles is not None:
+            measurements.update(zip(('yaw', 'pitch', 'roll'), raw_angles))
+        elif pose is not None:
+            measurements.update(pose)
+        
+        if frame_timestamp_ms is not None:
+            timestamp = frame_timestamp_ms / 1000.0
+            horizon_ms = rtt_ms if rtt_ms is not None else config.STREAM_GUIDANCE_DEFAULT_RTT_MS
+        else:
+            timestamp = received_at
+            processing_ms = (time.monotonic() - received_at) * 1000.0
+            horizon_ms = (rtt_ms if rtt_ms is not None else config.STREAM_GUIDANCE_DEFAULT_RTT_MS) / 2 + processing_ms
+        horizon_ms = min(max(horizon_ms, 0.0), config.STREAM_GUIDANCE_MAX_HORIZON_MS)
+        
+        with session.lock:
+            if session.guidance_filter is None:
+                session.guidance_filter = GuidanceFilter()
+            if not session.guidance_filter.update(measurements, timestamp):
+                return None
+            values, confidence = session.guidance_filter.predict(horizon_ms / 1000.0)
+        
+        predicted: Dict[str, Any] = {'horizon_ms': horizon_ms, 'confidence': {}}
+        groups = (
+            ('pose', ('yaw', 'pitch', 'roll')),
+            ('centering', ('offset_x', 'offset_y')),
+        )
+        for group, names in groups:
+            if all(name in values for name in names):
+                predicted[group] = {name: values[name] for name in names}
+                predicted['confidence'][group] = min(confidence[name] for name in names)
+        if 'face_size_ratio' in values:
+            predicted['face_size_ratio'] = values['face_size_ratio']
+            predicted['confidence']['face_size_ratio'] = confidence['face_size_ratio']
+        return predicted
+    
+    def _encode_stream_landmarks(
+        self,
+        points: np.ndarray,
+        landmark_format: str,
+        landmark_subset: Optional[str],
+        session: Optional[StreamSession]
+    ) -> Tuple[Optional[List[Dict[str, float]]], Optional[Dict[str, Any]]]:
+        """
+        Serialize stream landmarks in the requested wire format
+        
+        Returns:
+            Tuple of (JSON landmark list, packed landmark payload); only one is set
+        """
+        if landmark_format == FORMAT_JSON:
+            return landmarks_to_dicts(select_landmark_subset(points, landmark_subset)), None
+        
+        if landmark_format != FORMAT_DELTA or session is None:
+            packed, _ = encode_landmarks(points, landmark_format, landmark_subset)
+            return None, packed
+        
+        with session.lock:
+            sequence = session.landmark_sequence + 1
+            force_keyframe = (
+                session.landmark_subset != landmark_subset
+                or sequence % config.LANDMARK_DELTA_KEYFRAME_INTERVAL == 0
+            )
+            packed, quantized = encode_landmarks(
+                points,
+                landmark_format,
+                landmark_subset,
+                previous_q=session.last_landmarks_q,
+                sequence=sequence,
+                force_keyframe=force_keyframe
+            )
+            session.landmark_sequence = sequence
+            session.landmark_subset = landmark_subset
+            session.last_landmarks_q = quantized
+        return None, packed
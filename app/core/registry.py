@@ -0,0 +1,102 @@
+"""
+Registry that owns one shared instance per validator type
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from app.core import settings
+from app.segmentation.factory import create_segmentation_engine
+from app.validators.base import BaseValidator
+from app.validators.step1_format import FormatValidator
+from app.validators.step2_quality import QualityValidator
+from app.validators.step3_face import FaceDetectionValidator
+from app.validators.step4_pose import PoseEstimationValidator
+from app.validators.step5_geometry import GeometryValidator
+from app.validators.step6_background import BackgroundValidator
+
+logger = logging.getLogger(__name__)
+
+
+def _accessories() -> BaseValidator:
+    # Imported on first use: the VLM validator pulls in torch and transformers,
+    # which stream-only and torch-free segmentation nodes never need
+    from app.validators.step7_accessories import AccessoriesValidator
+    return AccessoriesValidator(enabled=True)
+
+
+# Factories for every validator step, keyed by step name
+VALIDATOR_FACTORIES: Dict[str, Callable[[], BaseValidator]] = {
+    'format': FormatValidator,
+    'quality': QualityValidator,
+    'face': FaceDetectionValidator,
+    'pose': PoseEstimationValidator,
+    'geometry': GeometryValidator,
+    'background': BackgroundValidator,
+    # Cheap background check for stream guidance (STREAM_BACKGROUND_PREVIEW)
+    'background_preview': lambda: BackgroundValidator(
+        engine=create_segmentation_engine(settings.SEGMENTATION_STREAM_ENGINE)
+    ),
+    'accessories': _accessories,
+}
+
+
+class ValidatorRegistry:
+    """
+    Lazily builds and caches a single validator instance per step name.
+
+    Pipelines for different modes are execution plans over the same registry,
+    so heavy resources (MediaPipe graphs, segmentation and VLM models) are
+    created once per process no matter how many modes are served.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], BaseValidator]]] = None):
+        self._factories = dict(factories or VALIDATOR_FACTORIES)
+        self._instances: Dict[str, BaseValidator] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> BaseValidator:
+        """
+        Return the shared validator for a step, creating it on first use
+
+        Args:
+            name: Step name (e.g. 'face', 'background')
+
+        Returns:
+            Shared validator instance
+
+        Raises:
+            KeyError: If no factory is registered for the step
+        """
+        validator = self._instances.get(name)
+        if validator is not None:
+            return validator
+
+        with self._lock:
+            validator = self._instances.get(name)
+            if validator is None:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown validator: {name}")
+                logger.info("Initializing %s validator", name)
+                validator = self._factories[name]()
+                self._instances[name] = validator
+        return validator
+
+    def is_loaded(self, name: str) -> bool:
+        """Whether the validator for a step has already been created"""
+        return name in self._instances
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_validator_registry() -> ValidatorRegistry:
+    """Get or initialize the process-wide validator registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ValidatorRegistry()
+    return _registry
@@ -0,0 +1,273 @@
+"""
+Signed session tokens that carry stream session state between server nodes
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import struct
+import time
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+import config
+from app.core import settings
+from app.core.capture import STATE_DONE, CaptureState
+from app.core.metrics import get_metrics
+from app.core.sessions import CachedStreamResult, StreamSession
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = 2
+
+# Side of the frame signature carried in tokens (the local one is STREAM_REUSE_SIGNATURE_SIZE)
+TOKEN_SIGNATURE_SIZE = 8
+
+# Little-endian binary payload: a fixed header, then the optional parts
+# announced by the flags, in the order below
+_HEADER = struct.Struct('<BBIII8s')  # version, flags, issued at (s), frame count, landmark sequence, session id digest
+_BBOX = struct.Struct('<4i')
+_VECTOR = struct.Struct('<3f')
+_SHAPE = struct.Struct('<3H')  # image shape the signature was taken from (0 channels for 2D)
+_CAPTURE = struct.Struct('<IfBI')  # streak, stability, armed, captures
+
+_HAS_SUBSET = 1 << 0
+_HAS_BBOX = 1 << 1
+_HAS_ANGLES = 1 << 2
+_HAS_ROTATION = 1 << 3
+_HAS_TRANSLATION = 1 << 4
+_HAS_SIGNATURE = 1 << 5
+_HAS_CAPTURE = 1 << 6
+
+
+def session_tokens_enabled() -> bool:
+    """
+    Whether session tokens are issued and accepted
+
+    Tokens need STREAM_SESSION_TOKENS and an explicit SESSION_TOKEN_SECRET
+    shared by all nodes; without a secret they are disabled rather than
+    signed with a guessable default.
+    """
+    return config.STREAM_SESSION_TOKENS and bool(settings.SESSION_TOKEN_SECRET)
+
+
+def _signing_key() -> bytes:
+    """Derive the HMAC key from the session token secret"""
+    secret = settings.SESSION_TOKEN_SECRET
+    if not secret:
+        raise ValueError("SESSION_TOKEN_SECRET is not configured")
+    return hashlib.sha256(b"stream-session-token:" + secret.encode("utf-8")).digest()
+
+
+def _session_digest(session_id: str) -> bytes:
+    return hashlib.sha256(session_id.encode("utf-8")).digest()[:8]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_session_token(session: StreamSession) -> Optional[str]:
+    """
+    Serialize the resumable state of a session into a signed token
+
+    Carries the last face bbox (crop), head pose (PnP guess and smoothed
+    angles), a coarse signature of the last frame, auto-capture counters and
+    the landmark sequence, packed in binary (about 250 characters).
+    Tracking graphs, Kalman filter state, held frames and cached results stay
+    node-local and are rebuilt after a resume.
+
+    Args:
+        session: Stream session after processing a frame
+
+    Returns:
+        '<payload>.<tag>' with URL-safe base64 parts, or None if session
+        tokens are disabled
+    """
+    if not session_tokens_enabled():
+        return None
+
+    flags = 0
+    parts = []
+    with session.lock:
+        if session.landmark_subset is not None:
+            flags |= _HAS_SUBSET
+            subset = session.landmark_subset.encode("utf-8")[:255]
+            parts.append(bytes([len(subset)]) + subset)
+        if session.roi_face_bbox is not None:
+            flags |= _HAS_BBOX
+            parts.append(_BBOX.pack(*(int(v) for v in session.roi_face_bbox)))
+        for flag, vector in (
+            (_HAS_ANGLES, session.pose_angles),
+            (_HAS_ROTATION, session.pose_rotation_vector),
+            (_HAS_TRANSLATION, session.pose_translation_vector),
+        ):
+            if vector is not None:
+                flags |= flag
+                parts.append(_VECTOR.pack(*np.ravel(vector).tolist()))
+        cached = session.cached_result
+        if cached is not None:
+            flags |= _HAS_SIGNATURE
+            signature = cv2.resize(
+                cached.signature, (TOKEN_SIGNATURE_SIZE, TOKEN_SIGNATURE_SIZE), interpolation=cv2.INTER_AREA
+            )
+            shape = tuple(cached.image_shape) + (0,) * (3 - len(cached.image_shape))
+            parts.append(_SHAPE.pack(*shape))
+            parts.append(np.clip(np.rint(signature), 0, 255).astype(np.uint8).tobytes())
+        capture = session.capture
+        if capture is not None:
+            # A capture still running or not yet delivered here is lost if the
+            # next frame goes to another node, so that node may start it again
+            pending = capture.future is not None or (capture.state == STATE_DONE and not capture.delivered)
+            flags |= _HAS_CAPTURE
+            parts.append(_CAPTURE.pack(
+                capture.streak, capture.stability, int(capture.armed or pending), capture.captures
+            ))
+        header = _HEADER.pack(
+            TOKEN_VERSION, flags, int(time.time()), session.frame_count,
+            session.landmark_sequence, _session_digest(session.session_id)
+        )
+
+    payload = header + b"".join(parts)
+    tag = hmac.new(_signing_key(), payload, hashlib.sha256).digest()[:16]
+    return f"{_b64encode(payload)}.{_b64encode(tag)}"
+
+
+def decode_session_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a session token and return its state
+
+    Raises:
+        ValueError: If the token is malformed, tampered with, of another
+            version, or older than the session idle timeout
+    """
+    try:
+        payload_b64, tag_b64 = token.split('.')
+        payload = _b64decode(payload_b64)
+        tag = _b64decode(tag_b64)
+    except Exception as exc:
+        raise ValueError(f"Malformed session token: {exc}")
+
+    expected = hmac.new(_signing_key(), payload, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(tag, expected):
+        raise ValueError("Session token signature mismatch")
+
+    try:
+        version, flags, issued_at, frame_count, sequence, sid = _HEADER.unpack_from(payload)
+        if version != TOKEN_VERSION:
+            raise ValueError(f"Unsupported session token version: {version}")
+        state: Dict[str, Any] = {
+            't': issued_at, 'n': frame_count, 'seq': sequence, 'sid': sid,
+            'sub': None, 'bbox': None, 'pa': None, 'rv': None, 'tv': None,
+        }
+        offset = _HEADER.size
+        if flags & _HAS_SUBSET:
+            length = payload[offset]
+            state['sub'] = payload[offset + 1:offset + 1 + length].decode("utf-8")
+            offset += 1 + length
+        if flags & _HAS_BBOX:
+            state['bbox'] = _BBOX.unpack_from(payload, offset)
+            offset += _BBOX.size
+        for flag, key in ((_HAS_ANGLES, 'pa'), (_HAS_ROTATION, 'rv'), (_HAS_TRANSLATION, 'tv')):
+            if flags & flag:
+                state[key] = np.array(_VECTOR.unpack_from(payload, offset), dtype=np.float64)
+                offset += _VECTOR.size
+        if flags & _HAS_SIGNATURE:
+            state['shape'] = _SHAPE.unpack_from(payload, offset)
+            offset += _SHAPE.size
+            size = TOKEN_SIGNATURE_SIZE * TOKEN_SIGNATURE_SIZE
+            state['sig'] = np.frombuffer(payload[offset:offset + size], dtype=np.uint8).reshape(
+                TOKEN_SIGNATURE_SIZE, TOKEN_SIGNATURE_SIZE
+            )
+            offset += size
+        if flags & _HAS_CAPTURE:
+            state['cap'] = _CAPTURE.unpack_from(payload, offset)
+            offset += _CAPTURE.size
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Malformed session token: {exc}")
+    if offset != len(payload):
+        raise ValueError("Malformed session token: trailing data")
+
+    if time.time() - state['t'] > config.STREAM_SESSION_IDLE_TIMEOUT:
+        raise ValueError("Session token expired")
+    return state
+
+
+def resume_session(session: StreamSession, token: str) -> bool:
+    """
+    Restore a session from a token issued by any node
+
+    The token is applied only if it belongs to the session and is newer than
+    the local state (e.g. the previous frames went to other nodes). Invalid
+    tokens, and all tokens while session tokens are disabled, are ignored:
+    the session then simply starts cold.
+
+    Args:
+        session: Local session for the token's session id
+        token: Token returned with the client's previous stream response
+
+    Returns:
+        True if the session state was replaced from the token
+    """
+    if not session_tokens_enabled():
+        return False
+    metrics = get_metrics()
+    try:
+        state = decode_session_token(token)
+    except (ValueError, KeyError, TypeError) as exc:
+        logger.info("Ignoring session token for %s: %s", session.session_id, exc)
+        metrics.increment('stream_session_tokens_rejected')
+        return False
+    if not hmac.compare_digest(state['sid'], _session_digest(session.session_id)):
+        metrics.increment('stream_session_tokens_rejected')
+        return False
+
+    with session.lock:
+        if state['n'] <= session.frame_count:
+            # Local state is at least as recent as the token
+            return False
+
+        # Node-local state from older frames no longer matches the face
+        if session.face_tracker is not None:
+            session.face_tracker.reset()
+        session.guidance_filter = None
+        session.last_landmarks_q = None
+        if session.capture is not None:
+            session.capture.close()
+
+        session.frame_count = state['n']
+        session.landmark_sequence = state['seq']
+        session.landmark_subset = state['sub']
+        session.roi_face_bbox = tuple(state['bbox']) if state['bbox'] is not None else None
+        session.pose_angles = state['pa']
+        session.pose_rotation_vector = state['rv'].reshape(3, 1) if state['rv'] is not None else None
+        session.pose_translation_vector = state['tv'].reshape(3, 1) if state['tv'] is not None else None
+
+        session.cached_result = None
+        if 'sig' in state:
+            # Signature only: lets the next frame count as settled (compared at
+            # the token's coarser size). The result itself is not carried, so
+            # it is never reused (settled=False).
+            shape = state['shape'] if state['shape'][2] else state['shape'][:2]
+            session.cached_result = CachedStreamResult(
+                signature=state['sig'].astype(np.float32),
+                image_shape=tuple(shape),
+                status='fail',
+                errors=[],
+                guidance={},
+            )
+
+        session.capture = None
+        if 'cap' in state:
+            streak, stability, armed, captures = state['cap']
+            session.capture = CaptureState(streak=streak, stability=stability, armed=bool(armed), captures=captures)
+
+    metrics.increment('stream_sessions_resumed')
+    return True
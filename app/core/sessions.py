@@ -0,0 +1,183 @@
+"""
+Per-client state for stream validation sessions
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedStreamResult:
+    """Last fully processed stream frame, reused while the scene is unchanged"""
+
+    signature: np.ndarray
+    image_shape: tuple
+    status: str
+    errors: List[Dict[str, Any]]
+    guidance: Dict[str, Any]
+    landmarks: Optional[np.ndarray] = None
+    raw_angles: Optional[List[float]] = None
+    capture_score: float = 0.0  # auto-capture frame score of the frame
+    settled: bool = False  # the frame matched the previously processed one
+    reuse_count: int = 0
+
+
+@dataclass
+class StreamSession:
+    """State kept between consecutive stream frames of one client"""
+
+    session_id: str
+    created_at: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+    frame_count: int = 0
+
+    # Landmark delta encoding: last quantized landmarks sent to the client
+    landmark_sequence: int = 0
+    landmark_subset: Optional[str] = None
+    last_landmarks_q: Optional[np.ndarray] = None
+
+    # Video-mode face tracker (FaceTracker), created by the face validator
+    face_tracker: Optional[Any] = None
+
+    # Head pose of the previous frame: PnP extrinsic guess and smoothed angles
+    pose_rotation_vector: Optional[np.ndarray] = None
+    pose_translation_vector: Optional[np.ndarray] = None
+    pose_angles: Optional[np.ndarray] = None  # (yaw, pitch, roll)
+
+    # Kalman filter over guidance signals (GuidanceFilter), created by the pipeline
+    guidance_filter: Optional[Any] = None
+
+    # Face bbox of the last processed frame; the next frame is analysed in a crop around it
+    roi_face_bbox: Optional[Tuple[int, int, int, int]] = None
+
+    # Result of the last processed frame for frame-difference gating
+    cached_result: Optional[CachedStreamResult] = None
+
+    # Auto-capture streak and pending full validation (CaptureState), created by the pipeline
+    capture: Optional[Any] = None
+
+    # Asynchronous background checks and latest verdict (BackgroundSampleState), created by the pipeline
+    background: Optional[Any] = None
+
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def touch(self) -> None:
+        """Mark the session as active"""
+        self.last_seen = time.monotonic()
+
+    def close(self) -> None:
+        """Release resources held by the session"""
+        self.last_landmarks_q = None
+        self.pose_rotation_vector = None
+        self.pose_translation_vector = None
+        self.pose_angles = None
+        self.guidance_filter = None
+        self.cached_result = None
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+        if self.background is not None:
+            self.background.close()
+            self.background = None
+        if self.face_tracker is not None:
+            self.face_tracker.close()
+            self.face_tracker = None
+
+
+class SessionStore:
+    """
+    In-memory store of stream sessions keyed by a client-supplied id.
+
+    Sessions idle for longer than the timeout are evicted on access, and the
+    least recently used session is dropped once the store is full.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = config.STREAM_SESSION_IDLE_TIMEOUT,
+        max_sessions: int = config.STREAM_MAX_SESSIONS
+    ):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, StreamSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, session_id: str) -> StreamSession:
+        """
+        Return the session for an id, creating it if needed
+
+        Args:
+            session_id: Client-supplied session identifier
+
+        Returns:
+            Active StreamSession
+        """
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = StreamSession(session_id=session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    self._close(evicted)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.touch()
+            return session
+
+    def get(self, session_id: str) -> Optional[StreamSession]:
+        """Return an existing session without creating or touching it"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def remove(self, session_id: str) -> None:
+        """Drop a session and release its resources"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._close(session)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_idle(self) -> None:
+        """Evict sessions that have been idle past the timeout (lock held)"""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            self._close(session)
+
+    @staticmethod
+    def _close(session: StreamSession) -> None:
+        try:
+            session.close()
+        except Exception as exc:
+            logger.warning("Failed to close stream session %s: %s", session.session_id, exc)
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Get or initialize the process-wide stream session store"""
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                _session_store = SessionStore()
+    return _session_store
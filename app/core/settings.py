@@ -20,6 +20,32 @@ AWS_SESSION_TOKEN = os.getenv("AWS_SESSION_TOKEN")
 MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
 TORCH_DEVICE = os.getenv("TORCH_DEVICE", "cuda")
 IMAGE_ENCRYPTION_KEY = os.getenv("IMAGE_ENCRYPTION_KEY", "diia-stream-shared-secret")
+# Signs stream session tokens; must be identical on all nodes (tokens are disabled when unset)
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+# Segmentation engine for background checks: eager (reference), torchscript, int8 (CPU),
+# onnxruntime, opencv (torch-free) or selfie (MediaPipe person segmentation)
+SEGMENTATION_ENGINE = os.getenv("SEGMENTATION_ENGINE", "eager")
+# Engine of the optional stream background preview (STREAM_BACKGROUND_PREVIEW)
+SEGMENTATION_STREAM_ENGINE = os.getenv("SEGMENTATION_STREAM_ENGINE", "selfie")
+# Precision of the torchscript engine: fp32, fp16 (CUDA) or bf16 (CPU)
+SEGMENTATION_PRECISION = os.getenv("SEGMENTATION_PRECISION", "fp32")
+# Where optimized segmentation models are cached between processes
+SEGMENTATION_CACHE_DIR = os.getenv(
+    "SEGMENTATION_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "photo-validator"),
+)
+# Calibrated INT8 model (tools/calibrate_segmentation_int8.py) used by the int8 engine
+SEGMENTATION_INT8_PATH = os.getenv(
+    "SEGMENTATION_INT8_PATH",
+    os.path.join(SEGMENTATION_CACHE_DIR, "deeplabv3_mbv3_int8.ts.pt"),
+)
+# Exported ONNX model (tools/export_segmentation_onnx.py) used by the onnxruntime and opencv engines
+SEGMENTATION_ONNX_PATH = os.getenv(
+    "SEGMENTATION_ONNX_PATH",
+    os.path.join(SEGMENTATION_CACHE_DIR, "deeplabv3_mbv3.onnx"),
+)
+# Intra-op threads of the segmentation runtime (0 keeps the runtime default)
+SEGMENTATION_THREADS = int(os.getenv("SEGMENTATION_THREADS", "0"))
 # Pin MiniCPM-o revision to avoid unexpected remote code changes
 MINICPM_REVISION = os.getenv(
     "MINICPM_REVISION",
@@ -36,5 +62,13 @@ __all__ = [
     "MODEL_WARMUP",
     "TORCH_DEVICE",
     "IMAGE_ENCRYPTION_KEY",
+    "SESSION_TOKEN_SECRET",
+    "SEGMENTATION_ENGINE",
+    "SEGMENTATION_STREAM_ENGINE",
+    "SEGMENTATION_PRECISION",
+    "SEGMENTATION_CACHE_DIR",
+    "SEGMENTATION_INT8_PATH",
+    "SEGMENTATION_ONNX_PATH",
+    "SEGMENTATION_THREADS",
     "MINICPM_REVISION",
 ]
@@ -0,0 +1,39 @@
+"""
+Process-local worker pools for background work
+"""
+
+import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class ProcessLocal(Generic[T]):
+    """
+    Lazily built per-process object, such as a worker pool
+
+    Worker threads do not survive a fork, so a process that inherited the
+    object from its parent (e.g. a pre-forked server worker) builds its own
+    on first use instead of submitting to threads that no longer exist.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        """
+        Args:
+            factory: Builds the object; called once per process
+        """
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """Get or build this process's object"""
+        pid = os.getpid()
+        if self._value is None or self._pid != pid:
+            with self._lock:
+                if self._value is None or self._pid != pid:
+                    self._value = self._factory()
+                    self._pid = pid
+        return self._value
@@ -0,0 +1,3 @@
+"""
+Semantic segmentation engines used by the background checks
+"""
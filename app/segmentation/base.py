@@ -0,0 +1,50 @@
+"""
+Segmentation engine interface
+"""
+
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+# Pascal VOC label set of the DeepLabV3 torchvision weights
+PERSON_CLASS = 15
+NUM_CLASSES = 21
+
+# ImageNet normalization expected by the torchvision backbones
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class SegmentationEngine(ABC):
+    """
+    Runs a segmentation model on RGB images and returns class masks.
+
+    Engines receive images already resized to the segmentation input size and
+    return a uint8 mask of class indices (PERSON_CLASS for people, 0 for
+    background) with the same height and width.
+    """
+
+    name = "base"
+    # False for person/background models: their masks cannot show other
+    # objects, so the extraneous object check is not run on them
+    produces_object_classes = True
+
+    @abstractmethod
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        """
+        Segment one image
+
+        Args:
+            image_rgb: (H, W, 3) uint8 RGB image
+
+        Returns:
+            (H, W) uint8 class mask
+        """
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Segment several images (engines may override with a batched forward pass)"""
+        return [self.segment(image) for image in images_rgb]
+
+    def close(self) -> None:
+        """Release model resources"""
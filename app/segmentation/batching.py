@@ -0,0 +1,143 @@
+"""
+Dynamic micro-batching in front of a segmentation engine
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from app.core.metrics import get_metrics
+from app.segmentation.base import SegmentationEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    image: np.ndarray
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class BatchingSegmentationEngine(SegmentationEngine):
+    """
+    Collects concurrent segment() calls into batched forward passes.
+
+    A single worker thread owns the wrapped engine. It takes the oldest
+    pending request, waits up to max_wait_ms from that request's arrival for
+    more (or until max_batch are pending), resizes them to the shape of the
+    oldest one, runs one segment_batch() call and resolves each caller's
+    future with its mask resized back to the caller's input shape.
+
+    A request arriving alone waits at most max_wait_ms before running.
+    Reports 'segmentation_batch_size' and 'segmentation_queue_wait_ms'
+    observations and the 'segmentation_batches' counter.
+    """
+
+    def __init__(self, engine: SegmentationEngine, max_batch: int = 8, max_wait_ms: float = 5.0):
+        """
+        Args:
+            engine: Engine running the batched forward passes
+            max_batch: Largest batch per forward pass
+            max_wait_ms: How long the oldest request waits for others to join
+        """
+        self.engine = engine
+        self.name = f"{engine.name}+batching"
+        self.produces_object_classes = engine.produces_object_classes
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Optional[_PendingRequest]]" = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='segmentation-batcher', daemon=True)
+        self._worker.start()
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        if self._closed:
+            raise RuntimeError("Segmentation engine is closed")
+        request = _PendingRequest(image_rgb)
+        self._queue.put(request)
+        return request.future.result()
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Queue several images at once (they may be batched with other callers)"""
+        if self._closed:
+            raise RuntimeError("Segmentation engine is closed")
+        requests = [_PendingRequest(image) for image in images_rgb]
+        for request in requests:
+            self._queue.put(request)
+        return [request.future.result() for request in requests]
+
+    def _collect(self, first: _PendingRequest) -> List[_PendingRequest]:
+        """Gather requests until the batch is full or the oldest one's wait is over"""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Close requested: serve what is pending, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        metrics = get_metrics()
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+
+            started = time.monotonic()
+            for request in batch:
+                metrics.observe('segmentation_queue_wait_ms', (started - request.enqueued_at) * 1000.0)
+            metrics.observe('segmentation_batch_size', len(batch))
+            metrics.increment('segmentation_batches')
+
+            try:
+                masks = self._forward([request.image for request in batch])
+            except Exception as exc:
+                logger.error("Batched segmentation failed: %s", exc)
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+            for request, mask in zip(batch, masks):
+                request.future.set_result(mask)
+
+    def _forward(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """One forward pass at the shape of the oldest image"""
+        height, width = images[0].shape[:2]
+        inputs = [
+            image if image.shape[:2] == (height, width)
+            else cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR)
+            for image in images
+        ]
+        masks = self.engine.segment_batch(inputs)
+        return [
+            mask if mask.shape == image.shape[:2]
+            else cv2.resize(mask, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+            for image, mask in zip(images, masks)
+        ]
+
+    def shutdown(self) -> None:
+        """Stop the worker after serving pending requests; the wrapped engine stays open"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout=5.0)
+
+    def close(self) -> None:
+        self.shutdown()
+        self.engine.close()
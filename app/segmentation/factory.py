@@ -0,0 +1,95 @@
+"""
+Deployment-selected construction of segmentation engines
+"""
+
+from typing import Callable, Dict, Optional
+
+import config
+from app.core import settings
+from app.segmentation.base import SegmentationEngine
+
+
+def _configure_torch_threads() -> None:
+    if settings.SEGMENTATION_THREADS > 0:
+        import torch
+        torch.set_num_threads(settings.SEGMENTATION_THREADS)
+
+
+# Engine modules are imported lazily so a deployment only loads the runtime it uses
+def _eager() -> SegmentationEngine:
+    from app.segmentation.torch_engines import TorchEagerEngine
+    _configure_torch_threads()
+    return TorchEagerEngine()
+
+
+def _torchscript() -> SegmentationEngine:
+    from app.segmentation.torch_engines import TorchScriptEngine
+    _configure_torch_threads()
+    return TorchScriptEngine(
+        precision=settings.SEGMENTATION_PRECISION,
+        cache_dir=settings.SEGMENTATION_CACHE_DIR
+    )
+
+
+# Artifact-based engines are chosen for speed (int8) or to serve without torch
+# (ONNX), so a missing artifact is a deployment error: raise instead of quietly
+# loading the much slower eager model
+def _int8() -> SegmentationEngine:
+    from app.segmentation.quantized import QuantizedEngine
+    _configure_torch_threads()
+    return QuantizedEngine(settings.SEGMENTATION_INT8_PATH)
+
+
+def _onnxruntime() -> SegmentationEngine:
+    from app.segmentation.onnx_engines import OnnxRuntimeEngine
+    return OnnxRuntimeEngine(settings.SEGMENTATION_ONNX_PATH, threads=settings.SEGMENTATION_THREADS)
+
+
+def _opencv() -> SegmentationEngine:
+    from app.segmentation.onnx_engines import OpenCVDnnEngine
+    return OpenCVDnnEngine(settings.SEGMENTATION_ONNX_PATH, threads=settings.SEGMENTATION_THREADS)
+
+
+def _selfie() -> SegmentationEngine:
+    from app.segmentation.selfie import SelfieSegmentationEngine
+    return SelfieSegmentationEngine()
+
+
+ENGINE_FACTORIES: Dict[str, Callable[[], SegmentationEngine]] = {
+    'eager': _eager,
+    'torchscript': _torchscript,
+    'int8': _int8,
+    'onnxruntime': _onnxruntime,
+    'opencv': _opencv,
+    'selfie': _selfie,
+}
+
+
+def create_segmentation_engine(name: Optional[str] = None) -> SegmentationEngine:
+    """
+    Build a segmentation engine
+
+    Args:
+        name: Engine name (defaults to the SEGMENTATION_ENGINE setting)
+
+    Returns:
+        Ready-to-use engine, behind a micro-batching worker when
+        SEGMENTATION_MAX_BATCH > 1
+
+    Raises:
+        ValueError: If the engine name is unknown
+        FileNotFoundError: If an int8 or ONNX engine is selected but its
+            model has not been calibrated or exported
+    """
+    name = name or settings.SEGMENTATION_ENGINE
+    if name not in ENGINE_FACTORIES:
+        raise ValueError(f"Unknown segmentation engine: {name} (choose from {', '.join(ENGINE_FACTORIES)})")
+    engine = ENGINE_FACTORIES[name]()
+    if config.SEGMENTATION_MAX_BATCH > 1:
+        from app.segmentation.batching import BatchingSegmentationEngine
+        engine = BatchingSegmentationEngine(
+            engine,
+            max_batch=config.SEGMENTATION_MAX_BATCH,
+            max_wait_ms=config.SEGMENTATION_BATCH_WAIT_MS
+        )
+    return engine
@@ -0,0 +1,122 @@
+"""
+Torch-free segmentation engines running the exported ONNX DeepLab model
+
+Nodes that only need segmentation can serve with ONNX Runtime or OpenCV DNN
+without installing torch. The model is exported once with
+tools/export_segmentation_onnx.py.
+"""
+
+import os
+import threading
+from typing import List
+
+import cv2
+import numpy as np
+
+from app.segmentation.base import SegmentationEngine
+
+
+def _check_artifact(path: str) -> None:
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"ONNX segmentation model not found at {path}; "
+            "export it with tools/export_segmentation_onnx.py"
+        )
+
+
+def _to_blob(images_rgb: List[np.ndarray]) -> np.ndarray:
+    """RGB uint8 images -> (N, 3, H, W) float32 in 0..255 (normalization is in the graph)"""
+    return cv2.dnn.blobFromImages(images_rgb, scalefactor=1.0, swapRB=False, crop=False)
+
+
+def _logits_to_masks(logits: np.ndarray, height: int, width: int) -> List[np.ndarray]:
+    """
+    Upsample output-stride logits to the input size and take the class argmax
+
+    cv2.resize with INTER_LINEAR uses the same half-pixel sampling as the
+    bilinear, align_corners=False upsampling of the torchvision model.
+    """
+    masks = []
+    for sample in logits:
+        upsampled = cv2.resize(np.ascontiguousarray(sample.transpose(1, 2, 0)), (width, height),
+                               interpolation=cv2.INTER_LINEAR)
+        masks.append(upsampled.argmax(axis=2).astype(np.uint8))
+    return masks
+
+
+class OnnxRuntimeEngine(SegmentationEngine):
+    """ONNX Runtime on the CPU execution provider"""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path: str, threads: int = 0):
+        """
+        Args:
+            model_path: Exported ONNX model
+            threads: Intra-op threads (0 lets ONNX Runtime decide)
+
+        Raises:
+            FileNotFoundError: If the model has not been exported yet
+        """
+        _check_artifact(model_path)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.model_path = model_path
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        return self.segment_batch([image_rgb])[0]
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched forward pass; images must share one shape"""
+        logits = self.session.run(None, {self.input_name: _to_blob(images_rgb)})[0]
+        return _logits_to_masks(logits, *images_rgb[0].shape[:2])
+
+    def close(self) -> None:
+        self.session = None
+
+
+class OpenCVDnnEngine(SegmentationEngine):
+    """OpenCV DNN module (CPU backend), no extra dependency beyond cv2"""
+
+    name = "opencv"
+
+    def __init__(self, model_path: str, threads: int = 0):
+        """
+        Args:
+            model_path: Exported ONNX model
+            threads: OpenCV worker threads (0 keeps the OpenCV default)
+
+        Raises:
+            FileNotFoundError: If the model has not been exported yet
+        """
+        _check_artifact(model_path)
+        if threads > 0:
+            # Process-wide: OpenCV has no per-network thread setting
+            cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.model_path = model_path
+        # setInput/forward share network state across threads
+        self._lock = threading.Lock()
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        return self.segment_batch([image_rgb])[0]
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched forward pass; images must share one shape"""
+        blob = _to_blob(images_rgb)
+        with self._lock:
+            self.net.setInput(blob)
+            logits = self.net.forward()
+        return _logits_to_masks(logits, *images_rgb[0].shape[:2])
+
+    def close(self) -> None:
+        self.net = None
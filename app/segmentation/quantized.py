@@ -0,0 +1,126 @@
+"""
+INT8 post-training quantized DeepLab engine for CPU-only nodes
+"""
+
+import copy
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+import torch
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from app.segmentation.base import SegmentationEngine
+from app.segmentation.torch_engines import FusedSegmentationModel, build_deeplab, normalize_image
+
+logger = logging.getLogger(__name__)
+
+
+def quantized_backend() -> str:
+    """
+    Quantized kernel library to use on this CPU
+
+    oneDNN has fast kernels for the dilated depthwise convolutions of the
+    DeepLab backbone; fbgemm/qnnpack fall back to slow paths for them and end
+    up slower than fp32.
+    """
+    supported = torch.backends.quantized.supported_engines
+    for backend in ('onednn', 'x86', 'fbgemm'):
+        if backend in supported:
+            return backend
+    raise RuntimeError("No quantized CPU backend available in this torch build")
+
+
+def quantize_deeplab(
+    calibration_images: Iterable[np.ndarray],
+    pretrained: bool = True,
+    model: Optional[torch.nn.Module] = None
+) -> torch.jit.ScriptModule:
+    """
+    Static post-training INT8 quantization of DeepLabV3-MobileNetV3
+
+    Weights are quantized per channel; activation ranges are calibrated on the
+    given images. The result is traced and frozen together with the fused
+    uint8 preprocessing and argmax, ready to be saved as an artifact.
+
+    Args:
+        calibration_images: RGB images at segmentation input size
+        pretrained: Quantize the pretrained weights
+        model: fp32 model to quantize instead of building one
+
+    Returns:
+        Frozen TorchScript module taking (N, H, W, 3) uint8, returning (N, H, W) uint8
+    """
+    backend = quantized_backend()
+    torch.backends.quantized.engine = backend
+
+    fp32_model = copy.deepcopy(model) if model is not None else build_deeplab(pretrained)
+    fp32_model = fp32_model.cpu().eval()
+    example = (torch.zeros(1, 3, 520, 520),)
+    prepared = prepare_fx(fp32_model, get_default_qconfig_mapping(backend), example)
+
+    count = 0
+    with torch.no_grad():
+        for image in calibration_images:
+            prepared(normalize_image(image))
+            count += 1
+    if count == 0:
+        raise ValueError("INT8 calibration needs at least one image")
+    logger.info("Calibrated INT8 segmentation on %d images (%s)", count, backend)
+
+    quantized = convert_fx(prepared)
+    fused = FusedSegmentationModel(quantized).eval()
+    with torch.inference_mode():
+        traced = torch.jit.trace(fused, torch.zeros((1, 520, 520, 3), dtype=torch.uint8), strict=False)
+    return torch.jit.freeze(traced)
+
+
+def save_artifact(module: torch.jit.ScriptModule, path: str) -> None:
+    """Atomically write a quantized artifact"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.jit.save(module, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class QuantizedEngine(SegmentationEngine):
+    """
+    INT8 engine loading an artifact built by tools/calibrate_segmentation_int8.py
+
+    Runs on CPU only. Verdict agreement with the fp32 model is reported by
+    tools/report_segmentation_int8.py.
+    """
+
+    name = "int8"
+
+    def __init__(self, artifact_path: str):
+        """
+        Args:
+            artifact_path: Quantized TorchScript artifact
+
+        Raises:
+            FileNotFoundError: If the artifact has not been calibrated yet
+        """
+        if not os.path.exists(artifact_path):
+            raise FileNotFoundError(
+                f"INT8 segmentation artifact not found at {artifact_path}; "
+                "build it with tools/calibrate_segmentation_int8.py"
+            )
+        torch.backends.quantized.engine = quantized_backend()
+        self.model = torch.jit.load(artifact_path, map_location='cpu')
+        self.artifact_path = artifact_path
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        return self.segment_batch([image_rgb])[0]
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched forward pass; images must share one shape"""
+        batch = torch.from_numpy(np.ascontiguousarray(np.stack(images_rgb)))
+        with torch.inference_mode():
+            masks = self.model(batch).numpy()
+        return list(masks)
+
+    def close(self) -> None:
+        self.model = None
@@ -0,0 +1,50 @@
+"""
+MediaPipe selfie segmentation engine (person vs. everything else)
+"""
+
+import threading
+
+import mediapipe as mp
+import numpy as np
+
+from app.segmentation.base import PERSON_CLASS, SegmentationEngine
+
+
+class SelfieSegmentationEngine(SegmentationEngine):
+    """
+    Person/background masks from the MediaPipe selfie segmenter.
+
+    The background checks only ask "person or not", which this small model
+    answers for a fraction of DeepLab's cost, so it also fits the stream
+    background preview. Masks use the DeepLab label values (PERSON_CLASS for
+    people, 0 otherwise); no other classes are produced, so the extraneous
+    object check does not run with this engine (its score is None).
+    """
+
+    name = "selfie"
+    produces_object_classes = False
+
+    def __init__(self, model_selection: int = 0, threshold: float = 0.5):
+        """
+        Args:
+            model_selection: 0 for the general (256x256) model, 1 for the
+                faster landscape (144x256) model
+            threshold: Person probability above which a pixel is a person
+        """
+        self.threshold = threshold
+        self.segmenter = mp.solutions.selfie_segmentation.SelfieSegmentation(model_selection=model_selection)
+        # MediaPipe graphs process one image at a time
+        self._lock = threading.Lock()
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        with self._lock:
+            results = self.segmenter.process(np.ascontiguousarray(image_rgb))
+        if results.segmentation_mask is None:
+            return np.zeros(image_rgb.shape[:2], dtype=np.uint8)
+        person = results.segmentation_mask > self.threshold
+        return person.astype(np.uint8) * np.uint8(PERSON_CLASS)
+
+    def close(self) -> None:
+        if self.segmenter is not None:
+            self.segmenter.close()
+            self.segmenter = None
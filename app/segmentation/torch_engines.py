@@ -0,0 +1,251 @@
+"""
+PyTorch segmentation engines for DeepLabV3-MobileNetV3
+"""
+
+import inspect
+import logging
+import os
+from typing import List, Optional
+
+import numpy as np
+import torch
+import torchvision.models.segmentation as segmentation
+
+from app.segmentation.base import IMAGENET_MEAN, IMAGENET_STD, SegmentationEngine
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = {
+    'fp32': torch.float32,
+    'fp16': torch.float16,
+    'bf16': torch.bfloat16,
+}
+
+
+def build_deeplab(pretrained: bool = True) -> torch.nn.Module:
+    """DeepLabV3-MobileNetV3 in eval mode (COCO-with-VOC-labels weights)"""
+    if pretrained:
+        model = segmentation.deeplabv3_mobilenet_v3_large(
+            weights=segmentation.DeepLabV3_MobileNet_V3_Large_Weights.DEFAULT
+        )
+    else:
+        model = segmentation.deeplabv3_mobilenet_v3_large(weights=None, weights_backbone=None)
+    return model.eval()
+
+
+def default_device() -> torch.device:
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+
+def normalize_image(image_rgb: np.ndarray) -> torch.Tensor:
+    """(H, W, 3) uint8 RGB image -> (1, 3, H, W) ImageNet-normalized float tensor"""
+    tensor = torch.from_numpy(np.ascontiguousarray(image_rgb)).permute(2, 0, 1).float().div_(255.0)
+    mean = torch.tensor(IMAGENET_MEAN).view(3, 1, 1)
+    std = torch.tensor(IMAGENET_STD).view(3, 1, 1)
+    return ((tensor - mean) / std).unsqueeze(0)
+
+
+class FusedSegmentationModel(torch.nn.Module):
+    """
+    DeepLab with input normalization and argmax folded into the graph.
+
+    Takes a (N, H, W, 3) uint8 RGB batch, so the host only builds a tensor view
+    of the image, and returns (N, H, W) uint8 class indices.
+    """
+
+    def __init__(self, model: torch.nn.Module, dtype: torch.dtype = torch.float32):
+        super().__init__()
+        self.model = model
+        mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1) * 255.0
+        std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1) * 255.0
+        self.register_buffer('mean', mean.to(dtype))
+        self.register_buffer('inv_std', (1.0 / std).to(dtype))
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        # NHWC -> NCHW view keeps the channels-last memory layout
+        x = images.permute(0, 3, 1, 2).to(self.mean.dtype)
+        x = (x - self.mean) * self.inv_std
+        logits = self.model(x)['out']
+        return logits.argmax(1).to(torch.uint8)
+
+
+class _BroadcastASPPPooling(torch.nn.Module):
+    """
+    ASPP image-pooling branch without the dynamic-size resize.
+
+    Bilinear upsampling of a 1x1 map is a broadcast; expressing it as one keeps
+    the exported graph free of shape-dependent Resize nodes, which OpenCV DNN
+    cannot infer with dynamic spatial axes.
+    """
+
+    def __init__(self, pooling: torch.nn.Module):
+        super().__init__()
+        self.pooling = pooling
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        pooled = x
+        for mod in self.pooling:
+            pooled = mod(pooled)
+        return pooled + x[:, :1] * 0.0
+
+
+class OnnxExportModel(torch.nn.Module):
+    """
+    DeepLab wrapper exported to ONNX for the torch-free runtimes.
+
+    Takes a (N, 3, H, W) float32 RGB batch in the 0..255 range (what
+    cv2.dnn.blobFromImage produces without scaling) and returns the
+    classifier logits at output stride (N, NUM_CLASSES, H/16, W/16). The
+    final bilinear upsampling and argmax run on the host: OpenCV DNN cannot
+    size a Resize from the input shape when the spatial axes are dynamic.
+    The ASPP pooling branch of the given model is replaced in place.
+    """
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        aspp = model.classifier[0]
+        aspp.convs[-1] = _BroadcastASPPPooling(aspp.convs[-1])
+        self.model = model
+        mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1) * 255.0
+        std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1) * 255.0
+        self.register_buffer('mean', mean)
+        self.register_buffer('inv_std', 1.0 / std)
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        features = self.model.backbone((images - self.mean) * self.inv_std)['out']
+        return self.model.classifier(features)
+
+
+def export_onnx(path: str, pretrained: bool = True, opset: int = 17) -> None:
+    """
+    Export DeepLabV3-MobileNetV3 to ONNX with dynamic batch and spatial axes
+
+    Args:
+        path: Output .onnx file (written atomically)
+        pretrained: Export the pretrained weights
+        opset: ONNX opset version
+    """
+    model = OnnxExportModel(build_deeplab(pretrained)).cpu().eval()
+    example = torch.zeros((1, 3, 520, 520), dtype=torch.float32)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # Newer torch defaults to the dynamo exporter; keep the TorchScript one
+    extra = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (example,),
+            tmp_path,
+            input_names=['image'],
+            output_names=['logits'],
+            dynamic_axes={'image': {0: 'n', 2: 'h', 3: 'w'}, 'logits': {0: 'n', 2: 'h', 3: 'w'}},
+            opset_version=opset,
+            **extra,
+        )
+    os.replace(tmp_path, path)
+
+
+class TorchEagerEngine(SegmentationEngine):
+    """Reference engine: eager fp32 torchvision model with host-side normalization"""
+
+    name = "eager"
+
+    def __init__(self, device: Optional[torch.device] = None, pretrained: bool = True):
+        self.device = device or default_device()
+        self.model = build_deeplab(pretrained).to(self.device)
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        tensor = normalize_image(image_rgb).to(self.device)
+        with torch.no_grad():
+            output = self.model(tensor)['out'][0]
+        return output.argmax(0).to(torch.uint8).cpu().numpy()
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched forward pass; images must share one shape"""
+        tensor = torch.cat([normalize_image(image) for image in images_rgb]).to(self.device)
+        with torch.no_grad():
+            output = self.model(tensor)['out']
+        return list(output.argmax(1).to(torch.uint8).cpu().numpy())
+
+    def close(self) -> None:
+        self.model = None
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+class TorchScriptEngine(SegmentationEngine):
+    """
+    Graph-optimized engine: traced, frozen TorchScript with fused preprocessing.
+
+    The model is traced once per (precision, device) and cached on disk, so
+    later processes only load the frozen graph. Inference runs under
+    torch.inference_mode in channels-last layout, optionally in fp16 (CUDA) or
+    bf16 (CPU), and only the uint8 mask is copied back from the device.
+    """
+
+    name = "torchscript"
+
+    # Tracing shape; the traced graph accepts any input size
+    TRACE_SIZE = (520, 520)
+
+    def __init__(
+        self,
+        precision: str = 'fp32',
+        cache_dir: Optional[str] = None,
+        device: Optional[torch.device] = None,
+        pretrained: bool = True
+    ):
+        """
+        Args:
+            precision: 'fp32', 'fp16' or 'bf16'
+            cache_dir: Directory of traced models (None disables the disk cache)
+            device: Inference device (defaults to CUDA when available)
+            pretrained: Load pretrained weights when tracing
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported segmentation precision: {precision}")
+        self.device = device or default_device()
+        self.precision = precision
+        self.dtype = PRECISIONS[precision]
+
+        cache_path = None
+        if cache_dir and pretrained:
+            cache_path = os.path.join(
+                cache_dir,
+                f"deeplabv3_mbv3_{precision}_{self.device.type}_torch{torch.__version__.split('+')[0]}.ts.pt"
+            )
+        if cache_path and os.path.exists(cache_path):
+            logger.info("Loading traced segmentation model from %s", cache_path)
+            self.model = torch.jit.load(cache_path, map_location=self.device)
+        else:
+            self.model = self._trace(pretrained)
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                torch.jit.save(self.model, tmp_path)
+                os.replace(tmp_path, cache_path)
+                logger.info("Cached traced segmentation model at %s", cache_path)
+
+    def _trace(self, pretrained: bool) -> torch.jit.ScriptModule:
+        model = build_deeplab(pretrained).to(self.device, dtype=self.dtype)
+        model = model.to(memory_format=torch.channels_last)
+        fused = FusedSegmentationModel(model, self.dtype).to(self.device).eval()
+        example = torch.zeros((1, *self.TRACE_SIZE, 3), dtype=torch.uint8, device=self.device)
+        with torch.inference_mode():
+            traced = torch.jit.trace(fused, example, strict=False)
+        return torch.jit.freeze(traced)
+
+    def segment(self, image_rgb: np.ndarray) -> np.ndarray:
+        return self.segment_batch([image_rgb])[0]
+
+    def segment_batch(self, images_rgb: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched forward pass; images must share one shape"""
+        batch = torch.from_numpy(np.ascontiguousarray(np.stack(images_rgb))).to(self.device)
+        with torch.inference_mode():
+            masks = self.model(batch).cpu().numpy()
+        return list(masks)
+
+    def close(self) -> None:
+        self.model = None
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
@@ -212,6 +212,29 @@ def resize_image(image: np.ndarray, max_dimension: int = 1920) -> np.ndarray:
     return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
 
 
+def frame_signature(image: np.ndarray, size: int = 32) -> np.ndarray:
+    """
+    Tiny luma thumbnail used to detect near-identical consecutive frames
+    
+    The frame is first decimated by striding (no full-resolution pass) and then
+    area-averaged, which keeps the cost well under a millisecond on 12 MP frames.
+    
+    Args:
+        image: Input image (BGR)
+        size: Side of the square signature
+        
+    Returns:
+        (size, size) float32 luma thumbnail
+    """
+    h, w = image.shape[:2]
+    step = max(1, min(h, w) // (size * 8))
+    decimated = image[::step, ::step]
+    if decimated.ndim == 3:
+        decimated = cv2.cvtColor(np.ascontiguousarray(decimated), cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(decimated, (size, size), interpolation=cv2.INTER_AREA)
+    return thumbnail.astype(np.float32)
+
+
 def convert_bgr_to_rgb(image: np.ndarray) -> np.ndarray:
     """Convert BGR image to RGB"""
     return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,169 @@
+"""
+Face Mesh landmark index sets and serialization helpers
+"""
+
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from mediapipe.python.solutions import face_mesh_connections
+
+import config
+
+
+# Face Mesh indices used for PnP head pose estimation (order matches the 3D model)
+POSE_LANDMARK_INDICES = np.array([
+    1,      # Nose tip
+    152,    # Chin
+    263,    # Left eye left corner
+    33,     # Right eye right corner
+    287,    # Left mouth corner
+    57      # Right mouth corner
+], dtype=np.intp)
+
+# Face Mesh face-oval contour used for the hair occlusion heuristic
+JAWLINE_LANDMARK_INDICES = np.array([
+    10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
+    397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136,
+    172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
+], dtype=np.intp)
+
+
+def _connection_indices(*connections) -> np.ndarray:
+    """Sorted unique landmark indices referenced by Face Mesh connection sets"""
+    return np.array(
+        sorted({index for connection in connections for edge in connection for index in edge}),
+        dtype=np.intp
+    )
+
+
+# Named landmark subsets clients can request instead of the full mesh
+LANDMARK_SUBSETS: Dict[str, np.ndarray] = {
+    'contours': _connection_indices(face_mesh_connections.FACEMESH_CONTOURS),
+    'eyes': _connection_indices(
+        face_mesh_connections.FACEMESH_LEFT_EYE,
+        face_mesh_connections.FACEMESH_RIGHT_EYE
+    ),
+    'pose': POSE_LANDMARK_INDICES,
+}
+
+# Wire formats for stream landmarks
+FORMAT_JSON = "json"
+FORMAT_INT16 = "int16"
+FORMAT_FLOAT16 = "float16"
+FORMAT_DELTA = "delta"
+
+
+def landmarks_to_dicts(points: np.ndarray) -> List[Dict[str, float]]:
+    """
+    Convert an (N, 2) or (N, 3) landmark array to JSON-friendly dictionaries
+
+    Only used at the response boundary; validators work on the arrays directly.
+
+    Args:
+        points: Landmark coordinates in pixels
+
+    Returns:
+        List of dictionaries with 'x', 'y' (and 'z' for 3D) keys
+    """
+    keys = ('x', 'y', 'z')[:points.shape[1]]
+    return [dict(zip(keys, row)) for row in points.tolist()]
+
+
+def select_landmark_subset(points: np.ndarray, subset: Optional[str]) -> np.ndarray:
+    """
+    Select a named landmark subset
+
+    Args:
+        points: (N, D) landmark array
+        subset: Subset name from LANDMARK_SUBSETS, or None for all landmarks
+
+    Returns:
+        Landmarks of the subset, in subset index order
+
+    Raises:
+        ValueError: If the subset name is unknown
+    """
+    if subset is None:
+        return points
+    if subset not in LANDMARK_SUBSETS:
+        raise ValueError(f"Unknown landmark subset: {subset}")
+    return points[LANDMARK_SUBSETS[subset]]
+
+
+def quantize_landmarks(points: np.ndarray) -> np.ndarray:
+    """Quantize pixel coordinates to int16 at LANDMARK_INT16_SCALE steps per pixel"""
+    limit = np.iinfo(np.int16).max
+    scaled = np.rint(points * config.LANDMARK_INT16_SCALE)
+    return np.clip(scaled, -limit, limit).astype(np.int16)
+
+
+def pack_array(values: np.ndarray, dtype: str) -> str:
+    """Pack an array as base64 of little-endian values in row-major order"""
+    packed = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def encode_landmarks(
+    points: np.ndarray,
+    landmark_format: str,
+    subset: Optional[str] = None,
+    previous_q: Optional[np.ndarray] = None,
+    sequence: int = 0,
+    force_keyframe: bool = False
+) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+    """
+    Encode 2D landmarks into a compact packed wire format
+
+    Packed formats carry base64 data of an (count, 2) row-major array:
+    - 'int16': pixel coordinates multiplied by 'scale' and rounded
+    - 'float16': pixel coordinates as half-precision floats
+    - 'delta': int8 differences of the int16-quantized coordinates against the
+      frame 'base_sequence', or an int16 keyframe when 'keyframe' is true
+
+    Args:
+        points: (N, 2) landmark array in pixels
+        landmark_format: One of FORMAT_INT16, FORMAT_FLOAT16, FORMAT_DELTA
+        subset: Optional subset name (see LANDMARK_SUBSETS)
+        previous_q: Quantized landmarks last sent in this session (delta only)
+        sequence: Sequence number of this frame within the session
+        force_keyframe: Send absolute coordinates even if a delta is possible
+
+    Returns:
+        Tuple of (payload dict, quantized landmarks to remember for the next delta)
+    """
+    selected = select_landmark_subset(points, subset)
+    payload: Dict[str, Any] = {
+        'format': landmark_format,
+        'subset': subset,
+        'count': int(selected.shape[0]),
+        'sequence': sequence,
+    }
+
+    if landmark_format == FORMAT_FLOAT16:
+        payload.update({'dtype': 'float16', 'data': pack_array(selected, 'f2')})
+        return payload, None
+
+    quantized = quantize_landmarks(selected)
+    payload['scale'] = config.LANDMARK_INT16_SCALE
+
+    if landmark_format == FORMAT_INT16:
+        payload.update({'dtype': 'int16', 'data': pack_array(quantized, 'i2')})
+        return payload, None
+
+    if landmark_format != FORMAT_DELTA:
+        raise ValueError(f"Unsupported landmark format: {landmark_format}")
+
+    if not force_keyframe and previous_q is not None and previous_q.shape == quantized.shape:
+        delta = quantized.astype(np.int32) - previous_q.astype(np.int32)
+        if np.abs(delta).max(initial=0) <= np.iinfo(np.int8).max:
+            payload.update({
+                'dtype': 'int8',
+                'keyframe': False,
+                'base_sequence': sequence - 1,
+                'data': pack_array(delta, 'i1'),
+            })
+            return payload, quantized
+
+    payload.update({'dtype': 'int16', 'keyframe': True, 'data': pack_array(quantized, 'i2')})
+    return payload, quantized
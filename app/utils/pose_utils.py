@@ -0,0 +1,186 @@
+"""
+Head pose helpers: Euler conversion and closed-form rigid alignment
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+import config
+from app.utils.landmark_utils import POSE_LANDMARK_INDICES
+
+logger = logging.getLogger(__name__)
+
+
+# The PnP model points use a face frame with y up and z toward the camera. A
+# half turn about x expresses them in image axes (x right, y down, z away from
+# the camera) without mirroring them, so a rotation aligning the image-axes
+# template maps to the PnP rotation (model frame -> camera frame) as
+# rotation @ MODEL_TO_IMAGE.
+MODEL_TO_IMAGE = np.diag([1.0, -1.0, -1.0])
+
+# Six-point generic face (the PnP model points) in image axes, nose tip at the origin
+GENERIC_FACE_POINTS = np.array([
+    (0.0, 0.0, 0.0),            # Nose tip
+    (0.0, -330.0, -65.0),       # Chin
+    (-225.0, 170.0, -135.0),    # Left eye left corner
+    (225.0, 170.0, -135.0),     # Right eye right corner
+    (-150.0, -150.0, -125.0),   # Left mouth corner
+    (150.0, -150.0, -125.0)     # Right mouth corner
+], dtype=np.float64) @ MODEL_TO_IMAGE
+
+
+def rotation_matrices_to_euler(rotation_matrices: np.ndarray) -> np.ndarray:
+    """
+    Convert rotation matrices to Euler angles (yaw, pitch, roll)
+
+    Uses the convention R = Rz(yaw) * Ry(pitch) * Rx(roll).
+
+    Args:
+        rotation_matrices: (3, 3) or (B, 3, 3) rotation matrices
+
+    Returns:
+        (3,) or (B, 3) array of (yaw, pitch, roll) in degrees
+    """
+    r = np.asarray(rotation_matrices, dtype=np.float64)
+    sy = np.sqrt(r[..., 0, 0] ** 2 + r[..., 1, 0] ** 2)
+    singular = sy < 1e-6
+
+    roll = np.where(
+        singular,
+        np.arctan2(-r[..., 1, 2], r[..., 1, 1]),
+        np.arctan2(r[..., 2, 1], r[..., 2, 2])
+    )
+    pitch = np.arctan2(-r[..., 2, 0], sy)
+    yaw = np.where(singular, 0.0, np.arctan2(r[..., 1, 0], r[..., 0, 0]))
+
+    return np.degrees(np.stack([yaw, pitch, roll], axis=-1))
+
+
+def normalize_yaw(yaw: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+    """
+    Fold mirrored solutions (~180° yaw for frontal faces) back toward zero
+    """
+    folded = np.where(yaw > 90, 180 - yaw, np.where(yaw < -90, -180 - yaw, yaw))
+    return folded if np.ndim(folded) else float(folded)
+
+
+def umeyama_alignment(
+    source: np.ndarray,
+    target: np.ndarray,
+    with_scale: bool = True
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Closed-form similarity transform mapping target points onto source points
+
+    Solves source ≈ scale * R @ target + t (Kabsch when with_scale is False,
+    Umeyama otherwise) for every item of a batch with one SVD call.
+
+    Args:
+        source: (N, 3) or (B, N, 3) observed points
+        target: (N, 3) reference points shared by the whole batch
+        with_scale: Also estimate a uniform scale
+
+    Returns:
+        Tuple of (rotations (B, 3, 3), scales (B,), translations (B, 3))
+    """
+    src = np.asarray(source, dtype=np.float64)
+    if src.ndim == 2:
+        src = src[None]
+    tgt = np.asarray(target, dtype=np.float64)
+
+    src_mean = src.mean(axis=1, keepdims=True)
+    tgt_mean = tgt.mean(axis=0)
+    src_centered = src - src_mean
+    tgt_centered = tgt - tgt_mean
+
+    # Cross-covariance between observed and reference points, per batch item
+    covariance = np.einsum('bni,nj->bij', src_centered, tgt_centered) / tgt.shape[0]
+    u, s, vt = np.linalg.svd(covariance)
+
+    # Guard against reflections
+    d = np.ones_like(s)
+    d[:, 2] = np.sign(np.linalg.det(u @ vt))
+    d[d == 0] = 1.0
+    rotations = (u * d[:, None, :]) @ vt
+
+    if with_scale:
+        tgt_var = (tgt_centered ** 2).sum() / tgt.shape[0]
+        scales = (s * d).sum(axis=1) / tgt_var
+    else:
+        scales = np.ones(src.shape[0])
+
+    translations = src_mean[:, 0] - scales[:, None] * np.einsum('bij,j->bi', rotations, tgt_mean)
+    return rotations, scales, translations
+
+
+class RigidPoseEngine:
+    """
+    Head pose from Face Mesh 3D landmarks by rigid alignment to a canonical face
+
+    Instead of iterating PnP on six 2D points, the rotation that best aligns a
+    canonical face to `landmarks_3d` is computed in closed form. Rotations are
+    mapped to the PnP model frame before the Euler conversion, so both engines
+    report the same signed angles and can be swapped.
+    """
+
+    def __init__(self, template: Optional[np.ndarray] = None, indices: Optional[np.ndarray] = None):
+        """
+        Args:
+            template: (K, 3) canonical face points in image axes; defaults to the
+                six-point generic face
+            indices: Face Mesh indices of the template points; defaults to all
+                landmarks for a full template and POSE_LANDMARK_INDICES otherwise
+        """
+        if template is None:
+            template = GENERIC_FACE_POINTS
+            indices = POSE_LANDMARK_INDICES
+        self.template = np.asarray(template, dtype=np.float64)
+        self.indices = np.arange(len(self.template)) if indices is None else np.asarray(indices, dtype=np.intp)
+        if len(self.indices) != len(self.template):
+            raise ValueError("Template and landmark indices must have the same length")
+
+    @classmethod
+    def from_config(cls) -> "RigidPoseEngine":
+        """Create the engine with the canonical face configured in config.py"""
+        path = config.POSE_CANONICAL_FACE_PATH
+        if path and Path(path).exists():
+            return cls(template=np.load(path))
+        if path:
+            logger.warning("Canonical face %s not found; using the six-point generic face", path)
+        return cls()
+
+    def estimate_batch(self, landmarks_3d: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimate head pose for a batch of Face Mesh landmark sets
+
+        Args:
+            landmarks_3d: (B, N, 3) landmarks in pixels (z scaled like x)
+
+        Returns:
+            Tuple of ((B, 3) yaw/pitch/roll in degrees, (B, 3, 3) rotation
+            matrices in the PnP convention)
+        """
+        points = np.asarray(landmarks_3d)
+        if points.shape[1] <= self.indices.max():
+            raise ValueError(f"Expected at least {self.indices.max() + 1} landmarks, got {points.shape[1]}")
+
+        rotations, _, _ = umeyama_alignment(points[:, self.indices], self.template)
+        rotations = rotations @ MODEL_TO_IMAGE
+
+        angles = rotation_matrices_to_euler(rotations)
+        angles[:, 0] = normalize_yaw(angles[:, 0])
+        return angles, rotations
+
+    def estimate(self, landmarks_3d: np.ndarray) -> Tuple[float, float, float, np.ndarray]:
+        """
+        Estimate head pose for one (N, 3) landmark set
+
+        Returns:
+            Tuple of (yaw, pitch, roll, rotation matrix)
+        """
+        angles, rotations = self.estimate_batch(landmarks_3d[None])
+        yaw, pitch, roll = angles[0].tolist()
+        return yaw, pitch, roll, rotations[0]
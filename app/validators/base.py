@@ -3,8 +3,9 @@ Base validator class
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Optional
 import numpy as np
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult
 
 
@@ -15,13 +16,13 @@ class BaseValidator(ABC):
         self.name = self.__class__.__name__
     
     @abstractmethod
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Validate the image
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Optional context from previous validators
+            context: Per-request frame context shared with other validators
             
         Returns:
             ValidationResult with pass/fail status and errors
@@ -31,3 +32,9 @@ class BaseValidator(ABC):
     def _create_result(self, passed: bool = True, metadata: Dict = None) -> ValidationResult:
         """Helper to create a ValidationResult"""
         return ValidationResult(passed=passed, metadata=metadata or {})
+    
+    def _ensure_context(self, image: np.ndarray, context: Optional[FrameContext]) -> FrameContext:
+        """Return the given context or a fresh one for standalone validator calls"""
+        if context is None:
+            return FrameContext(image=image)
+        return context
@@ -3,12 +3,13 @@ Step 1: Format, aspect ratio, and resolution validation
 """
 
 import io
-from typing import Dict, Any
+from typing import Optional
 import numpy as np
 from PIL import Image
 import cv2
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult, ErrorCode
 from app.utils.image_utils import get_image_dimensions, calculate_aspect_ratio
 import config
@@ -17,13 +18,13 @@ import config
 class FormatValidator(BaseValidator):
     """Validates image format, aspect ratio, and resolution"""
     
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Validate image format requirements
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Must contain 'image_bytes' for format detection
+            context: Frame context; 'image_bytes' is used for format detection
             
         Returns:
             ValidationResult
@@ -34,10 +35,10 @@ class FormatValidator(BaseValidator):
         height, width = get_image_dimensions(image)
         
         # Check format (if image_bytes provided in context)
-        if context and 'image_bytes' in context:
-            image_format = self._check_format(context['image_bytes'], result)
+        if context is not None and context.image_bytes is not None:
+            image_format = self._check_format(context.image_bytes, result)
             if image_format == 'JPEG':
-                self._check_jpeg_quality(context['image_bytes'], result)
+                self._check_jpeg_quality(context.image_bytes, result)
         
         # Check aspect ratio
         self._check_aspect_ratio(width, height, result)
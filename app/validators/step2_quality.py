@@ -2,11 +2,12 @@
 Step 2: Lighting, exposure, blur, and shadow detection
 """
 
-from typing import Dict, Any
+from typing import Optional
 import numpy as np
 import cv2
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult, ErrorCode
 import config
 
@@ -14,21 +15,25 @@ import config
 class QualityValidator(BaseValidator):
     """Validates image quality: lighting, exposure, blur, shadows"""
     
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Validate image quality
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Optional context (can contain face_bbox for targeted checks)
+            context: Frame context (face_bbox enables targeted shadow checks;
+                a stream ROI restricts the checks to the crop around the face)
             
         Returns:
             ValidationResult
         """
         result = self._create_result()
+        context = self._ensure_context(image, context)
         
-        # Convert to grayscale for analysis
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # Grayscale plane is shared with later validators
+        gray = context.analysis_gray
+        analysis_image = context.analysis_image
+        origin_x, origin_y = context.analysis_origin
         
         # Check blur
         blur_score = self._check_blur(gray, result)
@@ -37,22 +42,24 @@ class QualityValidator(BaseValidator):
         brightness_score, contrast_score = self._check_exposure_contrast(gray, result)
         
         # Check for shadows (if face region is available)
-        if context and 'face_bbox' in context:
-            face_region = self._extract_face_region(image, context['face_bbox'])
+        if context.face_bbox is not None:
+            x, y, w, h = context.face_bbox
+            face_region = self._extract_face_region(analysis_image, (x - origin_x, y - origin_y, w, h))
             if face_region is not None:
                 shadow_score = self._check_shadows(face_region, result)
             else:
                 shadow_score = 0.0
         else:
-            # General shadow check on full image
-            shadow_score = self._check_shadows(image, result)
+            # General shadow check on the analysed image
+            shadow_score = self._check_shadows(analysis_image, result)
         
         # Add metadata
         result.metadata = {
             'blur_score': float(blur_score),
             'brightness_score': float(brightness_score),
             'contrast_score': float(contrast_score),
-            'shadow_score': float(shadow_score)
+            'shadow_score': float(shadow_score),
+            'on_roi': context.roi is not None
         }
         
         return result
@@ -2,17 +2,136 @@
 Step 3: Face detection and landmarks using MediaPipe
 """
 
-from typing import Dict, Any, List, Tuple
+import threading
+from typing import Optional, Tuple
 import numpy as np
 import cv2
 import mediapipe as mp
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult, ErrorCode
-from app.utils.image_utils import convert_bgr_to_rgb
 import config
 
 
+class FaceTracker:
+    """
+    Video-mode Face Mesh that follows one face across consecutive stream frames
+    
+    MediaPipe reuses the previous frame's landmarks to place the next mesh, so
+    tracked frames skip face detection entirely. The detector bbox is derived
+    from the landmark extents using a calibration taken at the last detection.
+    
+    The video-mode graph assumes consecutive inputs share one geometry, so it
+    always sees the full frame (never the session's analysis crop) and is
+    rebuilt when the stream's frame size changes.
+    """
+    
+    def __init__(self):
+        self.face_mesh = self._create_face_mesh()
+        self.tracking = False
+        self.frames_since_detection = 0
+        self._calibration: Optional[np.ndarray] = None
+        self._last_bbox: Optional[Tuple[int, int, int, int]] = None
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _create_face_mesh():
+        return mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            min_detection_confidence=config.MEDIAPIPE_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=config.MEDIAPIPE_MIN_TRACKING_CONFIDENCE
+        )
+    
+    def can_track(self) -> bool:
+        """Whether the next frame may skip detection"""
+        return (
+            self.tracking
+            and self.frames_since_detection < config.STREAM_TRACKING_REDETECT_INTERVAL
+        )
+    
+    def process(self, image_rgb: np.ndarray):
+        """
+        Run the video-mode mesh on a full frame and return landmarks of the
+        tracked face, if any
+        """
+        with self._lock:
+            frame_shape = image_rgb.shape[:2]
+            if self._frame_shape is not None and frame_shape != self._frame_shape:
+                # Landmarks carried over from another geometry are meaningless
+                self.face_mesh.close()
+                self.face_mesh = self._create_face_mesh()
+                self.reset()
+            self._frame_shape = frame_shape
+            mesh_results = self.face_mesh.process(image_rgb)
+        if mesh_results.multi_face_landmarks:
+            return mesh_results.multi_face_landmarks[0]
+        return None
+    
+    def calibrate(self, bbox: Tuple[int, int, int, int], points: np.ndarray) -> None:
+        """
+        Record how the detector bbox relates to the landmark extents
+        
+        Args:
+            bbox: Detector bbox as (x, y, width, height)
+            points: (N, 2+) landmarks of the same face
+        """
+        min_xy = points[:, :2].min(axis=0)
+        extent = np.maximum(points[:, :2].max(axis=0) - min_xy, 1.0)
+        x, y, w, h = bbox
+        self._calibration = np.array([
+            (x - min_xy[0]) / extent[0],
+            (y - min_xy[1]) / extent[1],
+            w / extent[0],
+            h / extent[1]
+        ], dtype=np.float64)
+        self._last_bbox = bbox
+        self.tracking = True
+        self.frames_since_detection = 0
+    
+    def bbox_from_landmarks(self, points: np.ndarray, image_width: int, image_height: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Estimate the detector bbox from tracked landmarks
+        
+        Returns:
+            Bbox as (x, y, width, height), or None if tracking looks unreliable
+            (the face jumped in size or left the frame), which forces re-detection
+        """
+        if self._calibration is None or self._last_bbox is None:
+            return None
+        min_xy = points[:, :2].min(axis=0)
+        extent = np.maximum(points[:, :2].max(axis=0) - min_xy, 1.0)
+        ax, ay, aw, ah = self._calibration
+        
+        x = int(max(0, min_xy[0] + ax * extent[0]))
+        y = int(max(0, min_xy[1] + ay * extent[1]))
+        w = int(min(aw * extent[0], image_width - x))
+        h = int(min(ah * extent[1], image_height - y))
+        if w <= 0 or h <= 0:
+            return None
+        
+        last_area = self._last_bbox[2] * self._last_bbox[3]
+        area_change = (w * h) / last_area if last_area else 0.0
+        if not (1 / config.STREAM_TRACKING_MAX_AREA_CHANGE <= area_change <= config.STREAM_TRACKING_MAX_AREA_CHANGE):
+            return None
+        
+        self._last_bbox = (x, y, w, h)
+        self.frames_since_detection += 1
+        return self._last_bbox
+    
+    def reset(self) -> None:
+        """Drop the tracked face so the next frame runs full detection"""
+        self.tracking = False
+        self._calibration = None
+        self._last_bbox = None
+    
+    def close(self) -> None:
+        """Release the MediaPipe graph"""
+        self.face_mesh.close()
+
+
 class FaceDetectionValidator(BaseValidator):
     """Detects faces and extracts landmarks using MediaPipe"""
     
@@ -33,32 +152,55 @@ class FaceDetectionValidator(BaseValidator):
             min_detection_confidence=config.MEDIAPIPE_MIN_DETECTION_CONFIDENCE,
             min_tracking_confidence=config.MEDIAPIPE_MIN_TRACKING_CONFIDENCE
         )
+        
+        # MediaPipe graphs are not re-entrant; auto-capture runs the full
+        # pipeline from a worker thread alongside request handling
+        self._detection_lock = threading.Lock()
+        self._mesh_lock = threading.Lock()
     
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Detect faces and extract landmarks
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Optional context
+            context: Frame context; receives face_bbox, landmarks and landmarks_3d
             
         Returns:
-            ValidationResult with face data in metadata
+            ValidationResult with face summary in metadata
         """
         result = self._create_result()
+        context = self._ensure_context(image, context)
         
-        # Convert BGR to RGB for MediaPipe
-        image_rgb = convert_bgr_to_rgb(image)
+        # MediaPipe expects RGB; the plane is shared with later validators
         h, w = image.shape[:2]
         
-        # Detect faces
-        detection_results = self.face_detection.process(image_rgb)
+        # Stream sessions follow the face with a video-mode mesh and only
+        # re-detect when tracking is lost or the re-detection interval expires.
+        # Tracking runs on the full frame; later steps still analyse the
+        # session's crop around the last face (context.roi).
+        tracker = None if context.defer_mesh else self._get_tracker(context)
+        if tracker is not None and tracker.can_track():
+            if self._track_face(tracker, context, result, w, h):
+                if self._face_inside_roi(context, context.face_bbox):
+                    return result
+                # The face is leaving the crop: detect on the full frame
+                self._clear_face(context)
+                context.clear_roi()
+            tracker.reset()
+        
+        # Detect faces on the full frame, so bboxes do not depend on the crop
+        with self._detection_lock:
+            detection_results = self.face_detection.process(context.rgb)
         
         # Check number of faces
         if detection_results.detections is None or len(detection_results.detections) == 0:
+            if tracker is not None:
+                tracker.reset()
             result.add_error(ErrorCode.NO_FACE_DETECTED)
             return result
         
+        context.face_count = len(detection_results.detections)
         if len(detection_results.detections) > 1:
             result.add_error(
                 ErrorCode.MULTIPLE_FACES,
@@ -68,33 +210,176 @@ class FaceDetectionValidator(BaseValidator):
         
         # Get the face detection
         detection = detection_results.detections[0]
+        confidence = detection.score[0] if detection.score else None
         
-        # Extract bounding box
+        # Extract bounding box and the six detector keypoints
         bbox = self._get_bounding_box(detection, w, h)
+        context.face_bbox = bbox
+        context.face_keypoints = self._get_keypoints(detection, w, h)
         
-        # Get landmarks using Face Mesh
-        mesh_results = self.face_mesh.process(image_rgb)
+        # Landmarks come from the crop only while the face is well inside it
+        # and detected with confidence
+        if context.roi is not None and (
+            not self._face_inside_roi(context, bbox)
+            or (confidence is not None and confidence < config.STREAM_ROI_MIN_CONFIDENCE)
+        ):
+            context.clear_roi()
         
-        landmarks = None
-        landmarks_3d = None
-        if mesh_results.multi_face_landmarks:
-            # Get landmarks for the first (and should be only) face
-            face_landmarks = mesh_results.multi_face_landmarks[0]
-            landmarks = self._extract_landmarks_2d(face_landmarks, w, h)
-            landmarks_3d = self._extract_landmarks_3d(face_landmarks, w, h)
-        
-        # Store face data in metadata
         result.metadata = {
             'face_detected': True,
             'face_count': 1,
             'face_bbox': bbox,
-            'landmarks': landmarks,
-            'landmarks_3d': landmarks_3d,
-            'detection_confidence': detection.score[0] if detection.score else None
+            'landmark_count': 0,
+            'mesh_on_roi': False,
+            'mesh_deferred': False,
+            'tracked': False,
+            'stream_roi': context.roi,
+            'detection_confidence': confidence
         }
         
+        if context.defer_mesh:
+            # Face Mesh runs only if a later step (e.g. lite pose) asks for landmarks
+            result.metadata['mesh_deferred'] = True
+            context.defer_landmarks(lambda: self._run_mesh_stage(context, None, result.metadata))
+            return result
+        
+        self._run_mesh_stage(context, tracker, result.metadata)
         return result
     
+    def _face_inside_roi(self, context: FrameContext, bbox: Tuple[int, int, int, int]) -> bool:
+        """
+        Whether a face bbox lies inside the stream ROI, away from crop edges
+        that are not also frame edges
+        """
+        if context.roi is None:
+            return True
+        x1, y1, x2, y2 = context.roi
+        x, y, bw, bh = bbox
+        margin = config.STREAM_ROI_EDGE_MARGIN
+        return (
+            (x1 == 0 or x - x1 > margin)
+            and (y1 == 0 or y - y1 > margin)
+            and (x2 == context.width or x2 - (x + bw) > margin)
+            and (y2 == context.height or y2 - (y + bh) > margin)
+        )
+    
+    def _clear_face(self, context: FrameContext) -> None:
+        """Discard face results written to the context by a failed attempt"""
+        context.face_bbox = None
+        context.face_count = 0
+        context.landmarks = None
+        context.landmarks_3d = None
+    
+    def _run_mesh_stage(self, context: FrameContext, tracker: Optional[FaceTracker], metadata: dict) -> None:
+        """
+        Extract Face Mesh landmarks for the detected face into the context
+        
+        Args:
+            context: Frame context with face_bbox from detection
+            tracker: Session face tracker to seed, if any
+            metadata: Face step metadata to update with the mesh summary
+        """
+        image_rgb = context.analysis_rgb
+        h, w = image_rgb.shape[:2]
+        origin_x, origin_y = context.analysis_origin
+        x, y, bw, bh = context.face_bbox
+        bbox = (x - origin_x, y - origin_y, bw, bh)
+        
+        # Get landmarks using Face Mesh, preferably on the detected face ROI so the
+        # mesh graph does not repeat the face search over the full frame
+        face_landmarks = None
+        mesh_on_roi = False
+        origin = (origin_x, origin_y)
+        mesh_size = (w, h)
+        if tracker is not None:
+            # Seed the session tracker; the video-mode mesh sees the full frame
+            face_landmarks = tracker.process(context.rgb)
+            if face_landmarks is not None:
+                origin = (0, 0)
+                mesh_size = (context.width, context.height)
+        if face_landmarks is None and config.FACE_MESH_USE_ROI:
+            x1, y1, x2, y2 = self._get_mesh_roi(bbox, w, h)
+            if x2 > x1 and y2 > y1:
+                roi_rgb = np.ascontiguousarray(image_rgb[y1:y2, x1:x2])
+                face_landmarks = self._run_face_mesh(roi_rgb)
+                if face_landmarks is not None:
+                    mesh_on_roi = True
+                    origin = (origin_x + x1, origin_y + y1)
+                    mesh_size = (x2 - x1, y2 - y1)
+        
+        if face_landmarks is None:
+            # Fall back to the whole analysed image if the crop did not yield a mesh
+            face_landmarks = self._run_face_mesh(image_rgb)
+        
+        if face_landmarks is None:
+            return
+        
+        # Large structures live on the context; metadata stays a small summary
+        context.landmarks_3d = self._extract_landmarks(face_landmarks, mesh_size, origin)
+        # 2D landmarks are a view on the same array, no extra copy
+        context.landmarks = context.landmarks_3d[:, :2]
+        if tracker is not None and not mesh_on_roi:
+            tracker.calibrate(context.face_bbox, context.landmarks)
+        
+        metadata['landmark_count'] = len(context.landmarks)
+        metadata['mesh_on_roi'] = mesh_on_roi
+    
+    def _get_tracker(self, context: FrameContext) -> Optional[FaceTracker]:
+        """Return the face tracker of the context's stream session, creating it if needed"""
+        session = context.session
+        if session is None or not config.STREAM_FACE_TRACKING:
+            return None
+        with session.lock:
+            if session.face_tracker is None:
+                session.face_tracker = FaceTracker()
+            return session.face_tracker
+    
+    def _track_face(self, tracker: FaceTracker, context: FrameContext, result: ValidationResult, w: int, h: int) -> bool:
+        """
+        Try to follow the session's face without running detection
+        
+        Every STREAM_TRACKING_FACE_COUNT_INTERVAL tracked frames the detector
+        still counts faces, since the single-face mesh cannot see a second
+        person entering the frame; more than one face ends tracking and the
+        frame goes through full detection, which reports them.
+        
+        Returns:
+            True if the frame was handled by tracking
+        """
+        face_landmarks = tracker.process(context.rgb)
+        if face_landmarks is None:
+            return False
+        
+        landmarks_3d = self._extract_landmarks(face_landmarks, (w, h))
+        landmarks = landmarks_3d[:, :2]
+        bbox = tracker.bbox_from_landmarks(landmarks, w, h)
+        if bbox is None:
+            return False
+        
+        if tracker.frames_since_detection % max(1, config.STREAM_TRACKING_FACE_COUNT_INTERVAL) == 0:
+            with self._detection_lock:
+                detection_results = self.face_detection.process(context.rgb)
+            if detection_results.detections is not None and len(detection_results.detections) > 1:
+                return False
+        
+        context.face_count = 1
+        context.face_bbox = bbox
+        context.landmarks = landmarks
+        context.landmarks_3d = landmarks_3d
+        
+        result.metadata = {
+            'face_detected': True,
+            'face_count': 1,
+            'face_bbox': bbox,
+            'landmark_count': len(landmarks),
+            'mesh_on_roi': False,
+            'mesh_deferred': False,
+            'tracked': True,
+            'stream_roi': context.roi,
+            'detection_confidence': None
+        }
+        return True
+    
     def _get_bounding_box(self, detection, image_width: int, image_height: int) -> Tuple[int, int, int, int]:
         """
         Extract bounding box from MediaPipe detection
@@ -117,36 +402,71 @@ class FaceDetectionValidator(BaseValidator):
         
         return (x, y, w, h)
     
-    def _extract_landmarks_2d(self, face_landmarks, image_width: int, image_height: int) -> List[Dict]:
+    def _get_keypoints(self, detection, image_width: int, image_height: int) -> np.ndarray:
         """
-        Extract 2D landmarks from MediaPipe Face Mesh
+        Extract the six MediaPipe detection keypoints (eyes, nose tip, mouth
+        center, ear tragions)
         
         Returns:
-            List of landmark dictionaries with 'x', 'y' coordinates
+            (6, 2) float32 array of keypoints in pixels
         """
-        landmarks = []
-        for landmark in face_landmarks.landmark:
-            landmarks.append({
-                'x': landmark.x * image_width,
-                'y': landmark.y * image_height
-            })
-        return landmarks
+        keypoints = detection.location_data.relative_keypoints
+        return np.array(
+            [(kp.x * image_width, kp.y * image_height) for kp in keypoints],
+            dtype=np.float32
+        )
     
-    def _extract_landmarks_3d(self, face_landmarks, image_width: int, image_height: int) -> List[Dict]:
+    def _get_mesh_roi(self, bbox: Tuple[int, int, int, int], image_width: int, image_height: int) -> Tuple[int, int, int, int]:
+        """
+        Expand the detection bbox into a square crop for Face Mesh
+        
+        Returns:
+            Tuple of (x1, y1, x2, y2) in pixels, clipped to the image
+        """
+        x, y, bw, bh = bbox
+        side = max(bw, bh) * (1 + 2 * config.FACE_MESH_ROI_MARGIN)
+        cx = x + bw / 2
+        cy = y + bh / 2
+        
+        x1 = max(0, int(cx - side / 2))
+        y1 = max(0, int(cy - side / 2))
+        x2 = min(image_width, int(cx + side / 2))
+        y2 = min(image_height, int(cy + side / 2))
+        
+        return (x1, y1, x2, y2)
+    
+    def _run_face_mesh(self, image_rgb: np.ndarray):
+        """
+        Run Face Mesh and return landmarks of the first face, if any
+        """
+        with self._mesh_lock:
+            mesh_results = self.face_mesh.process(image_rgb)
+        if mesh_results.multi_face_landmarks:
+            # Get landmarks for the first (and should be only) face
+            return mesh_results.multi_face_landmarks[0]
+        return None
+    
+    def _extract_landmarks(self, face_landmarks, mesh_size: Tuple[int, int], origin: Tuple[int, int] = (0, 0)) -> np.ndarray:
         """
         Extract 3D landmarks from MediaPipe Face Mesh
         
+        Args:
+            face_landmarks: Face Mesh landmarks normalized to the processed image
+            mesh_size: (width, height) of the image Face Mesh ran on
+            origin: (x, y) offset of that image within the full frame
+        
         Returns:
-            List of landmark dictionaries with 'x', 'y', 'z' coordinates
-        """
-        landmarks = []
-        for landmark in face_landmarks.landmark:
-            landmarks.append({
-                'x': landmark.x * image_width,
-                'y': landmark.y * image_height,
-                'z': landmark.z * image_width  # z is relative to x
-            })
-        return landmarks
+            (N, 3) float32 array of 'x', 'y' in full-frame pixels and 'z' scaled like x
+        """
+        width, height = mesh_size
+        points = np.array(
+            [(lm.x, lm.y, lm.z) for lm in face_landmarks.landmark],
+            dtype=np.float32
+        )
+        # z is relative to x
+        points *= np.array([width, height, width], dtype=np.float32)
+        points[:, :2] += np.array(origin, dtype=np.float32)
+        return points
     
     def __del__(self):
         """Clean up MediaPipe resources"""
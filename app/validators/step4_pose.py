@@ -2,15 +2,37 @@
 Step 4: Head pose and gaze estimation using PnP
 """
 
-from typing import Dict, Any, Tuple
+from functools import lru_cache
+from typing import Optional, Tuple
 import numpy as np
 import cv2
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext, HeadPose
 from app.core.errors import ValidationResult, ErrorCode
+from app.utils.landmark_utils import POSE_LANDMARK_INDICES
+from app.utils.pose_utils import RigidPoseEngine, normalize_yaw, rotation_matrices_to_euler
 import config
 
 
+# Assuming no lens distortion
+_DIST_COEFFS = np.zeros((4, 1))
+
+
+@lru_cache(maxsize=16)
+def _camera_matrix(w: int, h: int) -> np.ndarray:
+    """Approximate pinhole camera matrix for a resolution (focal length = image width)"""
+    focal_length = w
+    center = (w / 2, h / 2)
+    matrix = np.array([
+        [focal_length, 0, center[0]],
+        [0, focal_length, center[1]],
+        [0, 0, 1]
+    ], dtype=np.float64)
+    matrix.flags.writeable = False
+    return matrix
+
+
 class PoseEstimationValidator(BaseValidator):
     """Estimates head pose using PnP algorithm"""
     
@@ -29,38 +51,69 @@ class PoseEstimationValidator(BaseValidator):
         ], dtype=np.float64)
         
         # MediaPipe Face Mesh landmark indices for the above points
-        self.landmark_indices = [
-            1,      # Nose tip
-            152,    # Chin
-            263,    # Left eye left corner
-            33,     # Right eye right corner
-            287,    # Left mouth corner
-            57      # Right mouth corner
-        ]
+        self.landmark_indices = POSE_LANDMARK_INDICES
+        
+        # Approximate positions of the six MediaPipe Face Detection keypoints,
+        # in the same frame and units as the Face Mesh model points (fitted so
+        # both models agree on frontal faces)
+        self.lite_model_points = np.array([
+            (155.0, 152.0, -125.0),     # Right eye
+            (-155.0, 152.0, -125.0),    # Left eye
+            (0.0, 0.0, 0.0),            # Nose tip
+            (0.0, -180.0, -110.0),      # Mouth center
+            (285.0, -85.0, -500.0),     # Right ear tragion
+            (-285.0, -85.0, -500.0)     # Left ear tragion
+        ], dtype=np.float64)
+        
+        # Closed-form alignment of landmarks_3d, used instead of PnP when
+        # POSE_ENGINE is 'rigid'
+        self.rigid_engine = RigidPoseEngine.from_config() if config.POSE_ENGINE == 'rigid' else None
     
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Estimate head pose
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Must contain 'landmarks' from face detection step
+            context: Frame context with landmarks (or detector keypoints when
+                Face Mesh was deferred) from the face detection step;
+                receives the estimated pose
             
         Returns:
             ValidationResult with pose angles in metadata
         """
         result = self._create_result()
+        h, w = image.shape[:2]
+        
+        # Lite path: decide from the six detector keypoints and only run the
+        # deferred Face Mesh when the estimate is close to a threshold
+        if context is not None and context.defer_mesh and context.landmarks is None and context.face_keypoints is not None:
+            lite_pose = self._solve_pose(self.lite_model_points, context.face_keypoints.astype(np.float64), w, h)
+            if lite_pose is not None and not self._is_near_threshold(*lite_pose[:3]):
+                return self._store_pose(result, context, *lite_pose, source='lite')
+            context.load_landmarks()
         
         # Check if we have landmarks
-        if not context or 'landmarks' not in context or context['landmarks'] is None:
+        if context is None or context.landmarks is None:
             result.add_error(
                 ErrorCode.NO_FACE_DETECTED,
                 "Cannot estimate pose: no face landmarks available"
             )
             return result
         
-        landmarks = context['landmarks']
-        h, w = image.shape[:2]
+        landmarks = context.landmarks
+        
+        if self.rigid_engine is not None and context.landmarks_3d is not None:
+            try:
+                yaw, pitch, roll, rotation_matrix = self.rigid_engine.estimate(context.landmarks_3d)
+            except ValueError as e:
+                result.add_error(
+                    ErrorCode.NO_FACE_DETECTED,
+                    f"Failed to extract landmarks for pose estimation: {str(e)}"
+                )
+                return result
+            rotation_vector, _ = cv2.Rodrigues(rotation_matrix)
+            return self._store_pose(result, context, yaw, pitch, roll, rotation_vector, None, source='rigid')
         
         # Extract image points for pose estimation
         try:
@@ -72,71 +125,180 @@ class PoseEstimationValidator(BaseValidator):
             )
             return result
         
-        # Camera matrix (assuming focal length = image width)
-        focal_length = w
-        center = (w / 2, h / 2)
-        camera_matrix = np.array([
-            [focal_length, 0, center[0]],
-            [0, focal_length, center[1]],
-            [0, 0, 1]
-        ], dtype=np.float64)
-        
-        # Assuming no lens distortion
-        dist_coeffs = np.zeros((4, 1))
-        
-        # Solve PnP
-        success, rotation_vector, translation_vector = cv2.solvePnP(
-            self.model_points,
-            image_points,
-            camera_matrix,
-            dist_coeffs,
-            flags=cv2.SOLVEPNP_ITERATIVE
-        )
-        
-        if not success:
+        # In stream sessions PnP starts from the previous frame's pose
+        guess = self._get_extrinsic_guess(context)
+        pose = self._solve_pose(self.model_points, image_points, w, h, guess)
+        if pose is None:
             result.add_error(
                 ErrorCode.FACE_NOT_STRAIGHT,
                 "Failed to estimate head pose"
             )
             return result
         
+        return self._store_pose(result, context, *pose, source='mesh')
+    
+    def _solve_pose(
+        self,
+        model_points: np.ndarray,
+        image_points: np.ndarray,
+        w: int,
+        h: int,
+        guess: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Optional[tuple]:
+        """
+        Solve PnP for the given model/image correspondences
+        
+        Args:
+            guess: Optional (rotation_vector, translation_vector) to start the
+                iterative solver from
+        
+        Returns:
+            Tuple of (yaw, pitch, roll, rotation_vector, translation_vector),
+            or None if PnP failed
+        """
+        camera_matrix = _camera_matrix(w, h)
+        
+        # Solve PnP
+        if guess is not None:
+            success, rotation_vector, translation_vector = cv2.solvePnP(
+                model_points,
+                image_points,
+                camera_matrix,
+                _DIST_COEFFS,
+                guess[0].copy(),
+                guess[1].copy(),
+                useExtrinsicGuess=True,
+                flags=cv2.SOLVEPNP_ITERATIVE
+            )
+            if not success:
+                # A stale guess must not cost the frame; retry from scratch
+                return self._solve_pose(model_points, image_points, w, h)
+        else:
+            success, rotation_vector, translation_vector = cv2.solvePnP(
+                model_points,
+                image_points,
+                camera_matrix,
+                _DIST_COEFFS,
+                flags=cv2.SOLVEPNP_ITERATIVE
+            )
+        
+        if not success:
+            return None
+        
         # Convert rotation vector to euler angles
         yaw, pitch, roll = self._rotation_vector_to_euler_angles(rotation_vector)
         yaw = self._normalize_yaw(yaw)
         
+        return yaw, pitch, roll, rotation_vector, translation_vector
+    
+    def _get_extrinsic_guess(self, context: FrameContext) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Previous mesh PnP solution of the frame's stream session, if any"""
+        session = context.session
+        if session is None or not config.STREAM_POSE_EXTRINSIC_GUESS:
+            return None
+        with session.lock:
+            if session.pose_rotation_vector is None:
+                return None
+            return session.pose_rotation_vector, session.pose_translation_vector
+    
+    def _update_session_pose(
+        self,
+        context: FrameContext,
+        angles: np.ndarray,
+        rotation_vector: np.ndarray,
+        translation_vector: Optional[np.ndarray],
+        source: str
+    ) -> np.ndarray:
+        """
+        Record the frame's pose in its stream session and smooth the angles
+        
+        Returns:
+            Exponentially smoothed (yaw, pitch, roll)
+        """
+        session = context.session
+        alpha = config.STREAM_POSE_SMOOTHING
+        with session.lock:
+            if source == 'mesh':
+                session.pose_rotation_vector = rotation_vector
+                session.pose_translation_vector = translation_vector
+            previous = session.pose_angles
+            if previous is None or np.abs(angles - previous).max() > config.STREAM_POSE_RESET_DEGREES:
+                smoothed = angles
+            else:
+                smoothed = alpha * angles + (1.0 - alpha) * previous
+            session.pose_angles = smoothed
+        return smoothed
+    
+    def _store_pose(
+        self,
+        result: ValidationResult,
+        context: FrameContext,
+        yaw: float,
+        pitch: float,
+        roll: float,
+        rotation_vector: np.ndarray,
+        translation_vector: Optional[np.ndarray],
+        source: str
+    ) -> ValidationResult:
+        """Check the pose thresholds and record the pose on the context and in metadata"""
+        raw_angles = np.array([yaw, pitch, roll], dtype=np.float64)
+        if context.session is not None:
+            # Stream guidance and checks use the smoothed angles
+            yaw, pitch, roll = self._update_session_pose(
+                context, raw_angles, rotation_vector, translation_vector, source
+            ).tolist()
+        
         # Check pose thresholds
         self._check_pose_angles(yaw, pitch, roll, result)
         
+        context.pose = HeadPose(
+            yaw=float(yaw),
+            pitch=float(pitch),
+            roll=float(roll),
+            rotation_vector=rotation_vector,
+            translation_vector=translation_vector,
+            source=source
+        )
+        
         # Store pose data in metadata
         result.metadata = {
             'yaw': float(yaw),
             'pitch': float(pitch),
             'roll': float(roll),
             'rotation_vector': rotation_vector.tolist(),
-            'translation_vector': translation_vector.tolist()
+            'translation_vector': translation_vector.tolist() if translation_vector is not None else None,
+            'pose_source': source
         }
+        if context.session is not None:
+            result.metadata['raw_angles'] = raw_angles.tolist()
         
         return result
     
-    def _get_image_points(self, landmarks: list) -> np.ndarray:
+    def _is_near_threshold(self, yaw: float, pitch: float, roll: float) -> bool:
+        """
+        Whether any lite angle is too close to its threshold to be trusted
+        """
+        margin = config.LITE_POSE_THRESHOLD_MARGIN
+        return (
+            abs(abs(yaw) - config.MAX_YAW) < margin
+            or abs(abs(pitch) - config.MAX_PITCH) < margin
+            or abs(abs(roll) - config.MAX_ROLL) < margin
+        )
+    
+    def _get_image_points(self, landmarks: np.ndarray) -> np.ndarray:
         """
         Extract specific landmark points for pose estimation
         
         Args:
-            landmarks: List of all face landmarks
+            landmarks: (N, 2) array of all face landmarks
             
         Returns:
             numpy array of 2D points
         """
-        image_points = []
-        for idx in self.landmark_indices:
-            if idx < len(landmarks):
-                lm = landmarks[idx]
-                image_points.append([lm['x'], lm['y']])
-            else:
-                raise ValueError(f"Landmark index {idx} out of range")
+        if len(landmarks) <= self.landmark_indices.max():
+            raise ValueError(f"Expected at least {self.landmark_indices.max() + 1} landmarks, got {len(landmarks)}")
         
-        return np.array(image_points, dtype=np.float64)
+        return landmarks[self.landmark_indices].astype(np.float64)
     
     def _rotation_vector_to_euler_angles(self, rotation_vector: np.ndarray) -> Tuple[float, float, float]:
         """
@@ -148,38 +310,17 @@ class PoseEstimationValidator(BaseValidator):
         # Convert rotation vector to rotation matrix
         rotation_matrix, _ = cv2.Rodrigues(rotation_vector)
         
-        # Extract Euler angles from rotation matrix
         # Using the convention: R = Rz(yaw) * Ry(pitch) * Rx(roll)
-        sy = np.sqrt(rotation_matrix[0, 0] ** 2 + rotation_matrix[1, 0] ** 2)
-        
-        singular = sy < 1e-6
-        
-        if not singular:
-            roll = np.arctan2(rotation_matrix[2, 1], rotation_matrix[2, 2])
-            pitch = np.arctan2(-rotation_matrix[2, 0], sy)
-            yaw = np.arctan2(rotation_matrix[1, 0], rotation_matrix[0, 0])
-        else:
-            roll = np.arctan2(-rotation_matrix[1, 2], rotation_matrix[1, 1])
-            pitch = np.arctan2(-rotation_matrix[2, 0], sy)
-            yaw = 0
-        
-        # Convert to degrees
-        roll = np.degrees(roll)
-        pitch = np.degrees(pitch)
-        yaw = np.degrees(yaw)
+        yaw, pitch, roll = rotation_matrices_to_euler(rotation_matrix).tolist()
         
         return yaw, pitch, roll
-
+    
     def _normalize_yaw(self, yaw: float) -> float:
         """
         Face Mesh can flip left/right, producing ~180° yaw for frontal faces.
         Fold mirrored solutions back toward zero so frontal faces are accepted.
         """
-        if yaw > 90:
-            return 180 - yaw
-        if yaw < -90:
-            return -180 - yaw
-        return yaw
+        return normalize_yaw(yaw)
     
     def _check_pose_angles(self, yaw: float, pitch: float, roll: float, result: ValidationResult):
         """
@@ -2,25 +2,27 @@
 Step 5: Face geometry checks (size, centering, occlusion)
 """
 
-from typing import Dict, Any
+from typing import Optional
 import numpy as np
 import cv2
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult, ErrorCode
+from app.utils.landmark_utils import JAWLINE_LANDMARK_INDICES
 import config
 
 
 class GeometryValidator(BaseValidator):
     """Validates face geometry: size, centering, and occlusion"""
     
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Validate face geometry
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Must contain 'face_bbox' and 'landmarks' from face detection step
+            context: Frame context with face_bbox and landmarks from face detection step
             
         Returns:
             ValidationResult
@@ -28,14 +30,14 @@ class GeometryValidator(BaseValidator):
         result = self._create_result()
         
         # Check if we have face data
-        if not context or 'face_bbox' not in context:
+        if context is None or context.face_bbox is None:
             result.add_error(
                 ErrorCode.NO_FACE_DETECTED,
                 "Cannot check geometry: no face bounding box available"
             )
             return result
         
-        bbox = context['face_bbox']
+        bbox = context.face_bbox
         h, w = image.shape[:2]
         
         # Check face size
@@ -44,11 +46,17 @@ class GeometryValidator(BaseValidator):
         # Check face centering
         center_offset = self._check_face_centering(bbox, w, h, result)
         
-        # Check for hair occlusion (if landmarks available)
+        # Check for hair occlusion (if landmarks available). With the lite
+        # stream pose the mesh usually stays deferred and the check is skipped,
+        # except on the session's periodic mesh frames.
         occlusion_score = 0.0
-        if 'landmarks' in context and context['landmarks']:
+        landmarks = context.load_landmarks() if context.periodic_mesh else context.landmarks
+        hair_occlusion_checked = landmarks is not None and len(landmarks) > 0
+        if hair_occlusion_checked:
+            # Edges are computed on the analysed region (the stream ROI crop, if any)
+            origin = np.array(context.analysis_origin, dtype=landmarks.dtype)
             occlusion_score = self._check_hair_occlusion(
-                image, bbox, context['landmarks'], result
+                context.analysis_gray, bbox, landmarks - origin, result
             )
         
         # Store geometry data in metadata
@@ -56,7 +64,8 @@ class GeometryValidator(BaseValidator):
             'face_size_ratio': float(face_size_ratio),
             'center_offset_x': float(center_offset[0]),
             'center_offset_y': float(center_offset[1]),
-            'occlusion_score': float(occlusion_score)
+            'occlusion_score': float(occlusion_score),
+            'hair_occlusion_checked': hair_occlusion_checked
         }
         
         return result
@@ -117,55 +126,61 @@ class GeometryValidator(BaseValidator):
         
         return (offset_x, offset_y)
     
-    def _check_hair_occlusion(self, image: np.ndarray, bbox: tuple, landmarks: list, result: ValidationResult) -> float:
+    def _check_hair_occlusion(self, gray: np.ndarray, bbox: tuple, landmarks: np.ndarray, result: ValidationResult) -> float:
         """
         Check if hair covers part of the face using edge detection around jawline
         
         This is a simplified heuristic approach that looks for strong edges
         near jawline landmarks which might indicate hair crossing the face boundary.
+        Edges are only computed around the jawline, and the per-landmark edge
+        densities are read from an integral image in one vectorized pass.
         
         Returns:
             Occlusion score (higher = more occlusion)
         """
         try:
-            # Extract jawline landmark indices (MediaPipe Face Mesh)
-            # Jawline contour landmarks: 10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288, 397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136, 172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
-            jawline_indices = [
-                10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
-                397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136,
-                172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
-            ]
+            # Jawline contour landmarks (MediaPipe Face Mesh face oval)
+            indices = JAWLINE_LANDMARK_INDICES[JAWLINE_LANDMARK_INDICES < len(landmarks)]
+            if len(indices) == 0:
+                return 0.0
+            points = landmarks[indices].astype(np.int64)
+            xs, ys = points[:, 0], points[:, 1]
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            img_h, img_w = gray.shape[:2]
+            margin = 10
             
-            # Apply edge detection
-            edges = cv2.Canny(gray, 50, 150)
+            # Run edge detection on the jawline region only. The padding
+            # covers the Sobel aperture and non-maximum suppression, plus a
+            # margin for hysteresis: weak edges are kept only when connected to
+            # a strong one, and chains leaving the crop can still differ from
+            # the full-frame result, so scores agree to within a small
+            # tolerance (about 0.003 edge density), not exactly
+            pad = margin + 32
+            rx1 = int(np.clip(xs.min() - pad, 0, img_w))
+            ry1 = int(np.clip(ys.min() - pad, 0, img_h))
+            rx2 = int(np.clip(xs.max() + pad, 0, img_w))
+            ry2 = int(np.clip(ys.max() + pad, 0, img_h))
+            if rx2 <= rx1 or ry2 <= ry1:
+                return 0.0
+            edges = cv2.Canny(gray[ry1:ry2, rx1:rx2], 50, 150)
+            integral = cv2.integral((edges > 0).astype(np.uint8))
             
-            # Check edge density near jawline landmarks
-            occlusion_score = 0.0
-            valid_points = 0
+            # Sample a small region around each landmark (clipped to the image)
+            x1 = np.clip(xs - margin, 0, img_w) - rx1
+            x2 = np.clip(xs + margin, 0, img_w) - rx1
+            y1 = np.clip(ys - margin, 0, img_h) - ry1
+            y2 = np.clip(ys + margin, 0, img_h) - ry1
+            x1, x2 = np.clip(x1, 0, rx2 - rx1), np.clip(x2, 0, rx2 - rx1)
+            y1, y2 = np.clip(y1, 0, ry2 - ry1), np.clip(y2, 0, ry2 - ry1)
             
-            for idx in jawline_indices:
-                if idx < len(landmarks):
-                    lm = landmarks[idx]
-                    x, y = int(lm['x']), int(lm['y'])
-                    
-                    # Sample a small region around each landmark
-                    margin = 10
-                    y1 = max(0, y - margin)
-                    y2 = min(edges.shape[0], y + margin)
-                    x1 = max(0, x - margin)
-                    x2 = min(edges.shape[1], x + margin)
-                    
-                    if y2 > y1 and x2 > x1:
-                        region = edges[y1:y2, x1:x2]
-                        edge_density = np.sum(region > 0) / region.size
-                        occlusion_score += edge_density
-                        valid_points += 1
+            valid = (y2 > y1) & (x2 > x1)
+            if not np.any(valid):
+                return 0.0
+            x1, x2, y1, y2 = x1[valid], x2[valid], y1[valid], y2[valid]
             
-            if valid_points > 0:
-                occlusion_score /= valid_points
+            edge_counts = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+            areas = (y2 - y1) * (x2 - x1)
+            occlusion_score = float(np.mean(edge_counts / areas))
             
             # Threshold for hair occlusion
             # This is a simple heuristic - high edge density near jawline suggests hair
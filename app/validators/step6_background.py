@@ -2,69 +2,84 @@
 Step 6: Background and extraneous object detection using segmentation
 """
 
-from typing import Dict, Any
+from typing import Optional
 import numpy as np
 import cv2
-import torch
-import torchvision.models.segmentation as segmentation
-from torchvision import transforms
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult, ErrorCode
+from app.core.metrics import get_metrics
+from app.segmentation.base import PERSON_CLASS, SegmentationEngine
+from app.segmentation.factory import create_segmentation_engine
 import config
 
 
 class BackgroundValidator(BaseValidator):
     """Validates background uniformity and detects extraneous objects"""
     
-    def __init__(self):
+    def __init__(self, engine: Optional[SegmentationEngine] = None):
+        """
+        Args:
+            engine: Segmentation engine (defaults to the deployment's
+                SEGMENTATION_ENGINE, DeepLabV3 with MobileNetV3 backbone)
+        """
         super().__init__()
         
-        # Load DeepLabV3 with MobileNetV3 backbone
-        self.model = segmentation.deeplabv3_mobilenet_v3_large(pretrained=True)
-        self.model.eval()
-        
-        # Move to GPU if available
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = self.model.to(self.device)
-        
-        # Preprocessing transforms
-        self.preprocess = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize(
-                mean=[0.485, 0.456, 0.406],
-                std=[0.229, 0.224, 0.225]
-            )
-        ])
+        self.engine = engine or create_segmentation_engine()
         
-        # COCO class index for person
-        self.PERSON_CLASS = 15
+        # VOC class index for person
+        self.PERSON_CLASS = PERSON_CLASS
     
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Validate background uniformity and detect extraneous objects
         
         Args:
             image: Input image as numpy array (BGR format)
-            context: Optional context
+            context: Frame context; receives the segmentation mask
             
         Returns:
             ValidationResult
         """
         result = self._create_result()
+        context = self._ensure_context(image, context)
         
-        # Perform segmentation
-        segmentation_mask = self._segment_image(image)
+        # A plain wall around a single face needs no segmentation; ambiguous
+        # frames fall through to the model
+        precheck_variance = self._border_precheck(image, context) if config.BACKGROUND_PRECHECK else None
+        if (
+            precheck_variance is not None
+            and precheck_variance < config.BACKGROUND_UNIFORMITY_THRESHOLD * config.BACKGROUND_PRECHECK_MARGIN
+        ):
+            get_metrics().increment('background_precheck_accepted')
+            # Only the border variance was measured; person and object
+            # values stay None
+            result.metadata = self._result_metadata(
+                'border_precheck',
+                precheck_variance,
+                uniformity_method='border_ring'
+            )
+            return result
+        get_metrics().increment('background_segmentations')
+        
+        # Perform segmentation at a fixed input size; the class mask stays at
+        # that resolution and area thresholds are rescaled to it
+        segmentation_mask = self._segment_image(context.rgb)
+        context.segmentation_mask = segmentation_mask
         
         if segmentation_mask is None:
             # If segmentation fails, don't fail validation completely
-            result.metadata = {
-                'segmentation_available': False
-            }
+            result.metadata = self._result_metadata('segmentation_failed', precheck_variance)
             return result
         
+        mask_scale = segmentation_mask.size / float(image.shape[0] * image.shape[1])
+        mask_stats = self._mask_statistics(segmentation_mask)
+        
         # Check for multiple people
-        person_count, extra_person_ratio = self._count_persons(segmentation_mask)
+        person_count, extra_person_ratio = self._count_persons(
+            mask_stats, segmentation_mask.size, mask_scale
+        )
         if person_count > 1 and extra_person_ratio > config.EXTRA_PERSON_MIN_RATIO:
             result.add_error(
                 ErrorCode.EXTRANEOUS_PEOPLE,
@@ -72,129 +87,282 @@ class BackgroundValidator(BaseValidator):
             )
         
         # Check background uniformity
-        background_variance = self._check_background_uniformity(
+        background_variance, variance_interval, uniformity_method = self._check_background_uniformity(
             image, segmentation_mask, result
         )
         
-        # Check for extraneous objects in background
-        object_score = self._check_extraneous_objects(
-            segmentation_mask, result
-        )
+        # Check for extraneous objects in background (not measurable with
+        # person/background engines)
+        object_score = None
+        if self.engine.produces_object_classes:
+            object_score = float(self._check_extraneous_objects(
+                mask_stats, segmentation_mask.size, result
+            ))
         
         # Store segmentation data in metadata
-        result.metadata = {
-            'segmentation_available': True,
-            'person_count': int(person_count),
-            'extra_person_ratio': float(extra_person_ratio),
-            'background_variance': float(background_variance),
-            'extraneous_object_score': float(object_score)
-        }
+        result.metadata = self._result_metadata(
+            'segmentation',
+            precheck_variance,
+            person_count=int(person_count),
+            extra_person_ratio=float(extra_person_ratio),
+            background_variance=float(background_variance),
+            background_variance_interval=variance_interval,
+            uniformity_method=uniformity_method,
+            extraneous_object_score=object_score,
+            segmentation_size=list(segmentation_mask.shape)
+        )
         
         return result
     
-    def _segment_image(self, image: np.ndarray) -> np.ndarray:
+    @staticmethod
+    def _result_metadata(decision_path: str, precheck_variance: Optional[float], **values) -> dict:
+        """
+        Background metadata with the same keys on every decision path
+        
+        segmentation_available is True only when the model produced a mask;
+        segmentation_skipped marks frames accepted by the border pre-check.
+        Values a path does not produce are None.
+        """
+        metadata = {
+            'segmentation_available': decision_path == 'segmentation',
+            'segmentation_skipped': decision_path == 'border_precheck',
+            'person_count': None,
+            'extra_person_ratio': None,
+            'background_variance': None,
+            'background_variance_interval': None,
+            'uniformity_method': None,
+            'extraneous_object_score': None,
+            'segmentation_size': None,
+            'decision_path': decision_path,
+            'precheck_variance': float(precheck_variance) if precheck_variance is not None else None
+        }
+        metadata.update(values)
+        return metadata
+    
+    def _border_precheck(self, image: np.ndarray, context: FrameContext) -> Optional[float]:
+        """
+        Colour variance of the border ring around a single face
+        
+        Measured on a frame downscaled to BACKGROUND_PRECHECK_SIZE. The ring
+        is everything outside the subject: above the chin, the frame minus
+        the face bbox expanded for hair and ears; below the chin, the side
+        bands outside the shoulder columns (BACKGROUND_PRECHECK_SHOULDER_WIDTH
+        face widths). Extra people or objects anywhere beside the subject
+        raise the variance and send the frame to segmentation.
+        
+        Returns:
+            Mean LAB channel standard deviation of the ring (same scale as
+            the full uniformity check), or None when there is not exactly
+            one face or too little ring to decide
+        """
+        if context.face_count != 1 or context.face_bbox is None:
+            return None
+        
+        h, w = image.shape[:2]
+        scale = min(1.0, config.BACKGROUND_PRECHECK_SIZE / float(min(h, w)))
+        if scale < 1.0:
+            # Nearest-neighbour subsampling keeps per-pixel variance; area
+            # averaging would smooth fine wall texture below the threshold
+            small = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_NEAREST)
+        else:
+            small = image
+        sh, sw = small.shape[:2]
+        
+        x, y, bw, bh = (v * scale for v in context.face_bbox)
+        chin = min(sh, int(y + bh))
+        ring_mask = np.ones((sh, sw), dtype=bool)
+        margin_x = bw * config.BACKGROUND_PRECHECK_FACE_MARGIN
+        margin_y = bh * config.BACKGROUND_PRECHECK_FACE_MARGIN
+        ring_mask[max(0, int(y - margin_y)):chin, max(0, int(x - margin_x)):min(sw, int(x + bw + margin_x) + 1)] = False
+        # Below the chin the shoulders fill the columns around the face centre
+        shoulder = bw * config.BACKGROUND_PRECHECK_SHOULDER_WIDTH / 2.0
+        center = x + bw / 2.0
+        ring_mask[chin:, max(0, int(center - shoulder)):min(sw, int(center + shoulder) + 1)] = False
+        
+        if np.count_nonzero(ring_mask) < config.BACKGROUND_PRECHECK_MIN_PIXELS:
+            return None
+        
+        ring_lab = cv2.cvtColor(small, cv2.COLOR_BGR2LAB)[ring_mask]
+        return float(ring_lab.std(axis=0).mean())
+    
+    def _segment_image(self, image_rgb: np.ndarray) -> np.ndarray:
         """
         Perform semantic segmentation on the image
         
+        The image is downscaled so its short side is SEGMENTATION_INPUT_SIZE;
+        the model cost no longer grows with the upload resolution.
+        
+        Args:
+            image_rgb: Input image in RGB format
+            
         Returns:
-            Segmentation mask (HxW array with class indices)
+            Segmentation mask (uint8 class indices) at the model input size
         """
         try:
-            # Convert BGR to RGB
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Preprocess
-            input_tensor = self.preprocess(image_rgb)
-            input_batch = input_tensor.unsqueeze(0).to(self.device)
-            
-            # Perform inference
-            with torch.no_grad():
-                output = self.model(input_batch)['out'][0]
-            
-            # Get class predictions
-            output_predictions = output.argmax(0).cpu().numpy()
-            
-            return output_predictions
-            
+            return self.engine.segment(self._resize_for_segmentation(image_rgb))
         except Exception as e:
             return None
     
-    def _count_persons(self, segmentation_mask: np.ndarray) -> tuple:
+    @staticmethod
+    def _resize_for_segmentation(image: np.ndarray) -> np.ndarray:
+        """Downscale (never upscale) so the short side is SEGMENTATION_INPUT_SIZE"""
+        size = config.SEGMENTATION_INPUT_SIZE
+        h, w = image.shape[:2]
+        if not size or min(h, w) <= size:
+            return image
+        scale = size / float(min(h, w))
+        target = (max(1, round(w * scale)), max(1, round(h * scale)))
+        return cv2.resize(image, target, interpolation=cv2.INTER_AREA)
+    
+    def _mask_statistics(self, segmentation_mask: np.ndarray) -> dict:
         """
-        Count number of distinct person regions in segmentation mask
+        Single-pass statistics of the class mask shared by the background checks
         
         Returns:
-            Tuple of (person_count, extra_person_ratio)
+            Dictionary with 'class_counts' (pixels per class index) and
+            'person_areas' (pixel area of every connected person region)
         """
-        # Create binary mask for person class
+        class_counts = np.bincount(segmentation_mask.ravel(), minlength=self.PERSON_CLASS + 1)
+        
         person_mask = (segmentation_mask == self.PERSON_CLASS).astype(np.uint8)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(person_mask, connectivity=8)
         
-        # Find connected components
-        num_labels, labels = cv2.connectedComponents(person_mask)
+        return {
+            'class_counts': class_counts,
+            'person_areas': stats[1:, cv2.CC_STAT_AREA],  # label 0 is the non-person area
+        }
+    
+    def _count_persons(self, mask_stats: dict, total_pixels: int, mask_scale: float = 1.0) -> tuple:
+        """
+        Count number of distinct person regions in segmentation mask
         
-        # Subtract 1 for background label
-        # Also filter out very small regions (noise)
-        min_area = config.MIN_PERSON_SEGMENT_AREA  # minimum pixels for a valid person region
-        areas = []
+        Args:
+            mask_stats: Output of _mask_statistics
+            total_pixels: Number of mask pixels
+            mask_scale: Mask pixels per full-resolution image pixel
         
-        for label in range(1, num_labels):
-            area = np.sum(labels == label)
-            if area > min_area:
-                areas.append(area)
+        Returns:
+            Tuple of (person_count, extra_person_ratio)
+        """
+        # Filter out very small regions (noise)
+        min_area = config.MIN_PERSON_SEGMENT_AREA * mask_scale  # minimum mask pixels for a valid person region
+        areas = np.sort(mask_stats['person_areas'][mask_stats['person_areas'] > min_area])[::-1]
         
-        if not areas:
+        if areas.size == 0:
             return 0, 0.0
         
-        areas.sort(reverse=True)
-        extra_area = sum(areas[1:]) if len(areas) > 1 else 0.0
-        total_pixels = segmentation_mask.size
+        extra_area = float(areas[1:].sum())
         extra_ratio = extra_area / total_pixels if total_pixels else 0.0
         
-        return len(areas), extra_ratio
+        return int(areas.size), extra_ratio
     
-    def _check_background_uniformity(self, image: np.ndarray, segmentation_mask: np.ndarray, result: ValidationResult) -> float:
+    def _check_background_uniformity(self, image: np.ndarray, segmentation_mask: np.ndarray, result: ValidationResult) -> tuple:
         """
         Check if background is uniform by analyzing color variance
         
+        The variance is estimated on a strided sample of at most
+        BACKGROUND_UNIFORMITY_SAMPLES pixels, so the cost does not grow with
+        the image size. Only when the confidence interval of the estimate
+        contains BACKGROUND_UNIFORMITY_THRESHOLD is it recomputed exactly
+        over every background pixel.
+        
         Returns:
-            Background variance score
+            Tuple of (background variance score, (low, high) confidence
+            interval of a sampled estimate or None, method: 'sampled',
+            'exact', 'insufficient' or 'failed')
         """
         try:
             # Create background mask (exclude person)
             background_mask = (segmentation_mask != self.PERSON_CLASS).astype(np.uint8)
+            threshold = config.BACKGROUND_UNIFORMITY_THRESHOLD
             
-            # Get background pixels
-            background_pixels = image[background_mask == 1]
-            
-            if len(background_pixels) < 100:
-                # Not enough background pixels
-                return 0.0
-            
-            # Convert to LAB color space for better color uniformity assessment
-            background_bgr = background_pixels.reshape(-1, 1, 3)
-            background_lab = cv2.cvtColor(background_bgr, cv2.COLOR_BGR2LAB)
-            background_lab = background_lab.reshape(-1, 3)
-            
-            # Calculate standard deviation for each channel
-            std_l = np.std(background_lab[:, 0])
-            std_a = np.std(background_lab[:, 1])
-            std_b = np.std(background_lab[:, 2])
+            interval = None
+            method = 'sampled'
+            estimate = self._sample_background_variance(image, background_mask)
+            if estimate is not None:
+                variance, half_width = estimate
+                interval = [max(0.0, variance - half_width), variance + half_width]
+            if estimate is None or interval[0] <= threshold <= interval[1]:
+                # Too few samples, or too close to call
+                variance = self._exact_background_variance(image, background_mask)
+                interval = None
+                method = 'exact'
+                if variance is None:
+                    # Not enough background pixels
+                    return 0.0, None, 'insufficient'
             
-            # Average variance
-            variance = (std_l + std_a + std_b) / 3
-            
-            if variance > config.BACKGROUND_UNIFORMITY_THRESHOLD:
+            if variance > threshold:
                 result.add_error(
                     ErrorCode.BACKGROUND_NOT_UNIFORM,
                     f"Background is not uniform (variance: {variance:.1f})"
                 )
             
-            return variance
+            return variance, interval, method
             
         except Exception as e:
-            return 0.0
+            return 0.0, None, 'failed'
+    
+    @staticmethod
+    def _sample_background_variance(image: np.ndarray, background_mask: np.ndarray) -> Optional[tuple]:
+        """
+        Background variance estimated on a strided grid of pixels
+        
+        Image and mask are sampled on the same grid (nearest neighbour, which
+        keeps per-pixel variance). The standard error of each LAB channel
+        standard deviation comes from the sample's second and fourth central
+        moments (delta method), so heavy-tailed backgrounds get wider
+        intervals than Gaussian ones.
+        
+        Returns:
+            Tuple of (mean LAB channel std, confidence half-width), or None
+            if fewer than 100 background pixels were sampled
+        """
+        h, w = background_mask.shape
+        stride = max(1, int(np.ceil(np.sqrt(h * w / float(config.BACKGROUND_UNIFORMITY_SAMPLES)))))
+        grid = (max(1, w // stride), max(1, h // stride))
+        image_grid = cv2.resize(image, grid, interpolation=cv2.INTER_NEAREST)
+        mask_grid = cv2.resize(background_mask, grid, interpolation=cv2.INTER_NEAREST)
+        
+        samples = cv2.cvtColor(image_grid, cv2.COLOR_BGR2LAB)[mask_grid == 1].astype(np.float64)
+        n = len(samples)
+        if n < 100:
+            return None
+        
+        centered = samples - samples.mean(axis=0)
+        m2 = (centered ** 2).mean(axis=0)
+        m4 = (centered ** 4).mean(axis=0)
+        std = np.sqrt(m2)
+        # Var(s) ~= Var(s^2) / (4 s^2) with Var(s^2) ~= (m4 - m2^2) / n
+        std_error = np.sqrt(np.maximum(m4 - m2 ** 2, 0.0) / (4.0 * n * np.maximum(m2, 1e-12)))
+        return float(std.mean()), float(config.BACKGROUND_UNIFORMITY_CONFIDENCE_Z * std_error.mean())
+    
+    @staticmethod
+    def _exact_background_variance(image: np.ndarray, background_mask: np.ndarray) -> Optional[float]:
+        """
+        Background variance over every full-resolution background pixel
+        
+        Single masked pass (cv2.meanStdDev) over the LAB image; background
+        pixels are not gathered into a copy.
+        
+        Returns:
+            Mean LAB channel std, or None with fewer than 100 background pixels
+        """
+        # Nearest-neighbour upsampled to the image so every pixel counts
+        if background_mask.shape != image.shape[:2]:
+            background_mask = cv2.resize(
+                background_mask, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST
+            )
+        if cv2.countNonZero(background_mask) < 100:
+            return None
+        
+        # Convert to LAB color space for better color uniformity assessment
+        image_lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        _, std = cv2.meanStdDev(image_lab, mask=background_mask)
+        
+        # Average of the per-channel standard deviations
+        return float(std.mean())
     
-    def _check_extraneous_objects(self, segmentation_mask: np.ndarray, result: ValidationResult) -> float:
+    def _check_extraneous_objects(self, mask_stats: dict, total_pixels: int, result: ValidationResult) -> float:
         """
         Check for extraneous objects in the background
         
@@ -204,25 +372,15 @@ class BackgroundValidator(BaseValidator):
             Score indicating presence of extraneous objects
         """
         try:
-            # Get unique classes excluding background (0) and person (15)
-            unique_classes = np.unique(segmentation_mask)
-            
             # Classes to exclude: 0 (background), 15 (person)
             # Also exclude common background classes that are acceptable
-            acceptable_classes = {0, 15}  # background and person
-            
-            extraneous_classes = [c for c in unique_classes if c not in acceptable_classes]
+            class_counts = mask_stats['class_counts']
+            acceptable_pixels = class_counts[0] + class_counts[self.PERSON_CLASS]
+            extraneous_pixels = int(class_counts.sum() - acceptable_pixels)
             
-            if not extraneous_classes:
+            if extraneous_pixels == 0 or not total_pixels:
                 return 0.0
             
-            # Calculate total area of extraneous objects
-            total_pixels = segmentation_mask.size
-            extraneous_pixels = 0
-            
-            for cls in extraneous_classes:
-                extraneous_pixels += np.sum(segmentation_mask == cls)
-            
             extraneous_ratio = extraneous_pixels / total_pixels
             
             # If extraneous objects occupy more than 5% of image, flag it
@@ -240,10 +398,8 @@ class BackgroundValidator(BaseValidator):
     def __del__(self):
         """Clean up resources"""
         try:
-            if hasattr(self, 'model'):
-                del self.model
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            if hasattr(self, 'engine'):
+                self.engine.close()
         except Exception:
             # Avoid noisy destructor errors during interpreter shutdown
             pass
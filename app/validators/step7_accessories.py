@@ -15,6 +15,7 @@ import torch
 from transformers import AutoModel, AutoTokenizer
 
 from app.validators.base import BaseValidator
+from app.core.context import FrameContext
 from app.core.errors import ValidationResult, ErrorCode
 from app.core import settings
 from app.utils.image_utils import crop_face_region
@@ -47,6 +48,8 @@ class AccessoriesValidator(BaseValidator):
         self._model = None
         self._tokenizer = None
         self._model_lock = threading.Lock()
+        # Serializes generation: auto-capture runs the VLM from a worker thread
+        self._inference_lock = threading.Lock()
         self._inference_device = "cpu"
         self._load_failed = False
 
@@ -63,7 +66,7 @@ class AccessoriesValidator(BaseValidator):
             "If unsure, err on the side of marking accessories_detected=true."
         )
 
-    def validate(self, image: np.ndarray, context: Dict[str, Any] = None) -> ValidationResult:
+    def validate(self, image: np.ndarray, context: Optional[FrameContext] = None) -> ValidationResult:
         """
         Detect accessories and filters in the provided image.
 
@@ -75,7 +78,7 @@ class AccessoriesValidator(BaseValidator):
             ValidationResult
         """
         result = self._create_result()
-        context = context or {}
+        context = self._ensure_context(image, context)
 
         if not self.enabled:
             result.metadata = {
@@ -117,17 +120,17 @@ class AccessoriesValidator(BaseValidator):
 
         return result
 
-    def _detect_with_vlm(self, image: np.ndarray, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _detect_with_vlm(self, image: np.ndarray, context: FrameContext) -> Dict[str, Any]:
         """Run MiniCPM-o on the (optionally cropped) image and parse its response."""
         self._ensure_model_loaded()
 
-        face_bbox = context.get("face_bbox")
+        face_bbox = context.face_bbox
         prepared_image = self._prepare_image(image, face_bbox)
 
         msgs = [{"role": "user", "content": [prepared_image, self._prompt]}]
 
         start = time.perf_counter()
-        with torch.no_grad():
+        with self._inference_lock, torch.no_grad():
             response = self._model.chat(msgs=msgs, tokenizer=self._tokenizer)
         latency_ms = round((time.perf_counter() - start) * 1000, 2)
 
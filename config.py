@@ -31,6 +31,9 @@ EXPECTED_FACE_COUNT = 1
 MAX_YAW = 15.0  # left/right turn
 MAX_PITCH = 10.0  # up/down tilt
 MAX_ROLL = 20.0  # head tilt
+POSE_ENGINE = "pnp"  # "pnp" (solvePnP on six landmarks) or "rigid" (closed-form alignment of landmarks_3d)
+POSE_CANONICAL_FACE_PATH = None  # .npy canonical face for "rigid" (tools/build_canonical_face.py); None = six-point model
+LITE_POSE_THRESHOLD_MARGIN = 5.0  # lite (keypoint) pose within this of a threshold escalates to Face Mesh
 
 # Face geometry thresholds
 MIN_FACE_AREA_RATIO = 0.15  # allow smaller crops in synthetic passports
@@ -40,14 +43,29 @@ HAIR_OCCLUSION_THRESHOLD = 0.3  # edge density around jawline
 
 # Background thresholds
 BACKGROUND_UNIFORMITY_THRESHOLD = 10.0  # color variance threshold
+BACKGROUND_UNIFORMITY_SAMPLES = 40000  # grid pixels (person included) sampled for the uniformity estimate
+BACKGROUND_UNIFORMITY_CONFIDENCE_Z = 3.0  # confidence interval half-width in standard errors; exact check inside it
 MIN_BACKGROUND_RATIO = 0.3  # minimum background portion
-MIN_PERSON_SEGMENT_AREA = 15000  # minimum pixels to count an extra person
+MIN_PERSON_SEGMENT_AREA = 15000  # minimum pixels (at full image resolution) to count an extra person
+SEGMENTATION_INPUT_SIZE = 520  # short side of the DeepLab input in pixels (None = full resolution)
+SEGMENTATION_MAX_BATCH = 1  # concurrent full validations batched into one forward pass (1 = no batching; try 4-8 on GPU/multi-core nodes)
+SEGMENTATION_BATCH_WAIT_MS = 5.0  # how long a segmentation request waits for others to join its batch
 EXTRA_PERSON_MIN_RATIO = 0.1  # extra person pixels vs full frame to trigger error
 
+# Border-ring pre-check: a plain wall around a single face skips segmentation
+BACKGROUND_PRECHECK = True
+BACKGROUND_PRECHECK_SIZE = 256  # short side of the downscaled frame the ring is measured on
+BACKGROUND_PRECHECK_FACE_MARGIN = 0.5  # face bbox expansion keeping hair and ears out of the ring
+BACKGROUND_PRECHECK_SHOULDER_WIDTH = 3.0  # width of the column below the chin left to the shoulders (face widths)
+BACKGROUND_PRECHECK_MARGIN = 0.5  # skip only below this fraction of BACKGROUND_UNIFORMITY_THRESHOLD
+BACKGROUND_PRECHECK_MIN_PIXELS = 2000  # ring pixels needed for a confident decision
+
 # MediaPipe configuration
 MEDIAPIPE_MAX_NUM_FACES = 2  # detect up to 2 faces to check for extras
 MEDIAPIPE_MIN_DETECTION_CONFIDENCE = 0.7
 MEDIAPIPE_MIN_TRACKING_CONFIDENCE = 0.5
+FACE_MESH_USE_ROI = True  # run Face Mesh on a crop around the detected face
+FACE_MESH_ROI_MARGIN = 0.5  # crop margin around the face bbox (fraction of bbox size)
 
 # Model paths (will be downloaded automatically)
 DEEPLAB_MODEL = "deeplabv3_mobilenet_v3_large"
@@ -56,6 +74,73 @@ DEEPLAB_MODEL = "deeplabv3_mobilenet_v3_large"
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB max upload
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 
+# Stream sessions (per-client state between consecutive frames)
+STREAM_SESSION_IDLE_TIMEOUT = 30.0  # seconds before an idle session is evicted
+STREAM_MAX_SESSIONS = 64  # least recently used sessions are dropped beyond this (each may hold a tracking graph)
+STREAM_FACE_TRACKING = True  # follow the face with video-mode Face Mesh within a session
+STREAM_SESSION_TOKENS = True  # return a signed token so any node can resume the session state (needs SESSION_TOKEN_SECRET)
+STREAM_TRACKING_REDETECT_INTERVAL = 30  # force full face detection at least every N tracked frames
+STREAM_TRACKING_MAX_AREA_CHANGE = 1.5  # larger frame-to-frame face area change counts as lost tracking
+STREAM_TRACKING_FACE_COUNT_INTERVAL = 5  # count faces with the detector every N tracked frames
+STREAM_POSE_EXTRINSIC_GUESS = True  # seed solvePnP with the previous frame's pose in a session
+STREAM_POSE_SMOOTHING = 0.5  # EMA weight of the newest pose angles (1.0 = no smoothing)
+STREAM_POSE_RESET_DEGREES = 20.0  # angle jumps beyond this restart smoothing instead of lagging
+STREAM_POSE_ENGINE = "mesh"  # "mesh" (Face Mesh + PnP) or "lite" (detector keypoints, mesh only near thresholds)
+STREAM_LITE_MESH_INTERVAL = 10  # lite sessions still run Face Mesh every N frames so hair occlusion gets checked
+
+# Stream guidance filtering and latency-compensated prediction
+STREAM_GUIDANCE_PREDICTION = True  # Kalman-filter guidance per session and predict it at render time
+STREAM_GUIDANCE_NOISE = {  # signal: (acceleration std per s², measurement std)
+    'yaw': (90.0, 1.5),
+    'pitch': (90.0, 1.5),
+    'roll': (90.0, 1.0),
+    'offset_x': (0.5, 0.005),
+    'offset_y': (0.5, 0.005),
+    'face_size_ratio': (0.3, 0.005),
+}
+STREAM_GUIDANCE_MAX_GAP = 1.0  # seconds without a face before the filter restarts
+STREAM_GUIDANCE_DEFAULT_RTT_MS = 150.0  # assumed round trip when the client does not report one
+STREAM_GUIDANCE_MAX_HORIZON_MS = 500.0  # never extrapolate further than this
+
+# Stream frame-difference gating
+STREAM_REUSE_RESULTS = True  # answer near-identical session frames from the previous result
+STREAM_REUSE_SIGNATURE_SIZE = 32  # side of the luma thumbnail compared between frames
+STREAM_REUSE_THRESHOLD = 2.0  # mean absolute luma difference (0-255) below which a frame is reused
+STREAM_REUSE_MAX_CONSECUTIVE = 10  # fully process at least every N+1 frames even when still
+
+# Stream ROI processing: analyse only a crop around the session's last face
+STREAM_ROI_PROCESSING = True
+STREAM_ROI_MARGIN = 0.6  # expand the last face bbox by this fraction of its larger side on every side
+STREAM_ROI_MAX_AREA_FRACTION = 0.5  # analyse the full frame if the crop would cover more than this
+STREAM_ROI_MIN_CONFIDENCE = 0.8  # weaker detections inside the crop are re-checked on the full frame
+STREAM_ROI_EDGE_MARGIN = 4  # pixels; faces closer to a crop edge may extend past it
+
+# Stream background preview: asynchronous background checks of session frames,
+# latest verdict in guidance (engine settings.SEGMENTATION_STREAM_ENGINE,
+# MediaPipe selfie segmentation by default)
+STREAM_BACKGROUND_PREVIEW = True
+STREAM_BACKGROUND_INTERVAL = 15  # session frames between background checks
+STREAM_BACKGROUND_SIGNATURE_CHANGE = 12.0  # mean luma difference (0-255) vs the last checked frame that triggers a check early
+STREAM_BACKGROUND_MAX_SIDE = 480  # long side of the low-resolution copy that is checked
+STREAM_BACKGROUND_WORKERS = 1  # threads running the checks
+
+# Auto-capture: full validation of the best frame once a stream session is stable
+AUTO_CAPTURE = True
+AUTO_CAPTURE_MIN_PASSING_FRAMES = 5  # consecutive passing frames needed for full stability
+AUTO_CAPTURE_THRESHOLD = 0.7  # stability score (streak x sharpness/frontality, 0-1) that starts a capture
+AUTO_CAPTURE_WORKERS = 1  # background threads running captured frames through the full pipeline (per process)
+AUTO_CAPTURE_MAX_PENDING = 4  # queued + running captures per process; stable sessions wait while full
+AUTO_CAPTURE_PLAN = ('format', 'quality', 'face', 'pose', 'geometry', 'background')  # add 'accessories' for the MiniCPM-o check
+
+# Burst validation: pick the best of several frames before the heavy models
+BURST_MIN_FRAMES = 3
+BURST_MAX_FRAMES = 10
+BURST_WORKERS = 4  # threads running the stream-tier checks over the frames
+
+# Stream landmark wire formats
+LANDMARK_INT16_SCALE = 4  # quantization steps per pixel (quarter-pixel precision)
+LANDMARK_DELTA_KEYFRAME_INTERVAL = 30  # send absolute coordinates at least every N frames
+
 # Processing modes
 MODE_FULL = "full"  # Complete validation
 MODE_STREAM = "stream"  # Fast validation for real-time (skips heavy models)
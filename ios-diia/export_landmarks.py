@@ -304,7 +304,7 @@ def export_landmarks_for_image(
         print(f"[fail] Unable to read {image_path}: {exc}", file=sys.stderr)
         return False, export_path, None
 
-    result = pipeline.validate(data, is_base64=False)
+    result = pipeline.validate(data, is_base64=False, include_landmarks=True)
     metadata = result.get("metadata", {})
     face_meta = metadata.get("face") or {}
     landmarks = face_meta.get("landmarks")
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import logging
+import config
 from app.core import settings
 
 from app.api.routes import router
@@ -60,6 +61,8 @@ async def startup_event():
     logger.info("Starting Photo Validation API...")
     logger.info(f"Version: {__version__}")
     logger.info("API documentation available at /docs")
+    if config.STREAM_SESSION_TOKENS and not settings.SESSION_TOKEN_SECRET:
+        logger.warning("SESSION_TOKEN_SECRET is not set; stream session tokens are disabled")
 
 
 @app.on_event("shutdown")
@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the background mask statistics.
+
+Compares the previous per-label implementation (one full-mask pass per
+connected person component and per extraneous class) with the single-pass
+statistics of BackgroundValidator (connectedComponentsWithStats + bincount)
+on synthetic class masks with a growing number of small noisy components.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Tuple
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config  # noqa: E402
+from app.core.errors import ValidationResult  # noqa: E402
+from app.validators.step6_background import BackgroundValidator  # noqa: E402
+
+PERSON_CLASS = 15
+
+
+def per_label_stats(mask: np.ndarray) -> Tuple[int, float, float]:
+    """Previous implementation: a full-mask comparison per label and per class."""
+    person_mask = (mask == PERSON_CLASS).astype(np.uint8)
+    num_labels, labels = cv2.connectedComponents(person_mask)
+    areas = []
+    for label in range(1, num_labels):
+        area = np.sum(labels == label)
+        if area > config.MIN_PERSON_SEGMENT_AREA:
+            areas.append(area)
+    areas.sort(reverse=True)
+    extra_ratio = sum(areas[1:]) / mask.size if len(areas) > 1 else 0.0
+
+    extraneous = [c for c in np.unique(mask) if c not in (0, PERSON_CLASS)]
+    extraneous_pixels = sum(np.sum(mask == c) for c in extraneous)
+    return len(areas), extra_ratio, extraneous_pixels / mask.size
+
+
+def single_pass_stats(validator: BackgroundValidator) -> Callable[[np.ndarray], Tuple[int, float, float]]:
+    def run(mask: np.ndarray) -> Tuple[int, float, float]:
+        stats = validator._mask_statistics(mask)
+        count, extra_ratio = validator._count_persons(stats, mask.size)
+        object_ratio = validator._check_extraneous_objects(stats, mask.size, ValidationResult())
+        return count, extra_ratio, object_ratio
+    return run
+
+
+def make_mask(height: int, width: int, noise: float, seed: int = 0) -> np.ndarray:
+    """Two large person blobs, an object and salt noise of person/object labels."""
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.ellipse(mask, (width // 2, height // 2), (width // 4, height // 3), 0, 0, 360, PERSON_CLASS, -1)
+    cv2.circle(mask, (width // 8, height // 5), min(height, width) // 8, PERSON_CLASS, -1)
+    cv2.rectangle(mask, (width * 7 // 8, 0), (width - 1, height // 4), 9, -1)
+    noisy = rng.random((height, width)) < noise
+    mask[noisy] = rng.choice(np.array([PERSON_CLASS, 5, 20], dtype=np.uint8), size=int(noisy.sum()))
+    return mask
+
+
+def time_fn(fn: Callable[[np.ndarray], Tuple], mask: np.ndarray, repeat: int) -> float:
+    fn(mask)
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn(mask)
+        timings.append(perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, nargs=2, default=(693, 520), metavar=("H", "W"),
+                        help="Mask size (default: DeepLab output at SEGMENTATION_INPUT_SIZE)")
+    parser.add_argument("--noise", type=float, nargs="+", default=(0.0, 0.001, 0.01, 0.05))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Only the mask statistics are benchmarked; skip loading the model
+    validator = BackgroundValidator.__new__(BackgroundValidator)
+    validator.PERSON_CLASS = PERSON_CLASS
+    fast = single_pass_stats(validator)
+
+    height, width = args.size
+    print(f"Mask {height}x{width}")
+    print(f"{'noise':>8s} {'components':>11s} {'per-label ms':>13s} {'single-pass ms':>15s} {'speedup':>8s}")
+    for noise in args.noise:
+        mask = make_mask(height, width, noise)
+        components = cv2.connectedComponents((mask == PERSON_CLASS).astype(np.uint8))[0] - 1
+        reference = per_label_stats(mask)
+        result = fast(mask)
+        if reference[0] != result[0] or not np.allclose(reference[1:], result[1:]):
+            raise SystemExit(f"Mismatch at noise {noise}: {reference} vs {result}")
+        slow_ms = time_fn(per_label_stats, mask, args.repeat)
+        fast_ms = time_fn(fast, mask, args.repeat)
+        print(f"{noise:8.3f} {components:11d} {slow_ms:13.1f} {fast_ms:15.2f} {slow_ms / fast_ms:7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Accuracy and cost of the sampled background uniformity estimate.
+
+Compares the previous implementation (boolean-index every full-resolution
+background pixel, convert the copy to LAB, three np.std passes) with
+BackgroundValidator's sampled estimate and its exact fallback. Synthetic
+frames have a person ellipse on walls of increasing texture; the mask is
+built at SEGMENTATION_INPUT_SIZE like the model's. Reports the variance of
+both methods, the confidence interval, which path decided and the verdict
+agreement at BACKGROUND_UNIFORMITY_THRESHOLD.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config  # noqa: E402
+from app.core.errors import ValidationResult  # noqa: E402
+from app.segmentation.base import PERSON_CLASS  # noqa: E402
+from app.validators.step6_background import BackgroundValidator  # noqa: E402
+
+
+def boolean_index_variance(image: np.ndarray, segmentation_mask: np.ndarray) -> float:
+    """Previous implementation: copy every background pixel, then three std passes."""
+    background_mask = (segmentation_mask != PERSON_CLASS).astype(np.uint8)
+    background_mask = cv2.resize(background_mask, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+    pixels = image[background_mask == 1]
+    lab = cv2.cvtColor(pixels.reshape(-1, 1, 3), cv2.COLOR_BGR2LAB).reshape(-1, 3)
+    return float((np.std(lab[:, 0]) + np.std(lab[:, 1]) + np.std(lab[:, 2])) / 3)
+
+
+def make_frame(height: int, width: int, texture: float, seed: int = 0):
+    """Wall with Gaussian texture and a gradient, a person ellipse, and the matching class mask."""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, texture, width, dtype=np.float32)[None, :, None]
+    wall = np.float32((190, 200, 210)) + ramp + rng.normal(0, texture, (height, width, 3)).astype(np.float32)
+    image = np.clip(wall, 0, 255).astype(np.uint8)
+    center, axes = (width // 2, height * 3 // 5), (width // 4, height // 2)
+    cv2.ellipse(image, center, axes, 0, 0, 360, (60, 80, 120), -1)
+
+    scale = config.SEGMENTATION_INPUT_SIZE / float(min(height, width))
+    mh, mw = round(height * scale), round(width * scale)
+    mask = np.zeros((mh, mw), dtype=np.uint8)
+    cv2.ellipse(mask, (round(center[0] * scale), round(center[1] * scale)),
+                (round(axes[0] * scale), round(axes[1] * scale)), 0, 0, 360, PERSON_CLASS, -1)
+    return image, mask
+
+
+def time_fn(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        timings.append(perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, nargs=2, default=(4000, 3000), metavar=("H", "W"))
+    parser.add_argument("--texture", type=float, nargs="+", default=(1.0, 4.0, 8.0, 10.0, 11.0, 14.0, 25.0))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Only the uniformity check is benchmarked; skip loading the model
+    validator = BackgroundValidator.__new__(BackgroundValidator)
+    validator.PERSON_CLASS = PERSON_CLASS
+    threshold = config.BACKGROUND_UNIFORMITY_THRESHOLD
+
+    print(f"Image {args.size[0]}x{args.size[1]}, threshold {threshold}")
+    print(f"{'texture':>8s} {'exact':>8s} {'estimate':>9s} {'interval':>17s} {'method':>8s} "
+          f"{'old ms':>8s} {'new ms':>8s} {'verdict':>8s}")
+    for texture in args.texture:
+        image, mask = make_frame(*args.size, texture)
+        reference = boolean_index_variance(image, mask)
+        variance, interval, method = validator._check_background_uniformity(image, mask, ValidationResult())
+        old_ms = time_fn(lambda: boolean_index_variance(image, mask), args.repeat)
+        new_ms = time_fn(lambda: validator._check_background_uniformity(image, mask, ValidationResult()), args.repeat)
+        agrees = (reference > threshold) == (variance > threshold)
+        interval_text = f"[{interval[0]:6.2f}, {interval[1]:6.2f}]" if interval else "-"
+        print(f"{texture:8.1f} {reference:8.2f} {variance:9.2f} {interval_text:>17s} {method:>8s} "
+              f"{old_ms:8.1f} {new_ms:8.1f} {'same' if agrees else 'DIFFERS':>8s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare the PnP and rigid (Kabsch/Umeyama) head pose engines.
+
+Landmarks are extracted once per image; the benchmark then times PnP per
+frame, the rigid engine per frame, and the rigid engine on the whole batch,
+and reports the yaw/pitch/roll agreement between the two engines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.context import FrameContext  # noqa: E402
+from app.validators.step3_face import FaceDetectionValidator  # noqa: E402
+from app.validators.step4_pose import PoseEstimationValidator  # noqa: E402
+from app.utils.pose_utils import RigidPoseEngine  # noqa: E402
+
+
+def extract_landmarks(root: Path, limit: int) -> List[Tuple[np.ndarray, np.ndarray, Tuple[int, int]]]:
+    """Run face detection once per image and keep (landmarks, landmarks_3d, size)."""
+    validator = FaceDetectionValidator()
+    samples = []
+    paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    for path in paths[:limit]:
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        context = FrameContext(image=image)
+        validator.validate(image, context)
+        if context.landmarks_3d is not None:
+            samples.append((context.landmarks, context.landmarks_3d, image.shape[:2]))
+    if not samples:
+        raise SystemExit("No faces found; check the image directory.")
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", type=Path, help="Directory of face images")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--canonical", type=Path, default=None, help="Canonical face .npy (default: six-point model)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    samples = extract_landmarks(args.images, args.limit)
+    pose_validator = PoseEstimationValidator()
+    engine = RigidPoseEngine(template=np.load(args.canonical)) if args.canonical else RigidPoseEngine()
+
+    def run_pnp() -> np.ndarray:
+        angles = []
+        for landmarks, _, (h, w) in samples:
+            pose = pose_validator._solve_pose(pose_validator.model_points, pose_validator._get_image_points(landmarks), w, h)
+            angles.append(pose[:3] if pose is not None else (np.nan, np.nan, np.nan))
+        return np.array(angles)
+
+    def run_rigid_single() -> np.ndarray:
+        return np.array([engine.estimate(landmarks_3d)[:3] for _, landmarks_3d, _ in samples])
+
+    batch = np.stack([landmarks_3d for _, landmarks_3d, _ in samples])
+
+    def run_rigid_batch() -> np.ndarray:
+        return engine.estimate_batch(batch)[0]
+
+    print(f"Samples: {len(samples)}")
+    results = {}
+    for name, fn in (("pnp", run_pnp), ("rigid", run_rigid_single), ("rigid-batch", run_rigid_batch)):
+        fn()
+        timings = []
+        for _ in range(args.repeat):
+            start = perf_counter()
+            results[name] = fn()
+            timings.append(perf_counter() - start)
+        per_frame_us = statistics.median(timings) / len(samples) * 1e6
+        print(f"{name:12s} {per_frame_us:8.1f} us/frame (median of {args.repeat})")
+
+    diff = np.abs(results["rigid-batch"] - results["pnp"])
+    print("\nAgreement rigid vs pnp (degrees):")
+    for column, axis in enumerate(("yaw", "pitch", "roll")):
+        values = diff[:, column][~np.isnan(diff[:, column])]
+        print(
+            f"  {axis:5s} mean={values.mean():.2f} median={np.median(values):.2f} "
+            f"p95={np.percentile(values, 95):.2f} max={values.max():.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
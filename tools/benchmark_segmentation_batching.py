@@ -0,0 +1,91 @@
+"""
+Throughput of the segmentation micro-batching worker under concurrent load.
+
+Runs --clients threads that each segment images back to back (like
+concurrent full validations) through BatchingSegmentationEngine for every
+--max-batch value, and reports images per second, mean batch size and mean
+queue wait. max-batch 1 is the unbatched baseline. Batching pays off when the
+device has spare parallelism (GPU, many cores); on a saturated single core it
+only adds latency, so measure on the instance type you deploy to.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.metrics import get_metrics  # noqa: E402
+from app.segmentation.batching import BatchingSegmentationEngine  # noqa: E402
+
+
+def build_engine(name: str, random_weights: bool, onnx_path: str | None):
+    if name == "onnxruntime":
+        from app.core import settings
+        from app.segmentation.onnx_engines import OnnxRuntimeEngine
+        return OnnxRuntimeEngine(onnx_path or settings.SEGMENTATION_ONNX_PATH)
+
+    import torch
+    from app.segmentation.torch_engines import TorchEagerEngine, TorchScriptEngine
+
+    torch.manual_seed(0)
+    if name == "eager":
+        return TorchEagerEngine(pretrained=not random_weights)
+    if name == "torchscript":
+        return TorchScriptEngine(cache_dir=None, pretrained=not random_weights)
+    raise SystemExit(f"Unknown engine: {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engine", default="torchscript", choices=("eager", "torchscript", "onnxruntime"))
+    parser.add_argument("--onnx", default=None, help="ONNX model for --engine onnxruntime")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=(1, 4, 8))
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--size", type=int, nargs=2, default=(693, 520), metavar=("H", "W"))
+    parser.add_argument("--random-weights", action="store_true", help="Skip the weight download (timing only)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (*args.size, 3), dtype=np.uint8)
+    inner = build_engine(args.engine, args.random_weights, args.onnx)
+    inner.segment_batch([image] * max(args.max_batch))  # warm up every batch shape once
+
+    for max_batch in args.max_batch:
+        metrics = get_metrics()
+        metrics.reset()
+        engine = BatchingSegmentationEngine(inner, max_batch=max_batch, max_wait_ms=args.wait_ms)
+
+        def client() -> None:
+            for _ in range(args.requests):
+                engine.segment(image)
+
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+
+        observed = metrics.snapshot()['observations']
+        print(
+            f"max_batch={max_batch:2d}  {args.clients * args.requests / elapsed:6.2f} img/s  "
+            f"mean batch={observed['segmentation_batch_size']['mean']:4.1f}  "
+            f"mean wait={observed['segmentation_queue_wait_ms']['mean']:7.1f} ms"
+        )
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
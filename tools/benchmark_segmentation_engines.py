@@ -0,0 +1,106 @@
+"""
+Benchmark segmentation engines against the eager PyTorch reference.
+
+Each engine segments the same images (resized like BackgroundValidator does)
+and reports the median latency and the pixel agreement of its masks with the
+eager fp32 engine. Run it on the instance type you deploy to and pick the
+fastest engine whose agreement is acceptable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.validators.step6_background import BackgroundValidator  # noqa: E402
+
+
+def load_images(root: Path | None, limit: int) -> List[np.ndarray]:
+    """RGB images resized to the segmentation input size (noise images without a directory)."""
+    if root is None:
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 256, (4000, 3000, 3), dtype=np.uint8) for _ in range(min(limit, 4))]
+    else:
+        paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))[:limit]
+        images = [cv2.imread(str(path)) for path in paths]
+        images = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images if image is not None]
+    if not images:
+        raise SystemExit("No images found; check the image directory.")
+    return [BackgroundValidator._resize_for_segmentation(image) for image in images]
+
+
+def build_engine(name: str, precision: str, random_weights: bool):
+    import torch
+    from app.segmentation.torch_engines import TorchEagerEngine, TorchScriptEngine
+
+    # Identical initialization so random-weight engines stay comparable
+    torch.manual_seed(0)
+    if name == "eager":
+        return TorchEagerEngine(pretrained=not random_weights)
+    if name == "torchscript":
+        return TorchScriptEngine(precision=precision, cache_dir=None, pretrained=not random_weights)
+    raise SystemExit(f"Unknown engine: {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", type=Path, nargs="?", default=None, help="Directory of photos (default: noise)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--engines", nargs="+", default=["eager", "torchscript"])
+    parser.add_argument("--precision", default="fp32", choices=("fp32", "fp16", "bf16"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--random-weights", action="store_true", help="Skip the weight download (timing only)")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    images = load_images(args.images, args.limit)
+    print(f"Images: {len(images)} at {images[0].shape[1]}x{images[0].shape[0]}")
+
+    reference = build_engine("eager", "fp32", args.random_weights)
+    reference_masks = [reference.segment(image) for image in images]
+
+    results: Dict[str, float] = {}
+    for name in args.engines:
+        start = perf_counter()
+        engine = reference if name == "eager" else build_engine(name, args.precision, args.random_weights)
+        setup_s = perf_counter() - start
+        engine.segment(images[0])
+
+        timings = []
+        for _ in range(args.repeat):
+            for image in images:
+                start = perf_counter()
+                engine.segment(image)
+                timings.append(perf_counter() - start)
+        agreement = np.mean([
+            (engine.segment(image) == mask).mean() for image, mask in zip(images, reference_masks)
+        ])
+        results[name] = statistics.median(timings) * 1000
+        print(
+            f"{name:12s} median={results[name]:8.1f} ms  setup={setup_s:5.1f} s  "
+            f"agreement={agreement * 100:6.2f}%"
+        )
+
+    if "eager" in results:
+        for name, ms in results.items():
+            if name != "eager":
+                print(f"{name}: {results['eager'] / ms:.2f}x vs eager")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Build a canonical Face Mesh face for the rigid pose engine.
+
+Each sample's landmarks_3d are centered, scale-normalized and rotated back to
+a frontal orientation using the PnP pose, then averaged. Because the template
+is defined by the PnP poses, the rigid engine reports angles that agree with
+the PnP path on average. Set config.POSE_CANONICAL_FACE_PATH to the output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.context import FrameContext  # noqa: E402
+from app.validators.step3_face import FaceDetectionValidator  # noqa: E402
+from app.validators.step4_pose import PoseEstimationValidator  # noqa: E402
+from app.utils.pose_utils import MODEL_TO_IMAGE  # noqa: E402
+
+
+def find_images(root: Path, limit: int) -> List[Path]:
+    """Collect up to `limit` jpg/png images below root."""
+    paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    return paths[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", type=Path, help="Directory of (mostly frontal) face images")
+    parser.add_argument("--output", type=Path, default=Path("models/canonical_face.npy"))
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    face_validator = FaceDetectionValidator()
+    pose_validator = PoseEstimationValidator()
+
+    frontal_shapes = []
+    for path in find_images(args.images, args.limit):
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        context = FrameContext(image=image)
+        face_validator.validate(image, context)
+        if context.landmarks_3d is None:
+            continue
+        h, w = image.shape[:2]
+        pose = pose_validator._solve_pose(
+            pose_validator.model_points,
+            pose_validator._get_image_points(context.landmarks),
+            w,
+            h
+        )
+        if pose is None:
+            continue
+
+        rotation_matrix, _ = cv2.Rodrigues(pose[3])
+        # Rotation of the image-axes template that reproduces this PnP pose
+        template_rotation = rotation_matrix @ MODEL_TO_IMAGE
+
+        points = context.landmarks_3d.astype(np.float64)
+        points -= points.mean(axis=0)
+        points /= np.sqrt((points ** 2).sum(axis=1).mean())
+        # Undo the head rotation so every sample is in the frontal frame
+        frontal_shapes.append(points @ template_rotation)
+
+    if not frontal_shapes:
+        raise SystemExit("No faces found; check the image directory.")
+
+    template = np.mean(frontal_shapes, axis=0).astype(np.float32)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    np.save(args.output, template)
+    print(f"Saved canonical face from {len(frontal_shapes)} samples to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
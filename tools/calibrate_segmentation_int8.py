@@ -0,0 +1,59 @@
+"""
+Build the INT8 segmentation artifact used by SEGMENTATION_ENGINE=int8.
+
+Calibrates activation ranges of a static post-training quantized DeepLabV3
+on local sample photos (resized like BackgroundValidator does) and writes the
+frozen TorchScript artifact. Check its verdicts against the fp32 model with
+tools/report_segmentation_int8.py before deploying it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core import settings  # noqa: E402
+from app.segmentation.quantized import quantize_deeplab, save_artifact  # noqa: E402
+from app.validators.step6_background import BackgroundValidator  # noqa: E402
+
+
+def iter_images(root: Path, limit: int) -> Iterator[np.ndarray]:
+    """RGB photos at segmentation input size."""
+    paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    for path in paths[:limit]:
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        yield BackgroundValidator._resize_for_segmentation(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", type=Path, help="Directory of representative photos")
+    parser.add_argument("--limit", type=int, default=200, help="Calibration images to use")
+    parser.add_argument("--output", type=Path, default=Path(settings.SEGMENTATION_INT8_PATH))
+    parser.add_argument("--random-weights", action="store_true", help="Skip the weight download (pipeline check only)")
+    args = parser.parse_args()
+
+    if args.random_weights:
+        import torch
+        torch.manual_seed(0)
+
+    start = perf_counter()
+    module = quantize_deeplab(iter_images(args.images, args.limit), pretrained=not args.random_weights)
+    save_artifact(module, str(args.output))
+    print(f"Wrote {args.output} ({args.output.stat().st_size / 1e6:.1f} MB) in {perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Check that the rigid and PnP head pose engines report the same signed angles.
+
+The generic face model is posed over a grid of yaw/pitch/roll, projected with
+the validator's pinhole camera into Face Mesh style landmarks (pixel x/y, z
+relative to the face and scaled like x), and both engines estimate the pose
+of every projection. Exits non-zero when any angle differs by more than
+--tolerance degrees, e.g. when one engine's yaw comes out mirrored.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.landmark_utils import POSE_LANDMARK_INDICES  # noqa: E402
+from app.utils.pose_utils import RigidPoseEngine  # noqa: E402
+from app.validators.step4_pose import PoseEstimationValidator, _camera_matrix  # noqa: E402
+
+
+def euler_to_rotation(yaw: float, pitch: float, roll: float) -> np.ndarray:
+    """R = Rz(yaw) * Ry(pitch) * Rx(roll), angles in degrees."""
+    y, p, r = np.radians([yaw, pitch, roll])
+    rz = np.array([[np.cos(y), -np.sin(y), 0], [np.sin(y), np.cos(y), 0], [0, 0, 1]])
+    ry = np.array([[np.cos(p), 0, np.sin(p)], [0, 1, 0], [-np.sin(p), 0, np.cos(p)]])
+    rx = np.array([[1, 0, 0], [0, np.cos(r), -np.sin(r)], [0, np.sin(r), np.cos(r)]])
+    return rz @ ry @ rx
+
+
+def project(
+    model_points: np.ndarray,
+    rotation: np.ndarray,
+    distance: float,
+    size: tuple
+) -> np.ndarray:
+    """Face Mesh style (468, 3) landmarks of the posed model (only the pose points are set)."""
+    w, h = size
+    camera = rotation @ model_points.T + np.array([[0.0], [0.0], [distance]])
+    image_points, _ = cv2.projectPoints(
+        model_points, cv2.Rodrigues(rotation)[0], np.array([0.0, 0.0, distance]), _camera_matrix(w, h), np.zeros((4, 1))
+    )
+    landmarks = np.zeros((468, 3), dtype=np.float32)
+    landmarks[POSE_LANDMARK_INDICES, :2] = image_points[:, 0]
+    # Face Mesh z: depth relative to the face, in the same pixel scale as x
+    landmarks[POSE_LANDMARK_INDICES, 2] = (camera[2] - distance) * _camera_matrix(w, h)[0, 0] / distance
+    return landmarks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-angle", type=float, default=30.0, help="Largest yaw/pitch/roll of the grid")
+    parser.add_argument("--steps", type=int, default=7, help="Grid values per axis")
+    parser.add_argument("--distance", type=float, default=4000.0, help="Camera distance in model units")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Largest allowed difference in degrees")
+    args = parser.parse_args()
+
+    size = (640, 480)
+    validator = PoseEstimationValidator()
+    engine = RigidPoseEngine()
+    # Face Mesh landmarks are mirrored relative to the PnP model (index 263,
+    # the model's "left eye left corner", is the subject's left eye), so real
+    # faces solve to a PnP rotation about half a turn around z
+    mirrored = euler_to_rotation(180.0, 0.0, 0.0)
+
+    grid = np.linspace(-args.max_angle, args.max_angle, args.steps)
+    worst = np.zeros(3)
+    for yaw, pitch, roll in itertools.product(grid, grid, grid):
+        rotation = mirrored @ euler_to_rotation(yaw, pitch, roll)
+        landmarks_3d = project(validator.model_points, rotation, args.distance, size)
+        pnp = validator._solve_pose(validator.model_points, validator._get_image_points(landmarks_3d[:, :2]), *size)
+        if pnp is None:
+            raise SystemExit(f"PnP failed at yaw={yaw:.1f} pitch={pitch:.1f} roll={roll:.1f}")
+        rigid = engine.estimate(landmarks_3d)
+        diff = np.abs(np.array(rigid[:3]) - np.array(pnp[:3]))
+        if np.any(diff > args.tolerance):
+            print(
+                f"yaw={yaw:6.1f} pitch={pitch:6.1f} roll={roll:6.1f}: "
+                f"pnp=({pnp[0]:.1f}, {pnp[1]:.1f}, {pnp[2]:.1f}) rigid=({rigid[0]:.1f}, {rigid[1]:.1f}, {rigid[2]:.1f})"
+            )
+        worst = np.maximum(worst, diff)
+
+    print(f"Poses: {len(grid) ** 3}")
+    print(f"Max |rigid - pnp| (degrees): yaw={worst[0]:.2f} pitch={worst[1]:.2f} roll={worst[2]:.2f}")
+    if np.any(worst > args.tolerance):
+        raise SystemExit(f"Engines disagree by more than {args.tolerance} degrees")
+
+
+if __name__ == "__main__":
+    main()
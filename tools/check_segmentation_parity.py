@@ -0,0 +1,117 @@
+"""
+Parity check of the segmentation backends against the eager PyTorch model.
+
+Segments the same images (resized like BackgroundValidator does) with each
+backend and compares the masks with the eager fp32 reference: pixel
+agreement, person IoU and latency. Exits non-zero when a backend falls below
+--min-agreement, so it can gate an ONNX export or a runtime upgrade in CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import List
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core import settings  # noqa: E402
+from app.segmentation.base import PERSON_CLASS, SegmentationEngine  # noqa: E402
+from app.validators.step6_background import BackgroundValidator  # noqa: E402
+
+
+def load_images(root: Path | None, limit: int) -> List[np.ndarray]:
+    """RGB images at segmentation input size (noise images without a directory)."""
+    if root is None:
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 256, (1200, 900, 3), dtype=np.uint8) for _ in range(min(limit, 4))]
+    else:
+        paths = sorted(p for p in root.rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))[:limit]
+        images = [cv2.imread(str(path)) for path in paths]
+        images = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images if image is not None]
+    if not images:
+        raise SystemExit("No images found; check the image directory.")
+    return [BackgroundValidator._resize_for_segmentation(image) for image in images]
+
+
+def build_backend(name: str, model_path: str, threads: int, pretrained: bool) -> SegmentationEngine:
+    if name == "onnxruntime":
+        from app.segmentation.onnx_engines import OnnxRuntimeEngine
+        return OnnxRuntimeEngine(model_path, threads=threads)
+    if name == "opencv":
+        from app.segmentation.onnx_engines import OpenCVDnnEngine
+        return OpenCVDnnEngine(model_path, threads=threads)
+    if name == "torchscript":
+        import torch
+        from app.segmentation.torch_engines import TorchScriptEngine
+        torch.manual_seed(0)
+        return TorchScriptEngine(cache_dir=None, pretrained=pretrained)
+    raise SystemExit(f"Unknown backend: {name}")
+
+
+def person_iou(mask: np.ndarray, reference: np.ndarray) -> float:
+    person, ref_person = mask == PERSON_CLASS, reference == PERSON_CLASS
+    union = np.logical_or(person, ref_person).sum()
+    return 1.0 if union == 0 else float(np.logical_and(person, ref_person).sum() / union)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", type=Path, nargs="?", default=None, help="Directory of photos (default: noise)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--backends", nargs="+", default=["onnxruntime", "opencv"])
+    parser.add_argument("--model", default=settings.SEGMENTATION_ONNX_PATH, help="Exported ONNX model")
+    parser.add_argument("--threads", type=int, default=settings.SEGMENTATION_THREADS)
+    parser.add_argument("--min-agreement", type=float, default=0.995, help="Minimum mean pixel agreement")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="Reference with the seeded random weights of export_segmentation_onnx.py --random-weights")
+    args = parser.parse_args()
+
+    import torch
+    from app.segmentation.torch_engines import TorchEagerEngine
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    reference = TorchEagerEngine(pretrained=not args.random_weights)
+
+    images = load_images(args.images, args.limit)
+    reference_masks = [reference.segment(image) for image in images]
+    print(f"Images: {len(images)} at {images[0].shape[1]}x{images[0].shape[0]}")
+
+    failed = []
+    for name in args.backends:
+        engine = build_backend(name, args.model, args.threads, not args.random_weights)
+        engine.segment(images[0])
+        timings, agreement, iou = [], [], []
+        for image, ref_mask in zip(images, reference_masks):
+            start = perf_counter()
+            mask = engine.segment(image)
+            timings.append(perf_counter() - start)
+            agreement.append((mask == ref_mask).mean())
+            iou.append(person_iou(mask, ref_mask))
+        mean_agreement = float(np.mean(agreement))
+        ok = mean_agreement >= args.min_agreement
+        print(
+            f"{name:12s} agreement={mean_agreement * 100:6.2f}% (min {min(agreement) * 100:6.2f}%)  "
+            f"person IoU={np.mean(iou):.4f}  median={statistics.median(timings) * 1000:7.1f} ms  "
+            f"{'OK' if ok else 'FAIL'}"
+        )
+        if not ok:
+            failed.append(name)
+        engine.close()
+
+    if failed:
+        raise SystemExit(f"Parity below {args.min_agreement:.3f}: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
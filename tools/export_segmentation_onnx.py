@@ -0,0 +1,42 @@
+"""
+Export the DeepLabV3 segmentation model to ONNX.
+
+The exported graph is what SEGMENTATION_ENGINE=onnxruntime and
+SEGMENTATION_ENGINE=opencv load, so nodes running only those engines do not
+need torch installed. Check the export against the PyTorch reference with
+tools/check_segmentation_parity.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core import settings  # noqa: E402
+from app.segmentation.torch_engines import export_onnx  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path, default=Path(settings.SEGMENTATION_ONNX_PATH))
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--random-weights", action="store_true", help="Skip the weight download (pipeline check only)")
+    args = parser.parse_args()
+
+    if args.random_weights:
+        import torch
+        torch.manual_seed(0)
+
+    start = perf_counter()
+    export_onnx(str(args.output), pretrained=not args.random_weights, opset=args.opset)
+    print(f"Wrote {args.output} ({args.output.stat().st_size / 1e6:.1f} MB) in {perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Accuracy report of the INT8 segmentation artifact against the fp32 model.
+
+Runs BackgroundValidator with the eager fp32 engine and with the INT8 engine
+on every photo and compares what matters for validation: the background
+uniformity and extra-person verdicts (plus extraneous objects), the person
+mask IoU and the latency. Use photos that were not used for calibration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core import settings  # noqa: E402
+from app.core.context import FrameContext  # noqa: E402
+from app.core.errors import ErrorCode  # noqa: E402
+from app.segmentation.base import PERSON_CLASS  # noqa: E402
+from app.segmentation.quantized import QuantizedEngine  # noqa: E402
+from app.segmentation.torch_engines import TorchEagerEngine  # noqa: E402
+from app.validators.step6_background import BackgroundValidator  # noqa: E402
+
+VERDICTS = {
+    "background_uniform": ErrorCode.BACKGROUND_NOT_UNIFORM,
+    "single_person": ErrorCode.EXTRANEOUS_PEOPLE,
+    "no_objects": ErrorCode.EXTRANEOUS_OBJECTS,
+}
+
+
+def run(validator: BackgroundValidator, image: np.ndarray):
+    context = FrameContext(image=image)
+    start = perf_counter()
+    result = validator.validate(image, context)
+    elapsed = perf_counter() - start
+    codes = {error.code for error in result.errors}
+    verdicts = {name: code not in codes for name, code in VERDICTS.items()}
+    return verdicts, context.segmentation_mask, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", type=Path, help="Directory of held-out photos")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--artifact", type=Path, default=Path(settings.SEGMENTATION_INT8_PATH))
+    parser.add_argument("--random-weights", action="store_true", help="Compare with seed-0 random weights")
+    args = parser.parse_args()
+
+    if args.random_weights:
+        import torch
+        torch.manual_seed(0)
+    reference = BackgroundValidator(engine=TorchEagerEngine(pretrained=not args.random_weights))
+    quantized = BackgroundValidator(engine=QuantizedEngine(str(args.artifact)))
+
+    paths = sorted(p for p in args.images.rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    agreement = {name: 0 for name in VERDICTS}
+    disagreements = []
+    ious, fp32_times, int8_times = [], [], []
+    count = 0
+    for path in paths[:args.limit]:
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        ref_verdicts, ref_mask, ref_time = run(reference, image)
+        q_verdicts, q_mask, q_time = run(quantized, image)
+        if ref_mask is None or q_mask is None:
+            continue
+        count += 1
+        fp32_times.append(ref_time)
+        int8_times.append(q_time)
+
+        ref_person = ref_mask == PERSON_CLASS
+        q_person = q_mask == PERSON_CLASS
+        union = np.logical_or(ref_person, q_person).sum()
+        ious.append(np.logical_and(ref_person, q_person).sum() / union if union else 1.0)
+
+        for name in VERDICTS:
+            if ref_verdicts[name] == q_verdicts[name]:
+                agreement[name] += 1
+            else:
+                disagreements.append((path.name, name, ref_verdicts[name], q_verdicts[name]))
+
+    if not count:
+        raise SystemExit("No images could be segmented; check the image directory.")
+
+    print(f"Images: {count}")
+    for name in VERDICTS:
+        print(f"  {name:20s} agreement {agreement[name] / count * 100:6.2f}% ({agreement[name]}/{count})")
+    print(f"  person IoU          mean {np.mean(ious):.3f}  min {np.min(ious):.3f}")
+    print(
+        f"  validator latency   fp32 {statistics.median(fp32_times) * 1000:.1f} ms  "
+        f"int8 {statistics.median(int8_times) * 1000:.1f} ms (median)"
+    )
+    if disagreements:
+        print("\nDisagreements (image, verdict, fp32, int8):")
+        for row in disagreements:
+            print("  ", *row)
+
+
+if __name__ == "__main__":
+    main()